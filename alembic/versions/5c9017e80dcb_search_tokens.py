@@ -0,0 +1,56 @@
+"""Search tokens
+
+Revision ID: 5c9017e80dcb
+Revises: 6e02e6fdf0f9
+Create Date: 2026-10-17 12:04:31.415926
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5c9017e80dcb'
+down_revision = '6e02e6fdf0f9'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+
+    # Search tokens are filled by lingvodoc.scripts.search_token_backfill.
+
+    op.execute('''
+
+        CREATE TABLE search_token (
+
+          id BIGSERIAL PRIMARY KEY,
+          token TEXT NOT NULL,
+          entity_client_id BIGINT NOT NULL,
+          entity_object_id BIGINT NOT NULL,
+          field_client_id BIGINT NOT NULL,
+          field_object_id BIGINT NOT NULL,
+          perspective_client_id BIGINT NOT NULL,
+          perspective_object_id BIGINT NOT NULL
+
+        );
+
+        CREATE INDEX search_token_entity_id_idx
+          ON search_token (entity_client_id, entity_object_id);
+
+        CREATE INDEX search_token_lower_trgm_idx
+          ON search_token USING gin (lower(token) gin_trgm_ops);
+
+        CREATE INDEX search_token_diacritic_xform_trgm_idx
+          ON search_token USING gin (diacritic_xform(token) gin_trgm_ops);
+
+        ''')
+
+
+def downgrade():
+
+    op.execute('''
+
+        DROP TABLE IF EXISTS search_token;
+
+        ''')
@@ -0,0 +1,55 @@
+"""EAF annotations
+
+Revision ID: 8b3e4f1a27c6
+Revises: 5c9017e80dcb
+Create Date: 2026-10-17 16:21:07.271828
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '8b3e4f1a27c6'
+down_revision = '5c9017e80dcb'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+
+    # Annotations are extracted by lingvodoc.scripts.eaf_annotation_backfill.
+
+    op.execute('''
+
+        CREATE TABLE eaf_annotation (
+
+          id BIGSERIAL PRIMARY KEY,
+          entity_client_id BIGINT NOT NULL,
+          entity_object_id BIGINT NOT NULL,
+          tier TEXT NOT NULL,
+          start_time BIGINT,
+          end_time BIGINT,
+          content TEXT NOT NULL
+
+        );
+
+        CREATE INDEX eaf_annotation_entity_id_idx
+          ON eaf_annotation (entity_client_id, entity_object_id);
+
+        CREATE INDEX eaf_annotation_content_lower_trgm_idx
+          ON eaf_annotation USING gin (lower(content) gin_trgm_ops);
+
+        CREATE INDEX eaf_annotation_tier_lower_trgm_idx
+          ON eaf_annotation USING gin (lower(tier) gin_trgm_ops);
+
+        ''')
+
+
+def downgrade():
+
+    op.execute('''
+
+        DROP TABLE IF EXISTS eaf_annotation;
+
+        ''')
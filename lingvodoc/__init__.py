@@ -36,7 +36,10 @@ from .acl import groupfinder
 
 from .models import (
     DBSession,
-    Base)
+    Base,
+    set_eaf_annotation_index,
+    set_object_id_block_size,
+    set_search_token_index)
 
 from lingvodoc.cache.caching import (
     initialize_cache)
@@ -824,6 +827,9 @@ def configure_routes(config):
 
     config.add_route(name="tasks", pattern="/tasks", request_method='GET')
 
+    # Numbers of tasks waiting in Celery queues and of user's running tasks limited per user.
+    config.add_route(name="task_queues", pattern="/tasks/queues", request_method='GET')
+
     config.add_route(name="delete_task", pattern="/tasks/{task_id}", request_method='DELETE')
 
     #
@@ -863,6 +869,22 @@ def main(global_config, **settings):
     engine = engine_from_config(settings, 'sqlalchemy.')
     DBSession.configure(bind=engine)
     Base.metadata.bind = engine
+
+    # Maximum size of blocks of object ids reserved at once, see models.get_client_counter().
+
+    set_object_id_block_size(
+        settings.get('object_id_block_size'))
+
+    # If dictionary search should use search tokens, see models.SearchToken.
+
+    set_search_token_index(
+        settings.get('search_token_index'))
+
+    # If EAF corpora search should use extracted annotations, see models.EafAnnotation.
+
+    set_eaf_annotation_index(
+        settings.get('eaf_annotation_index'))
+
     from pyramid.config import Configurator
     config_file = global_config['__file__']
     parser = ConfigParser()
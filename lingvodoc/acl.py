@@ -2,19 +2,26 @@
 # Standard library imports.
 
 import logging
+import uuid
 
 # Library imports.
 
 from pyramid.security import forget
 
 from sqlalchemy import (
+    event,
+    inspect,
     literal,
-    or_)
+    or_,
+    tuple_)
 
 from sqlalchemy.orm import joinedload
 
 # Project imports.
 
+import lingvodoc.cache.caching as caching
+from lingvodoc.cache.local.cache import LocalCache
+
 from lingvodoc.models import (
     acl_by_groups,
     acl_by_groups_single_id,
@@ -23,7 +30,9 @@ from lingvodoc.models import (
     DBSession,
     DictionaryPerspective,
     Group,
+    Organization,
     organization_to_group_association,
+    TranslationAtom,
     User,
     user_to_group_association,
     user_to_organization_association)
@@ -189,6 +198,434 @@ def check(client_id, request, action, subject, subject_id):
     return False
 
 
+class PermissionIndex(object):
+    """
+    Permissions of a user through groups of the user and of user's organizations, loaded with a single
+    query, for checking permissions without querying the DB.
+
+    For each subject / action pair stores if the user has the permission for any subject through
+    subject_override groups, the same through by-user groups only, and ids of subjects the user has the
+    permission for.
+    """
+
+    def __init__(self, permission_dict):
+        """
+        :param permission_dict: '<subject>:<action>' -> [override flag, by-user override flag, set of
+            (client_id, object_id) subject ids]
+        """
+
+        self.permission_dict = permission_dict
+
+        # Permissions of subjects specified by a single object_id are checked by object_id only.
+
+        self.object_id_dict = {
+            key: {object_id for client_id, object_id in id_set}
+            for key, (override, user_override, id_set) in permission_dict.items()}
+
+    @classmethod
+    def load(cls, user_id):
+
+        user_query = (
+
+            DBSession
+
+                .query(
+                    BaseGroup.subject,
+                    BaseGroup.action,
+                    Group.subject_override,
+                    Group.subject_client_id,
+                    Group.subject_object_id,
+                    literal(True))
+
+                .filter(
+                    Group.base_group_id == BaseGroup.id,
+                    user_to_group_association.c.user_id == user_id,
+                    user_to_group_association.c.group_id == Group.id))
+
+        organization_query = (
+
+            DBSession
+
+                .query(
+                    BaseGroup.subject,
+                    BaseGroup.action,
+                    Group.subject_override,
+                    Group.subject_client_id,
+                    Group.subject_object_id,
+                    literal(False))
+
+                .filter(
+                    Group.base_group_id == BaseGroup.id,
+                    user_to_organization_association.c.user_id == user_id,
+                    organization_to_group_association.c.organization_id ==
+                        user_to_organization_association.c.organization_id,
+                    organization_to_group_association.c.group_id == Group.id))
+
+        permission_dict = {}
+
+        for (
+            subject,
+            action,
+            subject_override,
+            subject_client_id,
+            subject_object_id,
+            by_user) in user_query.union_all(organization_query).all():
+
+            permission = (
+
+                permission_dict.setdefault(
+                    subject + ':' + action, [False, False, set()]))
+
+            if subject_override:
+
+                permission[0] = True
+
+                if by_user:
+                    permission[1] = True
+
+            else:
+                permission[2].add((subject_client_id, subject_object_id))
+
+        # Subject ids are redundant for permissions granted through subject_override groups.
+
+        for permission in permission_dict.values():
+
+            if permission[0]:
+                permission[2] = set()
+
+        return cls(permission_dict)
+
+    def check(self, action, subject, subject_id):
+        """
+        Checks permission in the same way as check_direct() does for an active user.
+        """
+
+        key = subject + ':' + action
+        permission = self.permission_dict.get(key)
+
+        if permission is None:
+            return False
+
+        override, user_override, id_set = permission
+
+        if isinstance(subject_id, (list, tuple)):
+            return override or tuple(subject_id[:2]) in id_set
+
+        elif isinstance(subject_id, int):
+            return override or subject_id in self.object_id_dict[key]
+
+        # Subjects with no id are checked through by-user subject_override groups only.
+
+        return user_override
+
+
+# Permission indices are cached in Redis under versioned keys and in-process. Versions of indices consist of
+# a global version, changed with changes of permissions which can affect any user, and versions of users,
+# changed with committed changes of group / organization membership of users, so that cached indices of
+# affected users are not used anymore.
+
+ACL_VERSION_KEY = 'acl_version'
+ACL_INDEX_EXPIRATION_TIME = 86400
+
+acl_index_cache = LocalCache(4096, 300)
+
+
+def user_acl_version_key(user_id):
+    return 'acl_version:{0}'.format(user_id)
+
+
+def mark_acl_changed():
+    """
+    Marks current transaction as changing permissions of any users, so that all cached permission indices
+    are invalidated when it is committed; required only for changes of group / organization membership not
+    made through ORM, which are tracked automatically.
+    """
+
+    DBSession().info['acl_changed'] = True
+
+
+def bump_acl_version(user_id_set = None):
+    """
+    Invalidates cached permission indices of specified users, or of all users if no users are specified.
+    """
+
+    if not caching.CACHE:
+        return
+
+    if user_id_set is None:
+
+        caching.CACHE.set(
+            key = ACL_VERSION_KEY,
+            value = str(uuid.uuid4()))
+
+    elif user_id_set:
+
+        caching.CACHE.set(
+            key_value = {
+                user_acl_version_key(user_id): str(uuid.uuid4())
+                for user_id in user_id_set})
+
+
+def get_acl_version(user_id, request):
+    """
+    Returns current version of permission index of a user, read from Redis once per request, or None if
+    there is no Redis cache.
+    """
+
+    version_dict = getattr(request, 'acl_version_dict', None)
+
+    if version_dict is None:
+
+        version_dict = {}
+
+        if request is not None:
+            request.acl_version_dict = version_dict
+
+    version = version_dict.get(user_id)
+
+    if version is not None:
+        return version
+
+    if not caching.CACHE:
+        return None
+
+    key_list = [
+        ACL_VERSION_KEY,
+        user_acl_version_key(user_id)]
+
+    version_list = caching.CACHE.get(key_list)
+
+    # Initializing missing versions, unless someone else already did.
+
+    for key, value in zip(key_list, version_list):
+
+        if value is None:
+            caching.CACHE.set_if_absent(key, str(uuid.uuid4()))
+
+    if None in version_list:
+        version_list = caching.CACHE.get(key_list)
+
+    if None in version_list:
+        return None
+
+    version = ':'.join(version_list)
+    version_dict[user_id] = version
+
+    return version
+
+
+def get_permission_index(user_id, request):
+    """
+    Returns permission index of a user, None if indices can't be used.
+    """
+
+    version = get_acl_version(user_id, request)
+
+    if version is None:
+        return None
+
+    # Changes of permissions made in the current transaction are not reflected by indices.
+
+    session = DBSession()
+
+    if (session.info.get('acl_changed') or
+        acl_changed(session.new, session.dirty, session.deleted)):
+
+        return None
+
+    entry = acl_index_cache.get(user_id)
+
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    key = 'acl_index:{0}:{1}'.format(user_id, version)
+
+    permission_dict = caching.CACHE.get(key)
+
+    if permission_dict is not None:
+        index = PermissionIndex(permission_dict)
+
+    else:
+
+        index = PermissionIndex.load(user_id)
+
+        caching.CACHE.set(
+            key = key,
+            value = index.permission_dict,
+            expiration_time = ACL_INDEX_EXPIRATION_TIME)
+
+    acl_index_cache.set(user_id, (version, index))
+
+    return index
+
+
+# Attributes whose changes change permissions, by model.
+
+acl_attribute_dict = {
+    User: ['groups', 'organizations'],
+    Group: ['users', 'organizations', 'base_group_id', 'subject_override', 'subject_client_id',
+        'subject_object_id'],
+    Organization: ['users', 'groups'],
+    BaseGroup: ['subject', 'action']}
+
+
+def acl_changed(new, dirty, deleted):
+    """
+    Checks if any of new, modified or deleted objects change permissions.
+    """
+
+    for obj in new:
+        if type(obj) in acl_attribute_dict:
+            return True
+
+    for obj in deleted:
+        if type(obj) in acl_attribute_dict:
+            return True
+
+    for obj in dirty:
+
+        attribute_list = acl_attribute_dict.get(type(obj))
+
+        if attribute_list is None:
+            continue
+
+        state = inspect(obj)
+
+        for attribute in attribute_list:
+            if state.attrs[attribute].history.has_changes():
+                return True
+
+    return False
+
+
+def acl_changed_user_id_set(new, dirty, deleted):
+    """
+    Returns set of ids of users whose permissions are changed by new, modified or deleted objects, or None if
+    permissions of any users can be changed.
+
+    Must be called after flush, when new objects have ids and changes of attributes are still available.
+    """
+
+    user_id_set = set()
+
+    def add_users(user_list):
+        user_id_set.update(user.id for user in user_list)
+
+    def add_group_users(group):
+        add_users(group.users)
+        for organization in group.organizations:
+            add_users(organization.users)
+
+    def history(obj, attribute):
+        attribute_history = inspect(obj).attrs[attribute].history
+        return list(attribute_history.added or ()) + list(attribute_history.deleted or ())
+
+    # Deleted groups, organizations and base groups, which are almost never deleted, can affect anyone, as
+    # their members may be already unavailable.
+
+    for obj in deleted:
+
+        if isinstance(obj, User):
+            user_id_set.add(obj.id)
+
+        elif type(obj) in acl_attribute_dict:
+            return None
+
+    for obj in new:
+
+        if isinstance(obj, User):
+            user_id_set.add(obj.id)
+
+        elif isinstance(obj, Group):
+            add_group_users(obj)
+
+        elif isinstance(obj, Organization):
+            add_users(obj.users)
+
+    for obj in dirty:
+
+        attribute_list = acl_attribute_dict.get(type(obj))
+
+        if attribute_list is None:
+            continue
+
+        state = inspect(obj)
+
+        changed_list = [
+            attribute for attribute in attribute_list
+            if state.attrs[attribute].history.has_changes()]
+
+        if not changed_list:
+            continue
+
+        if isinstance(obj, User):
+            user_id_set.add(obj.id)
+
+        elif isinstance(obj, BaseGroup):
+            return None
+
+        elif isinstance(obj, Group):
+
+            for attribute in changed_list:
+
+                if attribute == 'users':
+                    add_users(history(obj, 'users'))
+
+                elif attribute == 'organizations':
+                    for organization in history(obj, 'organizations'):
+                        add_users(organization.users)
+
+                else:
+                    add_group_users(obj)
+
+        elif isinstance(obj, Organization):
+
+            if 'users' in changed_list:
+                add_users(history(obj, 'users'))
+
+            if 'groups' in changed_list:
+                add_users(obj.users)
+
+    return user_id_set
+
+
+@event.listens_for(DBSession, 'after_flush')
+def acl_after_flush(session, flush_context):
+
+    changed = session.info.get('acl_changed')
+
+    if changed is True:
+        return
+
+    user_id_set = (
+        acl_changed_user_id_set(session.new, session.dirty, session.deleted))
+
+    if user_id_set is None:
+        session.info['acl_changed'] = True
+
+    elif user_id_set:
+        session.info['acl_changed'] = (changed or set()) | user_id_set
+
+
+@event.listens_for(DBSession, 'after_commit')
+def acl_after_commit(session):
+
+    changed = session.info.pop('acl_changed', None)
+
+    if changed is True:
+        bump_acl_version()
+
+    elif changed:
+        bump_acl_version(changed)
+
+
+@event.listens_for(DBSession, 'after_transaction_end')
+def acl_after_transaction_end(session, transaction):
+
+    if transaction.parent is None:
+        session.info.pop('acl_changed', None)
+
+
 def check_direct(client_id, request, action, subject, subject_id):
     """
     Checks if a given action on a given subject is permitted for the specified client, accesses DB directly,
@@ -220,6 +657,28 @@ def check_direct(client_id, request, action, subject, subject_id):
             (perspective.state == 'Published' or perspective.state == 'Limited access') and
             (action == 'view' or action == 'preview'))
 
+    # Checking through user's permission index, if we can, in the same way as below.
+
+    index = get_permission_index(user.id, request)
+
+    if index is not None:
+
+        if (subject == 'approve_entities' and
+            isinstance(subject_id, (list, tuple))):
+
+            perspective = DictionaryPerspective.get(subject_id)
+
+            if (perspective and
+                (perspective.state == 'Published' or perspective.state == 'Limited access') and
+                (action == 'view' or action == 'preview')):
+
+                return True
+
+        if not user.is_active and action != 'view':
+            return False
+
+        return index.check(action, subject, subject_id)
+
     # Subject is specified by a client_id/object_id pair.
 
     if isinstance(subject_id, (list, tuple)):
@@ -406,3 +865,146 @@ def check_direct(client_id, request, action, subject, subject_id):
 
     raise NotImplementedError
 
+
+
+def viewable_perspective_id_set(perspective_id_list):
+    """
+    Returns ids of perspectives from a list which are viewable by anyone, i.e. published or with limited
+    access, with a single query.
+    """
+
+    if not perspective_id_list:
+        return set()
+
+    return set(
+
+        DBSession
+
+            .query(
+                DictionaryPerspective.client_id,
+                DictionaryPerspective.object_id)
+
+            .filter(
+                tuple_(
+                    DictionaryPerspective.client_id,
+                    DictionaryPerspective.object_id)
+                    .in_(perspective_id_list),
+                TranslationAtom.parent_client_id == DictionaryPerspective.state_translation_gist_client_id,
+                TranslationAtom.parent_object_id == DictionaryPerspective.state_translation_gist_object_id,
+                TranslationAtom.locale_id == 2,
+                TranslationAtom.content.in_(['Published', 'Limited access']))
+
+            .all())
+
+
+def check_direct_many(client_id, request, action, subject, subject_id_list):
+    """
+    Checks if a given action is permitted for the specified client for each of specified subjects, in the
+    same way as check_direct() does, but with at most a couple of queries.
+
+    Subjects must be specified by client_id/object_id pairs. Returns dictionary of results by subject id
+    tuples.
+    """
+
+    id_list = list(set(tuple(subject_id[:2]) for subject_id in subject_id_list))
+
+    result_dict = dict.fromkeys(id_list, False)
+
+    if not id_list:
+        return result_dict
+
+    client_id = get_effective_client_id(client_id, request)
+
+    try:
+        user = Client.get_user_by_client_id(client_id)
+
+    except:
+        return result_dict
+
+    # Perspective state allows viewing for anonymous users, and for 'approve_entities' subject for
+    # everybody.
+
+    state_flag = (
+        (action == 'view' or action == 'preview') and
+        (not client_id or not user or subject == 'approve_entities'))
+
+    if state_flag:
+
+        for subject_id in viewable_perspective_id_set(id_list):
+            result_dict[subject_id] = True
+
+    if (not client_id or
+        not user):
+
+        return result_dict
+
+    # If the user is deactivated, we won't allow any actions except for viewing.
+
+    if not user.is_active and action != 'view':
+        return result_dict
+
+    check_id_list = [
+        subject_id for subject_id, result in result_dict.items() if not result]
+
+    index = get_permission_index(user.id, request)
+
+    if index is not None:
+
+        for subject_id in check_id_list:
+            result_dict[subject_id] = index.check(action, subject, subject_id)
+
+        return result_dict
+
+    # Getting ids of subjects permitted through by-user and by-organization groups at once, with
+    # subject_override groups giving permissions for all subjects.
+
+    id_tuple = tuple_(Group.subject_client_id, Group.subject_object_id)
+
+    id_condition = (
+        or_(Group.subject_override, id_tuple.in_(check_id_list)))
+
+    user_query = (
+
+        DBSession
+
+            .query(
+                Group.subject_override,
+                Group.subject_client_id,
+                Group.subject_object_id)
+
+            .filter(
+                BaseGroup.subject == subject,
+                BaseGroup.action == action,
+                Group.base_group_id == BaseGroup.id,
+                id_condition,
+                user_to_group_association.c.user_id == user.id,
+                user_to_group_association.c.group_id == Group.id))
+
+    organization_query = (
+
+        DBSession
+
+            .query(
+                Group.subject_override,
+                Group.subject_client_id,
+                Group.subject_object_id)
+
+            .filter(
+                BaseGroup.subject == subject,
+                BaseGroup.action == action,
+                Group.base_group_id == BaseGroup.id,
+                id_condition,
+                user_to_organization_association.c.user_id == user.id,
+                organization_to_group_association.c.organization_id ==
+                    user_to_organization_association.c.organization_id,
+                organization_to_group_association.c.group_id == Group.id))
+
+    for subject_override, subject_client_id, subject_object_id in (
+        user_query.union(organization_query).all()):
+
+        if subject_override:
+            return dict.fromkeys(id_list, True)
+
+        result_dict[(subject_client_id, subject_object_id)] = True
+
+    return result_dict
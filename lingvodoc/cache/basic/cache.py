@@ -1,9 +1,8 @@
 __author__ = 'alexander'
 
-import dill
-
 # from dogpile.cache.api import NO_VALUE
 
+from lingvodoc.cache import codec
 from lingvodoc.cache.api.cache import ICache
 
 
@@ -19,11 +18,14 @@ class CommonCache(ICache):
         cached = self.cache.get(key)
         if cached is None:
             return None
-        return dill.loads(cached)
+        try:
+            return codec.loads(cached)
+        except codec.CodecError:
+            return None
 
     # TODO: add try/catch handlers.
     def set(self, key, value):
-        self.cache.set(key, dill.dumps(value))
+        self.cache.set(key, codec.dumps(value))
 
     def rem(self, key):
         self.cache.delete(key)
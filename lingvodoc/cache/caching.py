@@ -1,14 +1,17 @@
+import json
+import threading
 import time
 # from dogpile.cache.api import NO_VALUE
 # from dogpile.cache import make_region
 from redis import Redis
 
 from lingvodoc.cache.basic.cache import CommonCache
+from lingvodoc.cache.local.cache import LocalCache
 from lingvodoc.cache.mock.cache import MockCache
 from lingvodoc.cache.through.cache import ThroughCache
+from lingvodoc.queue.metrics import count_redis_requests
 
 import uuid
-import dill
 
 # We initialize MEMOIZE to identity function so that if the cache is not initialized (e.g. when an
 # automatically extracted source code documentation is being compiled), it is still possible to use it.
@@ -58,10 +61,94 @@ def initialize_cache(args):
         return
     # region = make_region().configure(**args)
     # MEMOIZE = cache_responses(region)
-    CACHE = ThroughCache(Redis(**args))
+
+    # Expiration time of cached database objects is not a Redis connection argument.
+
+    args = dict(args)
+    expiration_time = args.pop('object_expiration_time', None)
+
+    # In-process cache of translations in front of Redis, disabled if its size is 0.
+
+    local_cache_size = int(args.pop('local_cache_size', 16384))
+    local_cache_expiration_time = float(args.pop('local_cache_expiration_time', 60))
+
+    # Codec of cached values, values cached with any other known codec are still decoded.
+
+    codec_name = args.pop('codec', None)
+
+    # Maximum rate of task progress updates.
+
+    task_progress_rate = args.pop('task_progress_rate', None)
+
+    if task_progress_rate:
+        TaskStatus.progress_rate = float(task_progress_rate)
+
+    # Maximum waiting time and maximum number of simultaneously waiting long-polling requests for task
+    # updates.
+
+    task_poll_timeout = args.pop('task_poll_timeout', None)
+    task_poll_waiter_count = args.pop('task_poll_waiter_count', None)
+
+    if task_poll_timeout:
+        TaskStatus.poll_timeout = float(task_poll_timeout)
+
+    if task_poll_waiter_count:
+        TaskStatus.poll_semaphore = threading.BoundedSemaphore(int(task_poll_waiter_count))
+
+    CACHE = (
+
+        ThroughCache(
+            count_redis_requests(Redis(**args)),
+            int(expiration_time) if expiration_time else None,
+            LocalCache(local_cache_size, local_cache_expiration_time) if local_cache_size > 0 else None,
+            ('translation:', 'translations:'),
+            codec_name))
 
 
 class TaskStatus():
+    """
+    Status of a task, stored as a hash under its key, with keys of all tasks of a user stored in a set.
+
+    Progress updates are written at most 'progress_rate' times per second, updates of stage, status or result
+    links and task completion are always written.
+
+    Each written update and deletion increments the version of user's task statuses and is published to the
+    user's task channel, as JSON-encoded messages {"event": "task", "task": <task status>} and
+    {"event": "delete", "key": <task key>}.
+
+    Clients long-poll for updates with the version, see wait_user_tasks(). As the threaded waitress server
+    has only a few threads, waiting is limited to 'poll_timeout' seconds and to at most 'poll_semaphore'
+    simultaneously waiting requests per process.
+    """
+
+    # Attributes stored in the cache.
+
+    field_list = [
+        'id',
+        'user_id',
+        'key',
+        'current_stage',
+        'total_stages',
+        'progress',
+        'task_family',
+        'task_details',
+        'status',
+        'result_link_list',
+        'created_at',
+        'updated_at',
+        'metrics']
+
+    # Maximum number of progress-only updates written per second, can be set through cache configuration,
+    # not limited if 0.
+
+    progress_rate = 2.0
+
+    # Maximum time in seconds a long-polling request waits for an update of user's tasks, and semaphore
+    # limiting number of simultaneously waiting requests, both can be set through cache configuration.
+
+    poll_timeout = 20.0
+    poll_semaphore = threading.BoundedSemaphore(2)
+
     def __init__(self, user_id, task_family, task_details, total_stages):
         self.id = str(uuid.uuid4())
         self.user_id = str(user_id)
@@ -75,27 +162,55 @@ class TaskStatus():
         self.result_link_list = []
 
         self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.metrics = None
 
-        self.put_to_cache()
+        self.put_to_cache(True)
+
+    @staticmethod
+    def set_key(user_id):
+        return "task_set:" + str(user_id)
+
+    @staticmethod
+    def channel(user_id):
+        return "task_channel:" + str(user_id)
+
+    @staticmethod
+    def version_key(user_id):
+        return "task_version:" + str(user_id)
+
+    @classmethod
+    def from_dict(cls, task_dict):
+        task = cls.__new__(cls)
+        task.__dict__.update(task_dict)
+        task.put_time = None
+        return task
+
+    def to_dict(self):
+        return {field: getattr(self, field, None) for field in self.field_list}
 
-    def put_to_cache(self):
+    def put_to_cache(self, add_flag = False):
+        """
+        Writes task status to the cache, adding it to the set of user's tasks if required.
+        """
+        self.put_time = time.monotonic()
+        self.updated_at = time.time()
         if CACHE:
-            CACHE.set(self.key, dill.dumps(self))
-            current_tasks = CACHE.get("current_tasks:" + self.user_id)
-            if current_tasks:
-                current_tasks = dill.loads(current_tasks)
-                if self.key not in current_tasks:
-                    current_tasks.add(self.key)
-            else:
-                current_tasks = set([self.key])
-            CACHE.set("current_tasks:" + self.user_id, dill.dumps(current_tasks))
+            task_dict = self.to_dict()
+            CACHE.hash_set(
+                self.key,
+                task_dict,
+                self.set_key(self.user_id) if add_flag else None,
+                self.channel(self.user_id),
+                json.dumps({'event': 'task', 'task': task_dict}, default = str),
+                self.version_key(self.user_id))
 
     @classmethod
     def get_from_cache(cls, task_key):
         if CACHE:
-            task = CACHE.get(task_key)
-            if task:
-                return dill.loads(task)
+            task_dict = CACHE.hash_get(task_key)
+            if task_dict:
+                return cls.from_dict(task_dict)
             else:
                 return TaskStatus(0, "Dummy task", "task not found", 1)
         else:
@@ -105,41 +220,82 @@ class TaskStatus():
     def get_user_tasks(cls, user_id, clear_out=False):
         task_list = []
         if CACHE:
-            current_tasks = CACHE.get("current_tasks:" + str(user_id))
-            current_tasks = dill.loads(current_tasks) if current_tasks else []
-            for task_id in current_tasks:
-                task = CACHE.get(task_id)
-                if task:
-                    task = dill.loads(task)
-                    task_list.append(task)
+            task_key_list = CACHE.set_members(cls.set_key(user_id))
+            task_list = [
+                cls.from_dict(task_dict)
+                for task_dict in CACHE.hash_get_list(task_key_list)
+                if task_dict]
         task_list.sort(
             key=lambda task: (getattr(task, 'created_at', 0), task.id),
             reverse=True)
         if clear_out:
-            return [task.__dict__ for task in task_list]
+            return [task.to_dict() for task in task_list]
         else:
             return task_list
 
+    @classmethod
+    def get_user_version(cls, user_id):
+        """
+        Returns version of user's task statuses, changed by each written update or deletion of user's tasks.
+        """
+        if CACHE:
+            return CACHE.counter_get(cls.version_key(user_id))
+        return 0
+
+    @classmethod
+    def wait_user_tasks(cls, user_id, version):
+        """
+        Waits at most 'poll_timeout' seconds for user's task statuses to change from the specified version.
+
+        Returns False without waiting if too many requests are already waiting or if waiting is not possible,
+        True otherwise.
+        """
+        if not CACHE or not cls.poll_semaphore.acquire(blocking = False):
+            return False
+        try:
+            result = CACHE.wait_message(
+                cls.channel(user_id),
+                cls.poll_timeout,
+                lambda: cls.get_user_version(user_id) != version)
+        finally:
+            cls.poll_semaphore.release()
+        return result is not None
+
     def set(self, current_stage, progress, status, result_link = None, result_link_list = None):
+        result_link_list = (
+            ([result_link] if result_link else []) + (result_link_list or []))
+
+        # Writing progress-only updates no more often than allowed, the latest one is written with the next
+        # written update.
+
+        progress_only = (
+            (not current_stage or current_stage == self.current_stage) and
+            status == self.status and
+            result_link_list == self.result_link_list and
+            progress < 100)
+
         if current_stage:
             self.current_stage = current_stage
         self.progress = progress
         self.status = status
 
-        self.result_link_list = [result_link] if result_link else []
+        self.result_link_list = result_link_list
 
-        if result_link_list:
-            self.result_link_list.extend(result_link_list)
+        if (progress_only and
+            self.progress_rate > 0 and
+            self.put_time is not None and
+            time.monotonic() - self.put_time < 1.0 / self.progress_rate):
+            return
 
         self.put_to_cache()
 
     def delete(self):
         if CACHE:
-            current_tasks = CACHE.get("current_tasks:" + self.user_id)
-            if current_tasks:
-                current_tasks = dill.loads(current_tasks)
-                if self.key in current_tasks:
-                    current_tasks.remove(self.key)
-                    CACHE.set("current_tasks:" + self.user_id, dill.dumps(current_tasks))
-                    CACHE.rem(self.key)
+            CACHE.set_rem(
+                self.set_key(self.user_id),
+                [self.key],
+                delete = True,
+                channel = self.channel(self.user_id),
+                message = json.dumps({'event': 'delete', 'key': self.key}),
+                counter_key = self.version_key(self.user_id))
         return None
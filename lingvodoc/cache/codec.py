@@ -0,0 +1,331 @@
+"""
+Serialization of cached values.
+
+Encoded values start with a two byte header, a marker byte and a codec tag byte. The marker byte is 0xc1,
+which is never used by msgpack and differs from the 0x80 first byte of pickle protocols 2+, so that values
+cached before codecs were introduced, which are plain dill / pickle dumps, are still decoded.
+
+Codec tags are never reused, a change of an encoded format requires a new tag. Each msgpack extension type
+additionally encodes its own version, values of unknown tags and extension types or versions are not
+decoded, raising CodecError, which cache users should treat as cache misses.
+"""
+
+# Standard library imports.
+
+import datetime
+import importlib
+import logging
+
+# Library imports.
+
+import dill
+import msgpack
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.state import InstanceState
+
+
+log = logging.getLogger(__name__)
+
+
+MARKER = 0xc1
+
+
+class CodecError(ValueError):
+    """
+    Raised when a value can't be decoded, e.g. encoded by an unknown codec or with an outdated format.
+    """
+
+    pass
+
+
+class DillCodec(object):
+    """
+    Encodes values with dill, supports almost anything, but is slow and produces large dumps tied to
+    definitions of classes.
+    """
+
+    name = 'dill'
+    tag = 1
+
+    def dumps(self, value):
+        return dill.dumps(value)
+
+    def loads(self, data):
+        return dill.loads(data)
+
+
+# Msgpack extension types, by type and by code.
+
+ext_type_dict = {}
+ext_code_dict = {}
+
+
+def register_ext(code, type, encode, decode, version = 1):
+    """
+    Registers msgpack extension type for the specified type.
+
+    :param code: extension type code, from 0 to 127
+    :param type: type of encoded values, subclasses are not encoded by this extension type
+    :param encode: function returning msgpack-encodable data of a value
+    :param decode: function returning a value from its data
+    :param version: version of the data format, must be changed along with the format
+    """
+
+    if code in ext_code_dict:
+        raise ValueError(f'Msgpack extension type code {code} is already registered.')
+
+    ext_type_dict[type] = (code, encode, version)
+    ext_code_dict[code] = (decode, version)
+
+
+def register_class(code, cls, attribute_list, version = 1):
+    """
+    Registers msgpack extension type for instances of a class which are encoded as lists of values of
+    specified attributes and are decoded by calling the class with these values as positional arguments.
+    """
+
+    attribute_tuple = tuple(attribute_list)
+
+    register_ext(
+        code,
+        cls,
+        lambda obj: [getattr(obj, attribute) for attribute in attribute_tuple],
+        lambda data: cls(*data),
+        version)
+
+
+def encode_model(obj):
+    """
+    Encodes SQLAlchemy model instance as its class' location and values of its loaded column attributes,
+    without any relationships.
+    """
+
+    state = inspect(obj)
+
+    return [
+        obj.__class__.__module__,
+        obj.__class__.__name__,
+        {attribute.key: state.dict[attribute.key]
+            for attribute in state.mapper.column_attrs
+            if attribute.key in state.dict}]
+
+
+def decode_model(data):
+    """
+    Decodes SQLAlchemy model instance as a detached one, so that it can be added to a session without
+    loading it from the DB.
+    """
+
+    module_name, class_name, value_dict = data
+
+    cls = getattr(importlib.import_module(module_name), class_name)
+
+    obj = cls.__mapper__.class_manager.new_instance()
+
+    for key, value in value_dict.items():
+        set_committed_value(obj, key, value)
+
+    make_transient_to_detached(obj)
+
+    return obj
+
+
+class MsgpackCodec(object):
+    """
+    Encodes values with msgpack, with extension types for tuples, sets, dates, SQLAlchemy model instances and
+    registered types.
+
+    Values which can't be encoded by msgpack are encoded with dill inside an extension type.
+    """
+
+    name = 'msgpack'
+    tag = 2
+
+    # Extension type codes of built-in types, codes from 16 on are for registered types.
+
+    TUPLE = 1
+    SET = 2
+    FROZENSET = 3
+    DATETIME = 4
+    DATE = 5
+    MODEL = 6
+    DILL = 15
+
+    def __init__(self):
+
+        self.builtin_dict = {
+            tuple: (self.TUPLE, list),
+            set: (self.SET, list),
+            frozenset: (self.FROZENSET, list),
+            datetime.datetime: (self.DATETIME, datetime.datetime.isoformat),
+            datetime.date: (self.DATE, datetime.date.isoformat)}
+
+        self.decode_dict = {
+            self.TUPLE: tuple,
+            self.SET: set,
+            self.FROZENSET: frozenset,
+            self.DATETIME: datetime.datetime.fromisoformat,
+            self.DATE: datetime.date.fromisoformat,
+            self.MODEL: decode_model,
+            self.DILL: dill.loads}
+
+    def default(self, obj):
+        """
+        Encodes values msgpack can't encode by itself.
+
+        As we use strict types to be able to encode tuples, subclasses of basic types, e.g. numpy floats or
+        OrderedDicts, end up here too.
+        """
+
+        obj_type = type(obj)
+
+        builtin = self.builtin_dict.get(obj_type)
+
+        if builtin is not None:
+
+            code, encode = builtin
+            return msgpack.ExtType(code, self.packb(encode(obj)))
+
+        ext = ext_type_dict.get(obj_type)
+
+        if ext is not None:
+
+            code, encode, version = ext
+            return msgpack.ExtType(code, self.packb([version, encode(obj)]))
+
+        if isinstance(obj, tuple):
+            return msgpack.ExtType(self.TUPLE, self.packb(list(obj)))
+
+        if isinstance(obj, (set, frozenset)):
+            return msgpack.ExtType(self.SET, self.packb(list(obj)))
+
+        for base_type in (bool, int, float, str, bytes, dict, list):
+
+            if isinstance(obj, base_type):
+                return base_type(obj)
+
+        if isinstance(inspect(obj, raiseerr = False), InstanceState):
+            return msgpack.ExtType(self.MODEL, self.packb(encode_model(obj)))
+
+        # Numpy scalars.
+
+        if hasattr(obj, 'item') and getattr(obj, 'shape', None) == ():
+            return obj.item()
+
+        return msgpack.ExtType(self.DILL, dill.dumps(obj))
+
+    def ext_hook(self, code, data):
+
+        decode = self.decode_dict.get(code)
+
+        if decode is not None:
+
+            if code == self.DILL:
+                return decode(data)
+
+            return decode(self.unpackb(data))
+
+        if code not in ext_code_dict:
+            raise CodecError(f'Unknown msgpack extension type code {code}.')
+
+        decode, version = ext_code_dict[code]
+        data_version, data = self.unpackb(data)
+
+        if data_version != version:
+
+            raise CodecError(
+                f'Msgpack extension type code {code} version {data_version}, expected {version}.')
+
+        return decode(data)
+
+    def packb(self, value):
+
+        return (
+
+            msgpack.packb(
+                value,
+                default = self.default,
+                strict_types = True,
+                use_bin_type = True))
+
+    def unpackb(self, data):
+
+        return (
+
+            msgpack.unpackb(
+                data,
+                ext_hook = self.ext_hook,
+                raw = False,
+                strict_map_key = False))
+
+    def dumps(self, value):
+        return self.packb(value)
+
+    def loads(self, data):
+        return self.unpackb(data)
+
+
+codec_dict = {}
+
+for codec in [DillCodec(), MsgpackCodec()]:
+
+    codec_dict[codec.name] = codec
+    codec_dict[codec.tag] = codec
+
+DEFAULT_CODEC = 'msgpack'
+
+
+def get_codec(name = None):
+    """
+    Returns codec by its name, or the default codec.
+    """
+
+    codec = codec_dict.get(name or DEFAULT_CODEC)
+
+    if codec is None:
+        raise ValueError(f'Unknown cache codec \'{name}\'.')
+
+    return codec
+
+
+def dumps(value, codec = None):
+    """
+    Encodes value with the specified codec or with the default codec, prepending the codec header.
+    """
+
+    if codec is None:
+        codec = get_codec()
+
+    return bytes((MARKER, codec.tag)) + codec.dumps(value)
+
+
+def loads(data):
+    """
+    Decodes value encoded by any known codec or cached by plain dill / pickle dumps.
+
+    Raises CodecError if the value can't be decoded.
+    """
+
+    if not data or data[0] != MARKER:
+        codec = codec_dict['dill']
+
+    else:
+
+        codec = codec_dict.get(data[1])
+
+        if codec is None:
+            raise CodecError(f'Unknown cache codec tag {data[1]}.')
+
+        data = data[2:]
+
+    try:
+        return codec.loads(data)
+
+    except CodecError:
+        raise
+
+    except Exception as exception:
+        raise CodecError(f'Failed to decode cached value: {exception}') from exception
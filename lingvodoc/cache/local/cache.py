@@ -0,0 +1,117 @@
+
+# Standard library imports.
+
+import collections
+import copy
+import logging
+import threading
+import time
+
+
+log = logging.getLogger(__name__)
+
+
+class LocalCache(object):
+    """
+    Bounded in-process LRU cache with per-value expiration, used by ThroughCache in front of Redis for
+    frequently read values like translations.
+
+    Thread-safe, as it is invalidated from a Redis pub/sub listener thread. Counts hits and misses.
+    """
+
+    def __init__(self, max_size, expiration_time):
+        """
+        :param max_size: maximum number of cached values
+        :param expiration_time: expiration time of cached values in seconds
+        """
+
+        self.max_size = max_size
+        self.expiration_time = expiration_time
+
+        self.value_dict = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get(self, key):
+        """
+        Returns cached value or None if it is not cached or has expired.
+
+        Dictionaries and lists are returned as shallow copies, so that callers can't modify cached values.
+        """
+
+        with self.lock:
+
+            entry = self.value_dict.get(key)
+
+            if entry is None:
+
+                self.miss_count += 1
+                return None
+
+            expire_time, value = entry
+
+            if expire_time <= time.monotonic():
+
+                del self.value_dict[key]
+
+                self.miss_count += 1
+                return None
+
+            self.value_dict.move_to_end(key)
+            self.hit_count += 1
+
+        if isinstance(value, (dict, list)):
+            return copy.copy(value)
+
+        return value
+
+    def set(self, key, value):
+
+        if isinstance(value, (dict, list)):
+            value = copy.copy(value)
+
+        with self.lock:
+
+            self.value_dict[key] = (
+                time.monotonic() + self.expiration_time, value)
+
+            self.value_dict.move_to_end(key)
+
+            while len(self.value_dict) > self.max_size:
+                self.value_dict.popitem(last = False)
+
+    def rem(self, key_list = (), prefix_list = ()):
+        """
+        Removes values with specified keys and with keys starting with any of specified prefixes.
+        """
+
+        prefix_tuple = tuple(prefix_list)
+
+        with self.lock:
+
+            for key in key_list:
+                self.value_dict.pop(key, None)
+
+            if prefix_tuple:
+
+                for key in [
+                    key for key in self.value_dict
+                    if key.startswith(prefix_tuple)]:
+
+                    del self.value_dict[key]
+
+    def clear(self):
+
+        with self.lock:
+            self.value_dict.clear()
+
+    def stats(self):
+
+        with self.lock:
+
+            return {
+                'size': len(self.value_dict),
+                'hit_count': self.hit_count,
+                'miss_count': self.miss_count}
@@ -4,8 +4,55 @@ from lingvodoc.cache.api.cache import ICache
 
 
 class MockCache(ICache):
-    def get(self, key):
+    def get(self, key = None, **kwargs):
+        if isinstance(key, list):
+            return [None] * len(key)
         return None
 
-    def set(self, key, value):
+    def set(self, key = None, value = None, **kwargs):
         pass
+
+    def set_if_absent(self, key, value, expiration_time = None):
+        return True
+
+    def delete_if_equal(self, key, value):
+        return False
+
+    def rem(self, keys):
+        pass
+
+    def hash_set(self, key, value_dict, set_key = None, channel = None, message = None, counter_key = None):
+        pass
+
+    def hash_get(self, key):
+        return None
+
+    def hash_get_list(self, key_list):
+        return [None] * len(key_list)
+
+    def set_members(self, set_key):
+        return []
+
+    def set_rem(self, set_key, member_list, delete = False, channel = None, message = None, counter_key = None):
+        pass
+
+    def counter_get(self, key):
+        return 0
+
+    def wait_message(self, channel, timeout, check = None):
+        return None
+
+    def list_push(self, key, value, max_length):
+        pass
+
+    def list_get(self, key):
+        return []
+
+    def semaphore_acquire(self, key, holder, limit, timeout):
+        return True
+
+    def semaphore_release(self, key, holder):
+        pass
+
+    def semaphore_count(self, key, timeout):
+        return 0
@@ -1,9 +1,16 @@
 __author__ = 'winking-maniac'
 
-import dill
+import json
+import os
+import threading
+import time
+
+from redis.exceptions import ResponseError
+from sqlalchemy import tuple_
 # from lingvodoc.models import DBSession, Entity
 # from dogpile.cache.api import NO_VALUE
 
+from lingvodoc.cache import codec
 from lingvodoc.cache.api.cache import ICache
 
 import logging
@@ -12,7 +19,6 @@ log = logging.getLogger(__name__)
 
 '''
 TODO:
-    0) Make true bulk get query
     1) Add caching lists of childs
     2) Add caching types with 1 id instead of 2
     3) Add caching not marked_deleted objects
@@ -40,12 +46,147 @@ Task 2 can be implemented using CompositeIdMixin and IdMixin, maybe with another
 '''
 
 class ThroughCache(ICache):
-    def __init__(self, redis):
+    # Redis pub/sub channel of locally cached value invalidation messages.
+    LOCAL_CHANNEL = 'local_cache:invalidate'
+
+    def __init__(
+        self,
+        redis,
+        expiration_time = None,
+        local_cache = None,
+        local_prefix_list = (),
+        codec_name = None):
         """
         :param redis: redis database
+        :param expiration_time: expiration time in seconds of cached database objects, no expiration if None
+        :param local_cache: optional in-process LocalCache in front of redis
+        :param local_prefix_list: prefixes of keys of values which are cached locally
+        :param codec_name: name of the codec encoding cached values, default codec if None
         :return:
         """
         self.cache = redis
+        self.codec = codec.get_codec(codec_name)
+        self.expiration_time = expiration_time
+
+        self.local_cache = local_cache
+        self.local_prefix_tuple = tuple(local_prefix_list)
+
+        # Id of the process listening for invalidation messages, we have to listen anew after a fork.
+        self.local_pid = None
+        self.local_lock = threading.Lock()
+
+    def dumps(self, value):
+        return codec.dumps(value, self.codec)
+
+    def loads(self, cached, key):
+        """
+        Decodes cached value, values which can't be decoded, e.g. cached by a previous version with an
+        outdated format, are treated as missing.
+        """
+
+        try:
+            return codec.loads(cached)
+
+        except codec.CodecError as exception:
+
+            log.warning(f'Failed to decode cached value of \'{key}\': {exception}')
+            return None
+
+    def local_check(self, key):
+        """
+        Checks if the value with the specified key can be cached locally, which requires listening for
+        invalidation messages in the current process.
+        """
+
+        if (self.local_cache is None or
+            not key.startswith(self.local_prefix_tuple)):
+            return False
+
+        if self.local_pid == os.getpid():
+            return True
+
+        with self.local_lock:
+
+            if self.local_pid == os.getpid():
+                return True
+
+            # Values cached before a fork or before a listener failure could have missed invalidations.
+
+            self.local_cache.clear()
+
+            try:
+
+                pubsub = self.cache.pubsub(ignore_subscribe_messages = True)
+                pubsub.subscribe(self.LOCAL_CHANNEL)
+
+            except Exception as exception:
+
+                log.warning(f'Failed to subscribe to local cache invalidation messages: {exception}')
+                return False
+
+            threading.Thread(
+                target = self.local_listen,
+                args = (pubsub,),
+                daemon = True).start()
+
+            self.local_pid = os.getpid()
+
+        return True
+
+    def local_listen(self, pubsub):
+        """
+        Processes local cache invalidation messages, run in a separate thread.
+        """
+
+        try:
+
+            for message in pubsub.listen():
+
+                if message['type'] != 'message':
+                    continue
+
+                data = json.loads(message['data'])
+
+                self.local_cache.rem(
+                    data.get('key_list', ()),
+                    data.get('prefix_list', ()))
+
+        except Exception as exception:
+
+            log.warning(f'Local cache invalidation listener failure: {exception}')
+
+            # Not using local cache until we can listen again.
+
+            self.local_pid = None
+
+    def local_invalidate(self, key_list = (), prefix_list = ()):
+        """
+        Removes values with specified keys and with keys starting with specified prefixes from local caches
+        of all processes.
+        """
+
+        if self.local_cache is None:
+            return
+
+        key_list = list(key_list)
+        prefix_list = list(prefix_list)
+
+        self.local_cache.rem(key_list, prefix_list)
+
+        self.cache.publish(
+            self.LOCAL_CHANNEL,
+            json.dumps({'key_list': key_list, 'prefix_list': prefix_list}))
+
+    def local_stats(self):
+        """
+        Returns size and hit / miss counts of the local cache of the current process, or None if there is no
+        local cache.
+        """
+
+        if self.local_cache is None:
+            return None
+
+        return self.local_cache.stats()
 
     def get(self, keys = None, objects = dict(), DBSession=None, keep_dims=False):
         """
@@ -78,17 +219,39 @@ class ThroughCache(ICache):
 
         """
         if isinstance(keys, str):
+            local_flag = self.local_check(keys)
+            if local_flag:
+                value = self.local_cache.get(keys)
+                if value is not None:
+                    return value
             cached = self.cache.get(keys)
             if not cached:
                 return None
-            return dill.loads(cached)
+            value = self.loads(cached, keys)
+            if value is None:
+                return None
+            if local_flag:
+                self.local_cache.set(keys, value)
+            return value
         elif isinstance(keys, list):
-            result = []
-            for key in keys:
-                cached = self.cache.get(key)
-                if cached is None:
-                    result.append(None)
-                result.append(dill.loads(cached))
+            result = [None] * len(keys)
+            redis_index_list = []
+            for index, key in enumerate(keys):
+                if self.local_check(key):
+                    result[index] = self.local_cache.get(key)
+                if result[index] is None:
+                    redis_index_list.append(index)
+            if redis_index_list:
+                cached_list = self.cache.mget([keys[index] for index in redis_index_list])
+                for index, cached in zip(redis_index_list, cached_list):
+                    if cached is None:
+                        continue
+                    value = self.loads(cached, keys[index])
+                    if value is None:
+                        continue
+                    if self.local_check(keys[index]):
+                        self.local_cache.set(keys[index], value)
+                    result[index] = value
             return result
 
         if not DBSession:
@@ -103,31 +266,66 @@ class ThroughCache(ICache):
         log.debug(objects)
         result = dict()
         for obj_type in objects:
-            result[obj_type] = []
-            for lingvodoc_id in objects[obj_type]:
-                key = f"auto:{obj_type.__name__}:{lingvodoc_id[0]}:{lingvodoc_id[1]}"
-                log.debug(key)
-                cached = self.cache.get(key)
+
+            id_list = [
+                tuple(lingvodoc_id)
+                for lingvodoc_id in objects[obj_type]]
+
+            key_list = [
+                self.object_key(obj_type.__name__, lingvodoc_id)
+                for lingvodoc_id in id_list]
+
+            log.debug(key_list)
+
+            # Getting all cached objects at once.
+
+            cached_list = (
+                self.cache.mget(key_list) if key_list else [])
+
+            object_list = []
+            miss_set = set()
+
+            for lingvodoc_id, key, cached in zip(id_list, key_list, cached_list):
+
+                if cached is not None:
+                    cached = self.loads(cached, key)
+
                 if cached is None:
-                    cached = DBSession.query(obj_type) \
-                                    .filter_by(client_id=lingvodoc_id[0], object_id=lingvodoc_id[1]) \
-                                    .first()
-                    if not cached:
-                        pass
-                    else:
-                        self.cache.set(key, dill.dumps(cached))
-                else:
-                    # potentially race condition following data loss
-                    # cached = DBSession.merge(dill.loads(cached), load=False)
-                    cached = dill.loads(cached)
-                    try:
-                        DBSession.add(cached)
-                    except:
-                        cached = DBSession.query(obj_type) \
-                                        .filter_by(client_id=lingvodoc_id[0], object_id=lingvodoc_id[1]) \
-                                        .first()
-
-                result[obj_type].append(cached)
+                    miss_set.add(lingvodoc_id)
+                    object_list.append(None)
+                    continue
+
+                # potentially race condition following data loss
+                # cached = DBSession.merge(dill.loads(cached), load=False)
+                try:
+                    DBSession.add(cached)
+                except:
+                    miss_set.add(lingvodoc_id)
+                    cached = None
+
+                object_list.append(cached)
+
+            # Loading all missing objects with a single query and caching them.
+
+            if miss_set:
+
+                loaded_dict = {
+
+                    (obj.client_id, obj.object_id): obj
+
+                    for obj in DBSession
+                        .query(obj_type)
+                        .filter(
+                            tuple_(obj_type.client_id, obj_type.object_id).in_(miss_set))
+                        .all()}
+
+                self.set_objects(loaded_dict.values())
+
+                object_list = [
+                    loaded_dict.get(lingvodoc_id) if obj is None else obj
+                    for lingvodoc_id, obj in zip(id_list, object_list)]
+
+            result[obj_type] = object_list
         # except Exception as e:
         #     log.error(f'Exception during getting from cache : {e}')
         #     return None
@@ -137,15 +335,36 @@ class ThroughCache(ICache):
                 result = result[0]
         return result
 
+    @staticmethod
+    def object_key(class_name, lingvodoc_id):
+        return f'auto:{class_name}:{lingvodoc_id[0]}:{lingvodoc_id[1]}'
 
+    def set_objects(self, objects):
+        """
+        Stores database objects in cache through a single pipelined request, with expiration time if it
+        is specified.
+        """
+
+        pipeline = self.cache.pipeline(transaction = False)
+
+        for obj in objects:
+
+            pipeline.set(
+                self.object_key(obj.__class__.__name__, (obj.client_id, obj.object_id)),
+                self.dumps(obj),
+                ex = self.expiration_time)
+
+        pipeline.execute()
 
     # TODO: add try/catch handlers.
-    def set(self, key = None, value = None, key_value = None, objects = list(), transaction = False, DBSession=None):
+    def set(self, key = None, value = None, key_value = None, objects = list(), transaction = False, DBSession=None,
+            expiration_time = None):
         """
         Inserts objects to cache and database
 
         :key: :value: string
-            Stores key-value pair in cache. No database queries.
+            Stores key-value pair in cache, with expiration time in seconds if :expiration_time: is specified.
+            No database queries.
         :key_value: dictionary
             Stores key-value pairs in cache. No database queries.
         :objects: list/tuple of objects
@@ -154,16 +373,22 @@ class ThroughCache(ICache):
             Returns list of True/False(one value if :transaction:) flags of success
         """
         if key is not None:
-            self.cache.set(key, dill.dumps(value))
+            self.cache.set(key, self.dumps(value), ex = expiration_time)
+            if self.local_check(key):
+                self.local_cache.set(key, value)
             return
         if key_value is not None:
             self.cache.mset(
                 dict(
-                    map(lambda key_value_pair: (key_value_pair[0], dill.dumps(key_value_pair[1]) ),
+                    map(lambda key_value_pair: (key_value_pair[0], self.dumps(key_value_pair[1]) ),
                         key_value.items()
                     )
                 )
             )
+            for key, value in key_value.items():
+                if self.local_check(key):
+                    self.local_cache.set(key, value)
+            return
 
 
 
@@ -172,16 +397,9 @@ class ThroughCache(ICache):
             return None
         if transaction:
             try:
-                accepted_for_caching = dict(
-                    map(
-                        lambda obj:
-                            (f'auto:{obj.__class__.__name__}:{obj.client_id}:{obj.object_id}', dill.dumps(obj)),
-                        objects
-                    )
-                )
                 DBSession.add_all(objects)
                 DBSession.flush()
-                self.cache.mset(accepted_for_caching)
+                self.set_objects(objects)
                 return True
             except:
                 return False
@@ -193,13 +411,42 @@ class ThroughCache(ICache):
                 try:
                     DBSession.add(obj)
                     DBSession.flush()
-                    self.cache.set(key, dill.dumps(obj))
+                    self.cache.set(key, self.dumps(obj), ex = self.expiration_time)
                     result.append(True)
                 except:
                     result.append(False)
                     log.warning(f"Error in saving {key} to database")
             return result
 
+    def set_if_absent(self, key, value, expiration_time = None):
+        """
+        Atomically stores key-value pair only if the key is not already stored, with expiration time in seconds
+        if specified.
+
+        Returns True if the value is stored, False otherwise.
+        """
+        return bool(
+            self.cache.set(key, self.dumps(value), ex = expiration_time, nx = True))
+
+    # Deletes key only if it has the specified value.
+    DELETE_IF_EQUAL_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+        """
+
+    def delete_if_equal(self, key, value):
+        """
+        Atomically deletes key only if it has the specified value, e.g. so that a key replaced by someone else
+        is not deleted.
+
+        Returns True if the key is deleted, False otherwise.
+        """
+        return bool(
+            self.cache.eval(
+                self.DELETE_IF_EQUAL_SCRIPT, 1, key, self.dumps(value)))
+
     def rem(self, keys):
         """
         Removes keys from cache
@@ -207,6 +454,187 @@ class ThroughCache(ICache):
             Removes stored in cache value/list of values. No database queries.
         """
         if isinstance(keys, str):
-            self.cache.delete(keys)
-        elif isinstance(keys, list):
-            self.cache.delete(*keys)
+            keys = [keys]
+        elif not isinstance(keys, list) or not keys:
+            return
+        self.cache.delete(*keys)
+        if self.local_cache is not None:
+            local_key_list = [
+                key for key in keys
+                if key.startswith(self.local_prefix_tuple)]
+            if local_key_list:
+                self.local_invalidate(local_key_list)
+
+    def hash_set(self, key, value_dict, set_key = None, channel = None, message = None, counter_key = None):
+        """
+        Stores values in a hash, adding the hash's key to a set, incrementing a counter and publishing a
+        message to a pub/sub channel if required, with a single pipelined request.
+
+        Fields of the hash are updated atomically, without reading the hash first. The counter is incremented
+        before the message is published.
+        """
+        pipeline = self.cache.pipeline(transaction = False)
+        pipeline.hmset(
+            key,
+            {field: self.dumps(value) for field, value in value_dict.items()})
+        if set_key is not None:
+            pipeline.sadd(set_key, key)
+        if counter_key is not None:
+            pipeline.incr(counter_key)
+        if channel is not None:
+            pipeline.publish(channel, message)
+        pipeline.execute()
+
+    def hash_get(self, key):
+        """
+        Gets all values of a hash, returns None if there is no such hash.
+        """
+        return self.hash_get_list([key])[0]
+
+    def hash_get_list(self, key_list):
+        """
+        Gets all values of each hash in a list with a single pipelined request, returns None for hashes
+        which do not exist or can't be decoded.
+        """
+        if not key_list:
+            return []
+        pipeline = self.cache.pipeline(transaction = False)
+        for key in key_list:
+            pipeline.hgetall(key)
+        result_list = []
+        for key, cached_dict in zip(key_list, pipeline.execute(raise_on_error = False)):
+            # Keys with values of other types, e.g. cached by a previous version, are ignored.
+            if not cached_dict or isinstance(cached_dict, Exception):
+                result_list.append(None)
+                continue
+            try:
+                result_list.append({
+                    field.decode('utf-8'): codec.loads(cached)
+                    for field, cached in cached_dict.items()})
+            except codec.CodecError as exception:
+                log.warning(f'Failed to decode cached hash \'{key}\': {exception}')
+                result_list.append(None)
+        return result_list
+
+    def set_members(self, set_key):
+        """
+        Returns members of a set as strings.
+        """
+        try:
+            return [member.decode('utf-8') for member in self.cache.smembers(set_key)]
+        except ResponseError:
+            return []
+
+    def set_rem(self, set_key, member_list, delete = False, channel = None, message = None, counter_key = None):
+        """
+        Removes members from a set, deleting keys equal to them, incrementing a counter and publishing a
+        message to a pub/sub channel if required, with a single pipelined request.
+        """
+        if not member_list:
+            return
+        pipeline = self.cache.pipeline(transaction = False)
+        pipeline.srem(set_key, *member_list)
+        if delete:
+            pipeline.delete(*member_list)
+        if counter_key is not None:
+            pipeline.incr(counter_key)
+        if channel is not None:
+            pipeline.publish(channel, message)
+        pipeline.execute()
+
+    def counter_get(self, key):
+        """
+        Returns value of a counter incremented by hash_set() or set_rem(), 0 if there is no such counter.
+        """
+        try:
+            return int(self.cache.get(key) or 0)
+        except (ResponseError, ValueError):
+            return 0
+
+    def wait_message(self, channel, timeout, check = None):
+        """
+        Waits at most 'timeout' seconds for a message published to a pub/sub channel, using a separate
+        connection while waiting.
+
+        If specified, 'check' is called once the channel is subscribed, and waiting ends at once if it returns
+        True, so that e.g. updates made before subscribing are not missed.
+
+        Returns True if a message is received or the check succeeds, False on timeout and None if waiting
+        failed.
+        """
+        deadline = time.monotonic() + timeout
+        pubsub = self.cache.pubsub()
+        try:
+            pubsub.subscribe(channel)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                message = pubsub.get_message(timeout = remaining)
+                if message is None:
+                    continue
+                if message['type'] == 'message':
+                    return True
+                if (message['type'] == 'subscribe' and
+                    check is not None and
+                    check()):
+                    return True
+        except Exception as exception:
+            log.warning(f'Failed to wait for a message on \'{channel}\': {exception}')
+            return None
+        finally:
+            pubsub.close()
+
+    def list_push(self, key, value, max_length):
+        """
+        Prepends value to a list, trimming the list to at most 'max_length' latest values, with a single
+        pipelined request.
+        """
+        pipeline = self.cache.pipeline(transaction = False)
+        pipeline.lpush(key, self.dumps(value))
+        pipeline.ltrim(key, 0, max_length - 1)
+        pipeline.execute()
+
+    def list_get(self, key):
+        """
+        Gets all values of a list, skipping values which can't be decoded.
+        """
+        result_list = []
+        for cached in self.cache.lrange(key, 0, -1):
+            value = self.loads(cached, key)
+            if value is not None:
+                result_list.append(value)
+        return result_list
+
+    # Acquires semaphore slot for a holder or refreshes holder's slot, with holders' slots expiring after a
+    # timeout, so that slots of crashed holders are eventually released.
+    SEMAPHORE_ACQUIRE_SCRIPT = """
+        redis.call('zremrangebyscore', KEYS[1], '-inf', tonumber(ARGV[3]) - tonumber(ARGV[4]))
+        if redis.call('zscore', KEYS[1], ARGV[1]) or
+            redis.call('zcard', KEYS[1]) < tonumber(ARGV[2]) then
+            redis.call('zadd', KEYS[1], ARGV[3], ARGV[1])
+            redis.call('expire', KEYS[1], ARGV[4])
+            return 1
+        end
+        return 0
+        """
+
+    def semaphore_acquire(self, key, holder, limit, timeout):
+        """
+        Atomically acquires one of at most 'limit' slots of a semaphore, or refreshes an already acquired
+        slot. Slots expire if not refreshed in 'timeout' seconds.
+
+        Returns True if the slot is acquired, False otherwise.
+        """
+        return bool(
+            self.cache.eval(
+                self.SEMAPHORE_ACQUIRE_SCRIPT, 1, key, holder, limit, time.time(), timeout))
+
+    def semaphore_release(self, key, holder):
+        self.cache.zrem(key, holder)
+
+    def semaphore_count(self, key, timeout):
+        """
+        Returns number of acquired slots of a semaphore.
+        """
+        return self.cache.zcount(key, time.time() - timeout, '+inf')
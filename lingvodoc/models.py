@@ -1,7 +1,9 @@
 
 # Standard library imports.
 
+import collections
 import datetime
+import io
 import logging
 import uuid
 
@@ -18,10 +20,13 @@ from pyramid.security import (
 from sqlalchemy import (
     and_,
     Column,
+    event,
     ForeignKey,
     ForeignKeyConstraint,
     Index,
+    inspect,
     literal,
+    null,
     or_,
     Sequence,
     Table,
@@ -44,11 +49,14 @@ from sqlalchemy.orm import (
     joinedload,
     relationship,
     scoped_session,
+    Session,
     sessionmaker)
 
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from sqlalchemy.sql import text
+from sqlalchemy.sql.expression import Null
 
 from sqlalchemy.types import (
     UnicodeText,
@@ -61,7 +69,7 @@ from sqlalchemy.types import (
     TypeDecorator
 )
 
-from zope.sqlalchemy import ZopeTransactionExtension
+from zope.sqlalchemy import mark_changed, ZopeTransactionExtension
 
 # Project imports.
 
@@ -287,27 +295,332 @@ class IdMixin(object):
                 .first())
 
 
-def get_client_counter(
+# Maximum number of object ids reserved at once by get_client_counter(), can be changed through the
+# 'object_id_block_size' application setting, see set_object_id_block_size().
+OBJECT_ID_BLOCK_SIZE = 256
+
+
+def set_object_id_block_size(block_size):
+    """
+    Sets maximum size of object id blocks reserved by get_client_counter(), block size of 1 disables
+    block reservation.
+    """
+
+    global OBJECT_ID_BLOCK_SIZE
+
+    if block_size is not None:
+        OBJECT_ID_BLOCK_SIZE = max(1, int(block_size))
+
+
+def reserve_client_counter_block(
     client_id,
+    count,
     session = DBSession):
+    """
+    Reserves a block of 'count' consecutive object ids of a client with a single UPDATE ... RETURNING
+    statement, returns the last reserved id.
 
-    (session
-        .query(Client)
-        .filter_by(id = client_id)
-        .update(
-            values  ={'counter': Client.counter + 1},
-            synchronize_session = 'fetch'))
+    Client row is locked until the end of the transaction, as it was with one-by-one counter updates.
+    """
 
-    session.flush()
+    client_key = (
+        identity_key(Client, client_id))
 
-    return (
+    client = (
+        session.identity_map.get(client_key))
+
+    # If the client is loaded in the session and has its counter modified in memory, e.g. through
+    # Client.next_object_id(), we have to save the counter first so that we do not reserve ids which were
+    # already used.
+
+    if (client is not None and
+        session.is_modified(client)):
+
+        session.flush()
+
+    client_table = Client.__table__
+
+    counter = (
 
         session
-            .query(Client.counter)
-            .filter_by(id = client_id)
-            .with_for_update(of = Client)
+
+            .execute(
+
+                client_table
+
+                    .update()
+                    .where(client_table.c.id == client_id)
+                    .values(counter = client_table.c.counter + count)
+                    .returning(client_table.c.counter))
+
             .scalar())
 
+    if counter is None:
+        raise KeyError(f'No client {client_id}.')
+
+    if session is DBSession:
+        mark_changed(DBSession())
+
+    # Keeping in-memory client object, if we have one, in sync with the DB.
+
+    if client is not None:
+
+        set_committed_value(
+            client, 'counter', counter)
+
+    return counter
+
+
+def get_client_counter(
+    client_id,
+    session = DBSession,
+    block_size = None):
+    """
+    Gets next object id of a client.
+
+    Object ids are reserved in blocks held in a per-session pool, so that creating many objects of the same
+    client requires only a few client counter updates. Within a transaction block sizes start from 1 and
+    double on each reservation up to 'block_size', OBJECT_ID_BLOCK_SIZE by default, so that transactions
+    creating just a few objects do not waste ids. Pool is discarded at the end of each transaction, see
+    clear_object_id_pool().
+    """
+
+    if block_size is None:
+        block_size = OBJECT_ID_BLOCK_SIZE
+
+    if block_size <= 1:
+
+        return (
+            reserve_client_counter_block(
+                client_id, 1, session))
+
+    pool_dict = (
+        session.info.setdefault('object_id_pool', {}))
+
+    pool = (
+        pool_dict.get(client_id))
+
+    # Have some previously reserved ids.
+
+    if pool is not None and pool[0] <= pool[1]:
+
+        object_id = pool[0]
+        pool[0] += 1
+
+        return object_id
+
+    count = (
+        min(pool[2], block_size) if pool is not None else 1)
+
+    last_id = (
+
+        reserve_client_counter_block(
+            client_id, count, session))
+
+    pool_dict[client_id] = [
+        last_id - count + 2,
+        last_id,
+        min(count * 2, block_size)]
+
+    return last_id - count + 1
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+@event.listens_for(Session, 'after_rollback')
+def clear_object_id_pool(session, *args):
+    """
+    Drops object ids reserved by get_client_counter() when their reservation could have been rolled back.
+    """
+
+    session.info.pop('object_id_pool', None)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def clear_object_id_pool_transaction(session, transaction):
+    """
+    Drops reserved object ids at the end of each top-level transaction, as we do not know if it was
+    committed or not.
+    """
+
+    if transaction.parent is None:
+        session.info.pop('object_id_pool', None)
+
+
+# Bulk creation of at least that many objects goes through COPY instead of multi-row INSERTs, see
+# CompositeIdMixin.bulk_create().
+
+COPY_ROW_THRESHOLD = 1024
+
+
+def copy_text_value(value):
+    """
+    Encodes an already bind-processed value as a column value of PostgreSQL COPY text format.
+    """
+
+    if value is None:
+        return '\\N'
+
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+
+    return (
+
+        str(value)
+            .replace('\\', '\\\\')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r')
+            .replace('\t', '\\t'))
+
+
+def copy_insert(
+    table_list,
+    session = DBSession):
+    """
+    Inserts rows into tables via staging, accepts list of (table, row list) pairs in the order of
+    insertion, like one returned by CompositeIdMixin.bulk_table_list().
+
+    Rows of each table are streamed into a temporary staging table with COPY FROM STDIN, staged rows are
+    checked for duplicate primary keys, both among themselves and with already existing rows, and then
+    are moved into the live tables, all in the current transaction of the session.
+    """
+
+    connection = session.connection()
+    dialect = connection.dialect
+
+    cursor = connection.connection.cursor()
+
+    staging_list = []
+
+    try:
+
+        # Staging rows.
+
+        for table, row_list in table_list:
+
+            if not row_list:
+                continue
+
+            staging_name = (
+                '_staging_{}_{}'.format(table.name, uuid.uuid4().hex))
+
+            column_list = list(table.c)
+
+            column_str = (
+                ', '.join(
+                    dialect.identifier_preparer.quote(column.name)
+                    for column in column_list))
+
+            processor_list = [
+                column.type.bind_processor(dialect)
+                for column in column_list]
+
+            cursor.execute('''
+
+                create temporary table
+                {0}
+                (like {1} including defaults)
+                on commit drop;
+
+                '''.format(
+                    staging_name,
+                    dialect.identifier_preparer.format_table(table)))
+
+            line_list = []
+
+            for row in row_list:
+
+                value_list = []
+
+                for column, processor in zip(column_list, processor_list):
+
+                    value = row.get(column.name)
+
+                    if value is None or isinstance(value, Null):
+                        value = None
+
+                    elif processor is not None:
+                        value = processor(value)
+
+                    value_list.append(
+                        copy_text_value(value))
+
+                line_list.append(
+                    '\t'.join(value_list) + '\n')
+
+            cursor.copy_expert(
+                'copy {0} ({1}) from stdin'.format(staging_name, column_str),
+                io.StringIO(''.join(line_list)))
+
+            staging_list.append(
+                (table, staging_name, column_str))
+
+        # Validating staged rows.
+
+        for table, staging_name, column_str in staging_list:
+
+            key_list = [
+                column.name
+                for column in table.primary_key]
+
+            key_str = ', '.join(key_list)
+
+            cursor.execute('''
+
+                select {2}
+                from {0}
+                group by {2}
+                having count(*) > 1
+
+                union all
+
+                select {2}
+                from {0} S
+                where exists (
+                  select 1
+                  from {1} T
+                  where {3})
+
+                limit 1;
+
+                '''.format(
+                    staging_name,
+                    dialect.identifier_preparer.format_table(table),
+                    key_str,
+                    ' and '.join(
+                        'T.{0} = S.{0}'.format(key)
+                        for key in key_list)))
+
+            duplicate = cursor.fetchone()
+
+            if duplicate is not None:
+
+                raise ValueError(
+                    'duplicate {} primary key {}'.format(
+                        table.name, duplicate))
+
+        # Moving staged rows into live tables.
+
+        for table, staging_name, column_str in staging_list:
+
+            cursor.execute('''
+
+                insert into {1} ({2})
+                select {2} from {0};
+
+                drop table {0};
+
+                '''.format(
+                    staging_name,
+                    dialect.identifier_preparer.format_table(table),
+                    column_str))
+
+    finally:
+
+        cursor.close()
+
+    if session is DBSession:
+        mark_changed(DBSession())
+
 
 class ObjectTOC(
     TableNameMixin,
@@ -541,6 +854,194 @@ class CompositeIdMixin(object):
 
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def bulk_row(
+        cls,
+        row,
+        created_at):
+        """
+        Prepares a dictionary of object attributes for bulk insertion, see bulk_create().
+
+        Expands composite id pairs like 'id' or 'parent_id' into client/object id columns and adds any
+        missing columns with their default values, so that all rows have the same set of columns.
+        """
+
+        column_dict = cls.__table__.c
+
+        insert_dict = {}
+
+        for key, value in row.items():
+
+            if key in column_dict:
+
+                insert_dict[key] = value
+                continue
+
+            prefix = key[:-2]
+
+            if (not key.endswith('id') or
+                prefix + 'client_id' not in column_dict or
+                prefix + 'object_id' not in column_dict):
+
+                raise TypeError(
+                    f'{repr(key)} is an invalid keyword argument for {cls.__name__}')
+
+            if value is not None:
+
+                insert_dict[prefix + 'client_id'] = value[0]
+                insert_dict[prefix + 'object_id'] = value[1]
+
+        for column in column_dict:
+
+            if column.name in insert_dict:
+                continue
+
+            default = column.default
+
+            if column.name == 'created_at':
+                value = created_at
+
+            elif default is not None and default.is_scalar:
+                value = default.arg
+
+            else:
+                value = null()
+
+            insert_dict[column.name] = value
+
+        return insert_dict
+
+    @classmethod
+    def bulk_table_list(
+        cls,
+        row_list,
+        created_at):
+        """
+        Gets tables and rows to insert for objects created in bulk, in the order of insertion.
+
+        Can be overridden to create rows of additional tables, e.g. PublishingEntity rows for Entity.
+        """
+
+        insert_list = [
+            cls.bulk_row(row, created_at)
+            for row in row_list]
+
+        toc_list = [
+
+            {'client_id': insert_dict['client_id'],
+                'object_id': insert_dict['object_id'],
+                'table_name': cls.__tablename__,
+                'marked_for_deletion': insert_dict.get('marked_for_deletion') or False,
+                'additional_metadata': null()}
+
+            for insert_dict in insert_list]
+
+        return [
+            (ObjectTOC.__table__, toc_list),
+            (cls.__table__, insert_list)]
+
+    @classmethod
+    def bulk_create(
+        cls,
+        row_list,
+        session = DBSession,
+        batch_size = 4096,
+        copy = None):
+        """
+        Creates objects in bulk from dictionaries of their attributes, returns list of ids of created
+        objects.
+
+        Bypasses the ORM: object ids are reserved at once for all objects which do not have them, and
+        objects are inserted together with their ObjectTOC and other supporting rows through multi-row
+        INSERT statements of up to 'batch_size' rows each, without per-object ObjectTOC merges.
+
+        If 'copy' is true, or is not specified and there are at least COPY_ROW_THRESHOLD objects, rows are
+        instead loaded through COPY via staging tables, see copy_insert().
+
+        Created objects are not added to the session.
+        """
+
+        if not row_list:
+            return []
+
+        # Objects we are creating could reference not yet flushed ones.
+
+        session.flush()
+
+        # Reserving object ids, at most one client counter update per client.
+
+        row_list = [
+            dict(row) for row in row_list]
+
+        for row in row_list:
+
+            id = row.pop('id', None)
+
+            if id is not None:
+
+                row['client_id'] = id[0]
+                row['object_id'] = id[1]
+
+        count_dict = (
+
+            collections.Counter(
+                row['client_id']
+                for row in row_list
+                if row.get('object_id') is None))
+
+        next_id_dict = {}
+
+        for client_id, count in count_dict.items():
+
+            next_id_dict[client_id] = (
+
+                reserve_client_counter_block(
+                    client_id, count, session) - count + 1)
+
+        for row in row_list:
+
+            if row.get('object_id') is None:
+
+                client_id = row['client_id']
+
+                row['object_id'] = next_id_dict[client_id]
+                next_id_dict[client_id] += 1
+
+        # Inserting everything.
+
+        table_list = (
+
+            cls.bulk_table_list(
+                row_list,
+                datetime.datetime.utcnow()))
+
+        if copy is None:
+            copy = len(row_list) >= COPY_ROW_THRESHOLD
+
+        if copy:
+
+            copy_insert(table_list, session)
+
+            return [
+                (row['client_id'], row['object_id'])
+                for row in row_list]
+
+        for table, insert_list in table_list:
+
+            for i in range(0, len(insert_list), batch_size):
+
+                session.execute(
+                    table
+                        .insert()
+                        .values(insert_list[i : i + batch_size]))
+
+        if session is DBSession:
+            mark_changed(DBSession())
+
+        return [
+            (row['client_id'], row['object_id'])
+            for row in row_list]
+
     def mark_deleted(self, message, marked_for_deletion = True, **kwargs):
 
         self.marked_for_deletion = marked_for_deletion
@@ -795,6 +1296,131 @@ def get_translations(
     return all_translations_dict or None
 
 
+def get_translations_bulk(
+    gist_id_list,
+    locale_id = None,
+    session = DBSession,
+    default = None):
+    """
+    Bulk version of get_translation() and get_translations(), returns dictionary of translations by
+    translation gist ids.
+
+    If locale_id is specified, gets translations in this locale with the same fallbacks as get_translation(),
+    otherwise gets dictionaries of translations in all locales as get_translations() does.
+
+    Cached translations are retrieved at once, translations which are not cached are retrieved from the DB
+    with a single query and then are cached at once.
+    """
+
+    cache = caching.CACHE
+
+    gist_id_list = list(set(
+        tuple(gist_id) for gist_id in gist_id_list))
+
+    if not gist_id_list:
+        return {}
+
+    if locale_id is not None:
+
+        main_locale = str(locale_id)
+        fallback_locale = str(ENGLISH_LOCALE) if str(locale_id) != str(ENGLISH_LOCALE) else str(RUSSIAN_LOCALE)
+
+        key_format_str = 'translation:%s:%s:' + main_locale
+
+    else:
+
+        key_format_str = 'translations:%s:%s'
+
+    cached_list = cache.get(
+        [key_format_str % gist_id for gist_id in gist_id_list])
+
+    if cached_list is None:
+        cached_list = [None] * len(gist_id_list)
+
+    result_dict = {}
+    miss_list = []
+
+    for gist_id, cached in zip(gist_id_list, cached_list):
+
+        if cached:
+            result_dict[gist_id] = cached
+
+        else:
+            miss_list.append(gist_id)
+
+    if not miss_list:
+        return result_dict
+
+    log.debug("No cached values, getting from DB: %s " % str(miss_list))
+
+    translation_dict = {
+        gist_id: {}
+        for gist_id in miss_list}
+
+    for i in range(0, len(miss_list), 1024):
+
+        translation_list = (
+
+            session
+
+                .query(
+                    TranslationAtom.parent_client_id,
+                    TranslationAtom.parent_object_id,
+                    TranslationAtom.locale_id,
+                    TranslationAtom.content)
+
+                .filter(
+                    tuple_(
+                        TranslationAtom.parent_client_id,
+                        TranslationAtom.parent_object_id)
+                        .in_(miss_list[i : i + 1024]),
+                    TranslationAtom.marked_for_deletion == False)
+
+                .all())
+
+        for client_id, object_id, translation_locale_id, content in translation_list:
+
+            translation_dict[(client_id, object_id)][str(translation_locale_id)] = content
+
+    cache_dict = {}
+
+    for gist_id, all_translations_dict in translation_dict.items():
+
+        # All locales.
+
+        if locale_id is None:
+
+            result_dict[gist_id] = all_translations_dict or None
+            cache_dict['translations:%s:%s' % gist_id] = all_translations_dict
+
+            continue
+
+        # Specified locale, then fallback locale, then any locale at all.
+
+        translation = None
+
+        for locale in [main_locale, fallback_locale] + sorted(all_translations_dict.keys()):
+
+            translation = all_translations_dict.get(locale)
+
+            if translation is not None:
+
+                cache_dict['translation:%s:%s:%s' % (gist_id + (locale,))] = translation
+                break
+
+        if translation is None:
+
+            translation = (
+                default if default is not None else "Translation missing for all locales")
+
+        result_dict[gist_id] = translation
+
+    if cache_dict:
+        cache.set(key_value = cache_dict)
+
+    return result_dict
+
+
 class TranslationMixin(PrimeTableArgs):
     translation_gist_client_id = Column(SLBigInteger(), nullable=False)
     translation_gist_object_id = Column(SLBigInteger(), nullable=False)
@@ -1634,6 +2260,72 @@ class Field(
     is_translatable = Column(Boolean, default=False, nullable=False)
 
 
+@event.listens_for(Session, 'after_flush')
+def collect_translation_changes(session, flush_context):
+    """
+    Remembers translation gists of changed translation atoms and fields, so that their translations can be
+    invalidated in in-process caches after commit.
+    """
+
+    gist_id_set = None
+
+    for obj in (
+        list(session.new) + list(session.dirty) + list(session.deleted)):
+
+        if isinstance(obj, TranslationAtom):
+
+            gist_id_list = [
+                (obj.parent_client_id, obj.parent_object_id)]
+
+        elif isinstance(obj, Field):
+
+            gist_id_list = [
+                (obj.translation_gist_client_id, obj.translation_gist_object_id),
+                (obj.data_type_translation_gist_client_id, obj.data_type_translation_gist_object_id)]
+
+        else:
+            continue
+
+        if gist_id_set is None:
+            gist_id_set = session.info.setdefault('translation_gist_id_set', set())
+
+        gist_id_set.update(gist_id_list)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_translation_changes(session):
+    """
+    Invalidates translations of changed translation atoms and fields in in-process caches of all processes,
+    see get_translation(), get_translations() and DataTypeMixin.data_type.
+    """
+
+    gist_id_set = session.info.pop('translation_gist_id_set', None)
+
+    local_invalidate = getattr(caching.CACHE, 'local_invalidate', None)
+
+    if not gist_id_set or local_invalidate is None:
+        return
+
+    local_invalidate(
+
+        ['translations:%s:%s' % gist_id
+            for gist_id in gist_id_set],
+
+        ['translation:%s:%s:' % gist_id
+            for gist_id in gist_id_set])
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def clear_translation_changes(session, transaction):
+    """
+    Forgets changes of translations at the end of each top-level transaction, after their invalidation
+    if the transaction was committed.
+    """
+
+    if transaction.parent is None:
+        session.info.pop('translation_gist_id_set', None)
+
+
 class ReprIdMixin(object):
     """
     Changes representation string to include client/object id, useful for debugging.
@@ -1699,6 +2391,81 @@ class LexicalEntry(
 
         return res_list[0] if res_list else {}
 
+    @staticmethod
+    def track_tree(
+        lexs,
+        entries):
+        """
+        Builds lexical entry info trees, used by track_multiple().
+
+        Entity rows, ordered by lexical entry traversal order, then by entity tree, are grouped by lexical
+        entries in one pass, so that the trees are built in time linear in the number of lexical entries
+        and entities. Empty values and internal tree traversal columns are not included.
+        """
+
+        entity_dict = collections.defaultdict(list)
+
+        for i in entries:
+
+            entity_dict[
+                (i['parent_client_id'], i['parent_object_id'])].append(i)
+
+        skip_set = {
+            'traversal_lexical_order',
+            'tree_level',
+            'tree_numbering_scheme'}
+
+        lexical_list = []
+
+        for k in lexs:
+
+            a = []
+
+            entry = {
+                'created_at': k[0],
+                'client_id': k[1],
+                'object_id': k[2],
+                'parent_client_id': k[3],
+                'parent_object_id': k[4],
+                'contains': a,
+                'marked_for_deletion': k[5],
+                'additional_metadata': k[6],
+                'came_from': k[7],
+                'level': 'lexicalentry',
+                'published': False
+            }
+
+            entry = {
+                key: value
+                for key, value in entry.items()
+                if value is not None}
+
+            prev_nodegroup = -1
+            for i in entity_dict.get((k[1], k[2]), ()):
+                cur_nodegroup = i['tree_numbering_scheme'] if prev_nodegroup != i[
+                    'tree_numbering_scheme'] else prev_nodegroup
+                dictionary_form = {
+                    key: value
+                    for key, value in i.items()
+                    if key not in skip_set and value is not None}
+                dictionary_form['created_at'] = i['created_at'].replace(tzinfo = datetime.timezone.utc).timestamp()
+                dictionary_form['level'] = 'entity'
+                dictionary_form['contains'] = []
+                if not dictionary_form.get('locale_id'):
+                    dictionary_form['locale_id'] = 0
+                if cur_nodegroup != prev_nodegroup:
+                    prev_dictionary_form = dictionary_form
+                else:
+                    prev_dictionary_form['contains'].append(dictionary_form)
+                    continue
+                a.append(dictionary_form)
+                prev_nodegroup = cur_nodegroup
+            # TODO: published filtering
+            # TODO: locale fallback
+            lexical_list.append(entry)
+
+        return lexical_list
+
     @classmethod
     def track_multiple(
         cls,
@@ -1724,13 +2491,13 @@ class LexicalEntry(
 
             filtered_lexes = lexs
 
-        ls = []
+        if not filtered_lexes:
+            return []
 
-        for i, x in enumerate(filtered_lexes):
-            ls.append({'traversal_lexical_order': i, 'client_id': x[1], 'object_id': x[2]})
+        # Passing lexical entry ids as arrays, with their ordinal numbers as traversal order.
 
-        if not ls:
-            return []
+        client_id_list = [x[1] for x in filtered_lexes]
+        object_id_list = [x[2] for x in filtered_lexes]
 
         # Filtering by deletion status, if requred.
 
@@ -1766,27 +2533,20 @@ class LexicalEntry(
         else:
             pub_filter = ''
 
-        temp_table_name = 'lexical_entries_temp_table' + str(uuid.uuid4()).replace("-", "")
-
-        DBSession.execute(
-            '''create TEMPORARY TABLE %s (traversal_lexical_order INTEGER, client_id BIGINT, object_id BIGINT) on COMMIT DROP;''' % temp_table_name)
-
-        DBSession.execute(
-            '''insert into %s (traversal_lexical_order, client_id, object_id) values (:traversal_lexical_order, :client_id, :object_id);''' % temp_table_name,
-            ls)
-
         result = DBSession.execute(text('''
         WITH RECURSIVE cte_expr AS
         (SELECT
            entity.*,
-           %s.traversal_lexical_order                                  AS traversal_lexical_order,
+           lexical_entry_id.traversal_lexical_order                    AS traversal_lexical_order,
            1                                                                                   AS tree_level,
             row_number() over(partition by traversal_lexical_order order by Entity.created_at) as tree_numbering_scheme
          FROM entity
-           INNER JOIN %s
+           INNER JOIN
+             unnest(CAST(:client_id_list AS BIGINT[]), CAST(:object_id_list AS BIGINT[]))
+             WITH ORDINALITY AS lexical_entry_id (client_id, object_id, traversal_lexical_order)
              ON
-               entity.parent_client_id = %s.client_id
-               AND entity.parent_object_id = %s.object_id
+               entity.parent_client_id = lexical_entry_id.client_id
+               AND entity.parent_object_id = lexical_entry_id.object_id
 
          UNION ALL
          SELECT
@@ -1835,64 +2595,17 @@ class LexicalEntry(
                data_type_atom_fallback.locale_id = 1
           %s
         ORDER BY traversal_lexical_order, tree_numbering_scheme, tree_level;
-        ''' % (temp_table_name, temp_table_name, temp_table_name, temp_table_name, pub_filter)), {'locale': locale_id})
+        ''' % pub_filter), {
+            'locale': locale_id,
+            'client_id_list': client_id_list,
+            'object_id_list': object_id_list})
 
         entries = result.fetchall()
 
-        def remove_keys(obj, rubbish):
-            if isinstance(obj, dict):
-                obj = {
-                    key: remove_keys(value, rubbish)
-                    for key, value in obj.items()
-                    if key not in rubbish and value is not None}
-            elif isinstance(obj, list):
-                obj = [remove_keys(item, rubbish)
-                       for item in obj
-                       if item not in rubbish]
-            return obj
+        lexical_list = (
+            cls.track_tree(filtered_lexes, entries))
 
-        lexical_list = []
-        for k in filtered_lexes:
-            a = []
-            entry = {
-                'created_at': k[0],
-                'client_id': k[1],
-                'object_id': k[2],
-                'parent_client_id': k[3],
-                'parent_object_id': k[4],
-                'contains': a,
-                'marked_for_deletion': k[5],
-                'additional_metadata': k[6],
-                'came_from': k[7],
-                'level': 'lexicalentry',
-                'published': False
-            }
-
-            prev_nodegroup = -1
-            for i in entries:
-                if i['parent_client_id'] != k[1] or i['parent_object_id'] != k[2]:
-                    continue
-                cur_nodegroup = i['tree_numbering_scheme'] if prev_nodegroup != i[
-                    'tree_numbering_scheme'] else prev_nodegroup
-                dictionary_form = dict(i)
-                dictionary_form['created_at'] = i['created_at'].replace(tzinfo = datetime.timezone.utc).timestamp()
-                dictionary_form['level'] = 'entity'
-                dictionary_form['contains'] = []
-                if not dictionary_form.get('locale_id'):
-                    dictionary_form['locale_id'] = 0
-                if cur_nodegroup != prev_nodegroup:
-                    prev_dictionary_form = dictionary_form
-                else:
-                    prev_dictionary_form['contains'].append(dictionary_form)
-                    continue
-                a.append(dictionary_form)
-                prev_nodegroup = cur_nodegroup
-            # TODO: published filtering
-            # TODO: locale fallback
-            lexical_list.append(entry)
-        lexical_list = remove_keys(lexical_list, ['traversal_lexical_order', 'tree_level', 'tree_numbering_scheme'])
         log.debug(lexical_list)
-        DBSession.execute('''drop TABLE %s''' % temp_table_name)
 
         return lexical_list
 
@@ -1918,13 +2631,13 @@ class LexicalEntry(
 
             filtered_lexes = lexs
 
-        ls = []
+        if not filtered_lexes:
+            return []
 
-        for i, x in enumerate(filtered_lexes):
-            ls.append({'traversal_lexical_order': i, 'client_id': x[0], 'object_id': x[1]})
+        # Passing lexical entry ids as arrays, with their ordinal numbers as traversal order.
 
-        if not ls:
-            return []
+        client_id_list = [x[0] for x in filtered_lexes]
+        object_id_list = [x[1] for x in filtered_lexes]
 
         pub_filter = ""
 
@@ -1945,25 +2658,18 @@ class LexicalEntry(
             where_cond = ["WHERE", " AND ".join(where_cond)]
             pub_filter = " ".join(where_cond)
 
-        temp_table_name = 'lexical_entries_temp_table' + str(uuid.uuid4()).replace("-", "")
-
-        DBSession.execute(
-            '''create TEMPORARY TABLE %s (traversal_lexical_order INTEGER, client_id BIGINT, object_id BIGINT) on COMMIT DROP;''' % temp_table_name)
-
-        DBSession.execute(
-            '''insert into %s (traversal_lexical_order, client_id, object_id) values (:traversal_lexical_order, :client_id, :object_id);''' % temp_table_name,
-            ls)
-
         statement = text('''
         WITH cte_expr AS
         (SELECT
            entity.*,
-           {0}.traversal_lexical_order AS traversal_lexical_order
+           lexical_entry_id.traversal_lexical_order AS traversal_lexical_order
          FROM entity
-           INNER JOIN {0}
+           INNER JOIN
+             unnest(CAST(:client_id_list AS BIGINT[]), CAST(:object_id_list AS BIGINT[]))
+             WITH ORDINALITY AS lexical_entry_id (client_id, object_id, traversal_lexical_order)
              ON
-               entity.parent_client_id = {0}.client_id
-               AND entity.parent_object_id = {0}.object_id
+               entity.parent_client_id = lexical_entry_id.client_id
+               AND entity.parent_object_id = lexical_entry_id.object_id
         )
         SELECT
           cte_expr.client_id,
@@ -1985,9 +2691,11 @@ class LexicalEntry(
         FROM cte_expr
           LEFT JOIN publishingentity
             ON publishingentity.client_id = cte_expr.client_id AND publishingentity.object_id = cte_expr.object_id
-          {1}
+          {0}
         ORDER BY cte_expr.traversal_lexical_order;
-        '''.format(temp_table_name, pub_filter))
+        '''.format(pub_filter)).bindparams(
+            client_id_list = client_id_list,
+            object_id_list = object_id_list)
 
         entries = DBSession.query(Entity, PublishingEntity).from_statement(statement) .options(joinedload('publishingentity')).yield_per(100)
 
@@ -2036,6 +2744,59 @@ class Entity(
         DBSession.add(publishingentity)
         self.publishingentity = publishingentity
 
+    @classmethod
+    def bulk_table_list(
+        cls,
+        row_list,
+        created_at):
+        """
+        Adds PublishingEntity rows to entity rows, 'published' and 'accepted' flags can be specified in
+        entity attribute dictionaries the same way as in Entity constructor.
+        """
+
+        flag_list = [
+            (row.pop('published', False), row.pop('accepted', False))
+            for row in row_list]
+
+        table_list = (
+            super().bulk_table_list(row_list, created_at))
+
+        publishing_list = [
+
+            {'client_id': insert_dict['client_id'],
+                'object_id': insert_dict['object_id'],
+                'created_at': insert_dict['created_at'],
+                'published': published,
+                'accepted': accepted}
+
+            for insert_dict, (published, accepted) in zip(table_list[-1][1], flag_list)]
+
+        table_list.append(
+            (PublishingEntity.__table__, publishing_list))
+
+        return table_list
+
+    @classmethod
+    def bulk_create(
+        cls,
+        row_list,
+        session = DBSession,
+        **kwargs):
+        """
+        Also creates search tokens of created entities and remembers their perspectives for search result
+        caching, as bulk creation bypasses the ORM.
+        """
+
+        id_list = (
+            super().bulk_create(row_list, session, **kwargs))
+
+        update_search_tokens(id_list, session)
+
+        note_search_changes(
+            session, entity_id_set = id_list)
+
+        return id_list
+
     def track(self, publish):
         return entity_content(self, publish, False)
 
@@ -2799,3 +3560,456 @@ class ValencyMergeData(
     verb_lex = Column(UnicodeText, nullable = False, primary_key = True)
     merge_id = Column(SLBigInteger(), nullable = False)
 
+
+
+class SearchToken(
+    Base,
+    IdMixin):
+    """
+    Whitespace-separated tokens of entity contents, used in dictionary search instead of scanning contents,
+    see update_search_tokens().
+
+    Tokens are stored as they are in contents, and are matched by lower() or diacritic_xform() expressions
+    indexed in the DB, so that any whitespace-free substring of a transformed content is a substring of a
+    transformed token of the content.
+
+    Not linked to entities through foreign keys, as entities can be deleted and tokens are updated only after
+    a flush.
+    """
+
+    __tablename__ = 'search_token'
+
+    __table_args__ = (
+        Index(
+            'search_token_entity_id_idx',
+            'entity_client_id',
+            'entity_object_id'),)
+
+    token = Column(UnicodeText, nullable = False)
+
+    entity_client_id = Column(SLBigInteger(), nullable = False)
+    entity_object_id = Column(SLBigInteger(), nullable = False)
+
+    field_client_id = Column(SLBigInteger(), nullable = False)
+    field_object_id = Column(SLBigInteger(), nullable = False)
+
+    perspective_client_id = Column(SLBigInteger(), nullable = False)
+    perspective_object_id = Column(SLBigInteger(), nullable = False)
+
+
+# If dictionary search should use search tokens, can be changed through the 'search_token_index'
+# application setting after search tokens are backfilled, see lingvodoc.scripts.search_token_backfill.
+SEARCH_TOKEN_INDEX = False
+
+
+def set_search_token_index(flag):
+
+    global SEARCH_TOKEN_INDEX
+
+    if flag is not None:
+        SEARCH_TOKEN_INDEX = flag.lower() in ('true', 'yes', 'on', '1')
+
+
+def update_search_tokens(
+    entity_id_list,
+    session = DBSession):
+    """
+    Replaces search tokens of specified entities with tokens of their current contents, deleted entities
+    and entities of other sessions' uncommitted transactions get no tokens.
+    """
+
+    if not entity_id_list:
+        return
+
+    id_dict = {
+        'client_id_list': [client_id for client_id, object_id in entity_id_list],
+        'object_id_list': [object_id for client_id, object_id in entity_id_list]}
+
+    session.execute(
+        text('''
+
+        delete from search_token
+        where
+          (entity_client_id, entity_object_id) in (
+            select * from unnest(
+              cast(:client_id_list as bigint[]),
+              cast(:object_id_list as bigint[])))
+
+        '''),
+        id_dict)
+
+    session.execute(
+        text(r'''
+
+        insert into search_token (
+          token,
+          entity_client_id,
+          entity_object_id,
+          field_client_id,
+          field_object_id,
+          perspective_client_id,
+          perspective_object_id)
+
+        select distinct
+          T.token,
+          E.client_id,
+          E.object_id,
+          E.field_client_id,
+          E.field_object_id,
+          L.parent_client_id,
+          L.parent_object_id
+
+        from
+          unnest(
+            cast(:client_id_list as bigint[]),
+            cast(:object_id_list as bigint[]))
+            I (client_id, object_id)
+
+          join entity E
+            on E.client_id = I.client_id
+            and E.object_id = I.object_id
+
+          join lexicalentry L
+            on L.client_id = E.parent_client_id
+            and L.object_id = E.parent_object_id
+
+          cross join lateral
+            regexp_split_to_table(E.content, '\s+') T (token)
+
+        where
+          not E.marked_for_deletion and
+          T.token != ''
+
+        '''),
+        id_dict)
+
+    if session is DBSession:
+        mark_changed(DBSession())
+
+
+# Entity attributes search tokens depend on.
+search_token_attribute_list = [
+    'content',
+    'marked_for_deletion',
+    'field_client_id',
+    'field_object_id',
+    'parent_client_id',
+    'parent_object_id']
+
+
+@event.listens_for(Session, 'after_flush')
+def update_flushed_search_tokens(session, flush_context):
+    """
+    Updates search tokens of created, changed and deleted entities and of entities of moved lexical
+    entries.
+    """
+
+    entity_id_set = set()
+    entry_id_set = set()
+
+    for obj in session.new:
+
+        if isinstance(obj, Entity):
+            entity_id_set.add((obj.client_id, obj.object_id))
+
+    for obj in session.deleted:
+
+        if isinstance(obj, Entity):
+            entity_id_set.add((obj.client_id, obj.object_id))
+
+    for obj in session.dirty:
+
+        if isinstance(obj, Entity):
+
+            state = inspect(obj)
+
+            if any(
+                state.attrs[attribute].history.has_changes()
+                for attribute in search_token_attribute_list):
+
+                entity_id_set.add((obj.client_id, obj.object_id))
+
+        elif isinstance(obj, LexicalEntry):
+
+            state = inspect(obj)
+
+            if (state.attrs.parent_client_id.history.has_changes() or
+                state.attrs.parent_object_id.history.has_changes()):
+
+                entry_id_set.add((obj.client_id, obj.object_id))
+
+    if entry_id_set:
+
+        entity_id_set.update(
+
+            session
+
+                .query(
+                    Entity.client_id,
+                    Entity.object_id)
+
+                .filter(
+                    tuple_(
+                        Entity.parent_client_id,
+                        Entity.parent_object_id)
+
+                        .in_(entry_id_set))
+
+                .all())
+
+    update_search_tokens(
+        list(entity_id_set), session)
+
+
+def search_version_key(perspective_id):
+    """
+    Returns cache key of search version of a perspective, or of global search version if perspective id is
+    None, see lingvodoc.utils.search_cache.
+    """
+
+    if perspective_id is None:
+        return 'search_version'
+
+    return 'search_version:%s:%s' % tuple(perspective_id)
+
+
+def note_search_changes(
+    session,
+    perspective_id_set = (),
+    entry_id_set = (),
+    entity_id_set = ()):
+    """
+    Remembers perspectives of changed lexical entries and entities, so that their search versions can be
+    changed after commit.
+    """
+
+    perspective_id_set = set(perspective_id_set)
+    entry_id_set = set(entry_id_set)
+
+    if entity_id_set:
+
+        entry_id_set.update(
+
+            session
+
+                .query(
+                    Entity.parent_client_id,
+                    Entity.parent_object_id)
+
+                .filter(
+                    tuple_(
+                        Entity.client_id,
+                        Entity.object_id)
+
+                        .in_(list(entity_id_set)))
+
+                .distinct()
+                .all())
+
+    if entry_id_set:
+
+        perspective_id_set.update(
+
+            session
+
+                .query(
+                    LexicalEntry.parent_client_id,
+                    LexicalEntry.parent_object_id)
+
+                .filter(
+                    tuple_(
+                        LexicalEntry.client_id,
+                        LexicalEntry.object_id)
+
+                        .in_(list(entry_id_set)))
+
+                .distinct()
+                .all())
+
+    if perspective_id_set:
+
+        session.info.setdefault('search_perspective_id_set', set()).update(
+            tuple(perspective_id) for perspective_id in perspective_id_set)
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_search_changes(session, flush_context):
+    """
+    Remembers perspectives of created, changed and deleted lexical entries, entities and entity publishing
+    states, including previous perspectives of moved lexical entries.
+    """
+
+    perspective_id_set = set()
+    entry_id_set = set()
+    entity_id_set = set()
+
+    for obj in (
+        list(session.new) + list(session.dirty) + list(session.deleted)):
+
+        if isinstance(obj, LexicalEntry):
+
+            perspective_id_set.add(
+                (obj.parent_client_id, obj.parent_object_id))
+
+            state = inspect(obj)
+
+            client_id_history = state.attrs.parent_client_id.history
+            object_id_history = state.attrs.parent_object_id.history
+
+            if client_id_history.deleted or object_id_history.deleted:
+
+                perspective_id_set.add((
+                    (client_id_history.deleted or [obj.parent_client_id])[0],
+                    (object_id_history.deleted or [obj.parent_object_id])[0]))
+
+        elif isinstance(obj, Entity):
+
+            entry_id_set.add(
+                (obj.parent_client_id, obj.parent_object_id))
+
+        elif isinstance(obj, PublishingEntity):
+
+            entity_id_set.add(
+                (obj.client_id, obj.object_id))
+
+    note_search_changes(
+        session, perspective_id_set, entry_id_set, entity_id_set)
+
+
+@event.listens_for(Session, 'after_bulk_update')
+@event.listens_for(Session, 'after_bulk_delete')
+def collect_bulk_search_changes(update_context):
+    """
+    Bulk updates and deletions of lexical entries, entities and entity publishing states can change any
+    perspective, so they change global search version.
+    """
+
+    if update_context.mapper.class_ in (
+        LexicalEntry, Entity, PublishingEntity):
+
+        update_context.session.info['search_global_change'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def change_search_versions(session):
+    """
+    Changes search versions of changed perspectives, so that their cached search results are not used
+    anymore.
+    """
+
+    perspective_id_set = session.info.pop('search_perspective_id_set', None)
+    global_flag = session.info.pop('search_global_change', False)
+
+    if not (perspective_id_set or global_flag) or not caching.CACHE:
+        return
+
+    key_list = [
+        search_version_key(perspective_id)
+        for perspective_id in perspective_id_set or ()]
+
+    if global_flag:
+        key_list.append(search_version_key(None))
+
+    try:
+
+        caching.CACHE.set(
+            key_value = {key: uuid.uuid4().hex for key in key_list})
+
+    except Exception as exception:
+
+        log.warning(f'Failed to change search versions: {exception}')
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def clear_search_changes(session, transaction):
+    """
+    Forgets changed perspectives at the end of each top-level transaction.
+    """
+
+    if transaction.parent is None:
+
+        session.info.pop('search_perspective_id_set', None)
+        session.info.pop('search_global_change', None)
+
+
+class EafAnnotation(
+    Base,
+    IdMixin):
+    """
+    Annotations of ELAN markup files of entities, extracted on upload and by
+    lingvodoc.scripts.eaf_annotation_backfill, used in EAF corpora search instead of parsing every file.
+
+    Annotation texts are matched by lower() expressions indexed in the DB.
+    """
+
+    __tablename__ = 'eaf_annotation'
+
+    __table_args__ = (
+        Index(
+            'eaf_annotation_entity_id_idx',
+            'entity_client_id',
+            'entity_object_id'),)
+
+    entity_client_id = Column(SLBigInteger(), nullable = False)
+    entity_object_id = Column(SLBigInteger(), nullable = False)
+
+    tier = Column(UnicodeText, nullable = False)
+
+    # Time span in milliseconds, can be unknown for annotations with unaligned time slots.
+    start_time = Column(SLBigInteger())
+    end_time = Column(SLBigInteger())
+
+    content = Column(UnicodeText, nullable = False)
+
+
+# If EAF corpora search should use extracted annotations to skip files which can't match, can be changed
+# through the 'eaf_annotation_index' application setting after annotations are backfilled.
+EAF_ANNOTATION_INDEX = False
+
+
+def set_eaf_annotation_index(flag):
+
+    global EAF_ANNOTATION_INDEX
+
+    if flag is not None:
+        EAF_ANNOTATION_INDEX = flag.lower() in ('true', 'yes', 'on', '1')
+
+
+def update_eaf_annotations(
+    entity_id,
+    annotation_list,
+    session = DBSession):
+    """
+    Replaces extracted annotations of an entity's ELAN markup with (tier, start time, end time, text) tuples,
+    see lingvodoc.utils.elan_functions.eaf_annotation_list().
+    """
+
+    client_id, object_id = entity_id
+
+    session.execute(
+
+        EafAnnotation.__table__
+
+            .delete()
+
+            .where(and_(
+                EafAnnotation.entity_client_id == client_id,
+                EafAnnotation.entity_object_id == object_id)))
+
+    if annotation_list:
+
+        session.execute(
+
+            EafAnnotation.__table__.insert(),
+
+            [{'entity_client_id': client_id,
+                'entity_object_id': object_id,
+                'tier': tier,
+                'start_time': start_time,
+                'end_time': end_time,
+                'content': content}
+
+                for tier, start_time, end_time, content in annotation_list])
+
+    if session is DBSession:
+        mark_changed(DBSession())
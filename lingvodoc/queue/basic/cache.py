@@ -1,36 +1,63 @@
 __author__ = 'alexander'
 
-import pickle
+import logging
 
+from celery.result import AsyncResult
+
+from lingvodoc.cache import codec
 from lingvodoc.queue.api.cache import ITaskCache
 from lingvodoc.queue.basic.redis_client import LingvodocRedisClient
 
 from redis import StrictRedis
 
+log = logging.getLogger(__name__)
+
 
 class TaskCache(ITaskCache):
     """
     `self.user_store': {'user_id': <list of task_ids>}
-    `self.task_store`: {'task_id`: <AsyncResult>}
+    `self.task_store`: {'task_id`: <AsyncResult id>}
     `self.progress_store`: {`task_id`: `progress_value(int)`}
+
+    Values are encoded with the cache codec, AsyncResults previously stored as pickle dumps are still
+    decoded. Values which can't be decoded, e.g. stored by a previous version with an outdated format, are
+    deleted and treated as missing.
     """
     def __init__(self, user_kwargs, task_kwargs ,progress_kwargs):
         self.user_store = StrictRedis(**user_kwargs)
         self.task_store = StrictRedis(**task_kwargs)
         self.progress_store = LingvodocRedisClient(**progress_kwargs)
 
+    @staticmethod
+    def loads(store, key, cached):
+        """
+        Decodes stored value, deleting it and returning None if it can't be decoded.
+        """
+        try:
+            return codec.loads(cached)
+        except codec.CodecError as exception:
+            log.warning(f'Failed to decode stored value of \'{key}\', deleting it: {exception}')
+            store.delete(key)
+            return None
+
     def get(self, user, remove_finished=False):
         result = dict()
         tasks = self.user_store.get(user.id)
         if tasks is None:
             return {}
-        tasks = pickle.loads(tasks)
+        tasks = self.loads(self.user_store, user.id, tasks)
+        if tasks is None:
+            return {}
         remained_tasks = list()
         for t in tasks:
             val = self.task_store.get(t)
             if val is None:
                 continue
-            async_result = pickle.loads(val)
+            async_result = self.loads(self.task_store, t, val)
+            if async_result is None:
+                continue
+            if not isinstance(async_result, AsyncResult):
+                async_result = AsyncResult(async_result)
             progress = self.progress_store.get(t)
             # Redis client returns byte array. We need to decode it
             if progress is not None:
@@ -43,18 +70,19 @@ class TaskCache(ITaskCache):
                 else:
                     remained_tasks.append(t)
         if remove_finished:
-            self.user_store.set(user.id, pickle.dumps(remained_tasks))
+            self.user_store.set(user.id, codec.dumps(remained_tasks))
         return result
 
 
     # TODO: add try/catch handlers.
     # we should remove the task from caches (and queue?) if exception is raised
     def set(self, user, task_key, async_task):
-        self.task_store.set(task_key, pickle.dumps(async_task))
+        self.task_store.set(task_key, codec.dumps(async_task.id))
         cached = self.user_store.get(user.id)
-        if cached is None:
+        tmp_tasks = (
+            self.loads(self.user_store, user.id, cached) if cached is not None else None)
+        if tmp_tasks is None:
             tmp_tasks = [task_key]
         else:
-            tmp_tasks = pickle.loads(cached)
             tmp_tasks.append(task_key)
-        self.user_store.set(user.id, pickle.dumps(tmp_tasks))
+        self.user_store.set(user.id, codec.dumps(tmp_tasks))
@@ -8,13 +8,30 @@ http://docs.celeryproject.org/en/latest/getting-started/first-steps-with-celery.
 If you want to disable Celery then just make kwargs = None and MockApp will be used instead of Celery.
 It also happens if `celery.ini` is incomplete. The same for TaskStore
 
+Without Celery tasks are run in new processes, or in a process pool if `[queue:mock]` section of `celery.ini`
+sets `executor = pool`, with `workers` pool processes.
+
 To run a worker you need to run `celery worker -A lingvodoc.queue.celery` from lingvodoc root having all
 lingvodoc pip dependencies installed.
+
+Tasks are routed to named queues: HEAVY_QUEUE for CPU-heavy analyses, IO_QUEUE for exports, imports and
+conversions, LIGHT_QUEUE, the default one, for everything else, e.g. `@celery.task(queue = HEAVY_QUEUE)`.
+Workers should be run for each queue, e.g. `celery worker -A lingvodoc.queue.celery -Q heavy -c 2`, so that
+heavy tasks can't starve light ones.
+
+Number of simultaneously running tasks of a user in a queue can be limited through `[queue:user_limits]`
+section of `celery.ini`, e.g. `heavy = 2`. Limits are enforced through Redis semaphores of the cache, tasks
+exceeding the limit are retried later. Only tasks with `task_key` and `cache_kwargs` arguments are limited,
+their users are found through their task statuses.
 """
 
 __author__ = 'alexander'
 
+import inspect
 import logging
+import os
+import threading
+import time
 from configparser import (
     ConfigParser,
     NoSectionError
@@ -22,7 +39,10 @@ from configparser import (
 
 from sqlalchemy import create_engine
 
-from celery import Celery
+from celery import Celery, Task
+
+import lingvodoc.cache.caching as caching
+from lingvodoc.queue.metrics import run_with_metrics
 
 from lingvodoc.queue.basic.cache import TaskCache
 from lingvodoc.queue.mock.cache import MockTaskCache
@@ -62,6 +82,163 @@ def _parse_celery_args():
         log.warn("No 'celery' or 'queue:(progress|task|user)_redis' sections in config; disabling queue")
         return None
 
+
+def _parse_mock_args():
+    """
+    Parses executor settings used when Celery is disabled: 'executor', either 'process' to run each task in a
+    new process or 'pool' to run tasks in a process pool, and 'workers', size of the pool.
+    """
+    try:
+        mock_kwargs = dict(parser.items('queue:mock'))
+    except NoSectionError:
+        return {}
+    result = {}
+    if 'executor' in mock_kwargs:
+        result['executor'] = mock_kwargs['executor']
+    if 'workers' in mock_kwargs:
+        result['worker_count'] = int(mock_kwargs['workers'])
+    return result
+
+
+# Task queues, workers should be run for each of them, e.g. `-Q heavy`.
+
+HEAVY_QUEUE = 'heavy'
+IO_QUEUE = 'io'
+LIGHT_QUEUE = 'light'
+
+QUEUE_LIST = [HEAVY_QUEUE, IO_QUEUE, LIGHT_QUEUE]
+
+
+def _parse_user_limits():
+    try:
+        return {
+            queue: int(limit)
+            for queue, limit in parser.items('queue:user_limits')}
+    except NoSectionError:
+        return {}
+
+
+# Maximum numbers of simultaneously running tasks of a user by queue.
+
+USER_LIMIT_DICT = _parse_user_limits()
+
+# User's semaphore slot expires if not refreshed for this many seconds, e.g. if the worker crashed.
+
+USER_SEMAPHORE_TIMEOUT = 300
+
+# Delay in seconds before retrying a task exceeding user's limit, and maximum number of such retries, so that
+# a task waits for a slot for about a day at most.
+
+USER_LIMIT_RETRY_TIME = 30
+
+USER_LIMIT_MAX_RETRIES = 2880
+
+
+def user_semaphore_key(queue, user_id):
+    return 'queue_semaphore:{0}:{1}'.format(queue, user_id)
+
+
+class UserLimitedTask(Task):
+    """
+    Runs tasks of queues with per-user limits only when a slot of user's semaphore of the queue is acquired,
+    otherwise retries them later.
+
+    Resource usage of tasks is recorded in their statuses, see lingvodoc.queue.metrics.
+    """
+
+    abstract = True
+
+    def get_user_id(self, args, kwargs):
+        """
+        Gets id of the task's user from its task status, initializing the cache if required.
+
+        Returns the user's id and the task status key, or Nones if the task has no task status.
+        """
+
+        try:
+            argument_dict = inspect.signature(self.run).bind(*args, **kwargs).arguments
+        except TypeError:
+            return None, None
+
+        task_key = argument_dict.get('task_key')
+        cache_kwargs = argument_dict.get('cache_kwargs')
+
+        if not task_key or cache_kwargs is None:
+            return None, None
+
+        if not caching.CACHE:
+            caching.initialize_cache(cache_kwargs)
+
+        task_dict = caching.CACHE.hash_get(task_key)
+
+        if not task_dict:
+            return None, None
+
+        return task_dict.get('user_id'), task_key
+
+    def __call__(self, *args, **kwargs):
+
+        limit = USER_LIMIT_DICT.get(self.queue)
+
+        user_id, task_key = (
+            self.get_user_id(args, kwargs) if limit else (None, None))
+
+        if user_id is None:
+            return run_with_metrics(self.run, args, kwargs)
+
+        semaphore_key = user_semaphore_key(self.queue, user_id)
+        holder = self.request.id or str(os.getpid())
+
+        if not caching.CACHE.semaphore_acquire(
+            semaphore_key, holder, limit, USER_SEMAPHORE_TIMEOUT):
+
+            # Giving up after too many retries, marking the task as failed so that its status does not
+            # stay stuck. Explicit retry limit is required, as Celery treats max_retries = None as the
+            # class default.
+
+            if self.request.retries >= USER_LIMIT_MAX_RETRIES:
+
+                log.warning(
+                    '{0} {1}: user {2} limit {3} reached, giving up after {4} retries'.format(
+                        self.name, holder, user_id, limit, self.request.retries))
+
+                caching.TaskStatus.get_from_cache(task_key).set(
+                    None, -1, 'Task was not run: too many running tasks of the user')
+
+                return None
+
+            log.debug(
+                '{0} {1}: user {2} limit {3} reached, retrying in {4}s'.format(
+                    self.name, holder, user_id, limit, USER_LIMIT_RETRY_TIME))
+
+            # Task waiting for a slot is still alive, see lingvodoc.utils.task_registry.
+
+            caching.CACHE.hash_set(task_key, {'updated_at': time.time()})
+
+            raise self.retry(
+                countdown = USER_LIMIT_RETRY_TIME,
+                max_retries = USER_LIMIT_MAX_RETRIES)
+
+        # Refreshing our semaphore slot while we run.
+
+        cache = caching.CACHE
+        stop_event = threading.Event()
+
+        def refresh():
+            while not stop_event.wait(USER_SEMAPHORE_TIMEOUT / 3):
+                cache.semaphore_acquire(
+                    semaphore_key, holder, limit, USER_SEMAPHORE_TIMEOUT)
+
+        threading.Thread(target = refresh, daemon = True).start()
+
+        try:
+            return run_with_metrics(self.run, args, kwargs)
+
+        finally:
+            stop_event.set()
+            cache.semaphore_release(semaphore_key, holder)
+
+
 QUEUED_TASKS = None
 celery = None
 kwargs = _parse_celery_args()
@@ -69,11 +246,45 @@ if kwargs:
     if "celery" in kwargs:
         if "celery" in kwargs["celery"]:
             if kwargs["celery"]["celery"] == "true":
-                celery = Celery(**kwargs['celery'])
+                celery = Celery(task_cls = UserLimitedTask, **kwargs['celery'])
+                celery.conf.update(
+                    CELERY_DEFAULT_QUEUE = LIGHT_QUEUE,
+                    CELERY_DEFAULT_ROUTING_KEY = LIGHT_QUEUE)
                 QUEUED_TASKS = TaskCache(kwargs['user_cache'], kwargs['task_cache'], kwargs['progress'])
 
 if celery is None:
-    celery = MockApp()
+    celery = MockApp(**_parse_mock_args())
     QUEUED_TASKS = MockTaskCache()
 
+
+def queue_depth():
+    """
+    Returns numbers of tasks waiting in each queue, or running in each queue if Celery is disabled.
+    """
+
+    if isinstance(celery, MockApp):
+        return celery.queue_depth(QUEUE_LIST, LIGHT_QUEUE)
+
+    result = {}
+
+    with celery.connection() as connection:
+
+        for queue in QUEUE_LIST:
+
+            # Passive declaration of a queue fails if it does not exist, e.g. if it is an empty queue of
+            # the Redis transport, and a failed declaration can close its channel, so each queue gets its
+            # own channel.
+
+            try:
+
+                with connection.channel() as channel:
+                    _, message_count, _ = channel.queue_declare(queue, passive = True)
+
+            except connection.channel_errors:
+                message_count = 0
+
+            result[queue] = message_count
+
+    return result
+
 celery_engine = None
\ No newline at end of file
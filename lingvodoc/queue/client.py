@@ -1,6 +1,6 @@
 __author__ = 'alexander'
 
-from lingvodoc.queue.celery import QUEUED_TASKS
+from lingvodoc.queue.celery import QUEUED_TASKS, queue_depth
 
 
 class QueueClient:
@@ -42,3 +42,11 @@ class QueueClient:
         """
         # Pass False if you don't want your tasks to be deleted from Redis when they're finished.
         return QUEUED_TASKS.get(user, False)
+
+    @classmethod
+    def get_queue_depth(cls):
+        """
+        Get numbers of tasks waiting in each queue
+        :return: a dictionary of numbers of tasks by queue name
+        """
+        return queue_depth()
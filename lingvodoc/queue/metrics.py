@@ -0,0 +1,268 @@
+"""
+Resource accounting of asynchronous tasks.
+
+Each task with a 'task_key' argument run through `run_with_metrics` records its wall time, CPU time, peak RSS
+of its process, number and total time of SQL statements and number of Redis requests, stored in its task status
+as 'metrics'. Metrics are collected per thread, so that tasks run concurrently in threads of a process, e.g. by
+a threaded Celery worker, do not count each other's SQL statements and Redis requests. Metrics are also appended to a capped list of samples of the task's family and size bucket, see
+`metrics_key`, so that e.g. percentiles of durations of cognate analysis by number of analysed perspectives
+can be computed with `metrics_summary`.
+
+Tasks can report their size, e.g. number of processed perspectives, with `set_task_size`.
+"""
+
+# Standard library imports.
+
+import inspect
+import logging
+import math
+import resource
+import threading
+import time
+
+# Library imports.
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+log = logging.getLogger(__name__)
+
+
+# Maximum number of samples stored for each task family and size bucket.
+
+SAMPLE_COUNT = 1000
+
+
+class TaskMetrics(object):
+    """
+    Collects resource usage of a running task.
+    """
+
+    def __init__(self):
+
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.redis_count = 0
+        self.size = None
+
+        self.start_time = time.time()
+        self.start_usage = resource.getrusage(RUSAGE_TASK)
+
+    def finish(self):
+        """
+        Returns collected metrics.
+
+        CPU time is of the task's thread, where supported. Peak RSS, 'process_max_rss', is the peak of the whole
+        process up to the task's end, in KiB, as separate peaks of tasks run by a process can't be measured.
+        """
+
+        usage = resource.getrusage(RUSAGE_TASK)
+
+        return {
+            'wall_time': round(time.time() - self.start_time, 3),
+            'cpu_time': round(
+                usage.ru_utime - self.start_usage.ru_utime +
+                usage.ru_stime - self.start_usage.ru_stime, 3),
+            'process_max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'sql_count': self.sql_count,
+            'sql_time': round(self.sql_time, 3),
+            'redis_count': self.redis_count,
+            'size': self.size}
+
+
+# CPU time of a task is measured for its thread, if supported.
+
+RUSAGE_TASK = getattr(resource, 'RUSAGE_THREAD', resource.RUSAGE_SELF)
+
+# Metrics of the task currently running in the current thread, if any.
+
+task_local = threading.local()
+
+
+def current_metrics():
+    return getattr(task_local, 'metrics', None)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+
+    if current_metrics() is not None:
+        conn.info.setdefault('metrics_time_list', []).append(time.time())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+
+    current = current_metrics()
+    time_list = conn.info.get('metrics_time_list')
+
+    if current is not None and time_list:
+
+        current.sql_count += 1
+        current.sql_time += time.time() - time_list.pop()
+
+
+class CountingConnectionMixin(object):
+    """
+    Counts Redis requests of the current task, a pipeline counts as a single request.
+    """
+
+    def send_packed_command(self, *args, **kwargs):
+
+        current = current_metrics()
+
+        if current is not None:
+            current.redis_count += 1
+
+        return super().send_packed_command(*args, **kwargs)
+
+
+def count_redis_requests(redis):
+    """
+    Makes Redis client count requests of tasks.
+    """
+
+    pool = redis.connection_pool
+    connection_class = pool.connection_class
+
+    if not issubclass(connection_class, CountingConnectionMixin):
+
+        pool.connection_class = type(
+            'Counting' + connection_class.__name__,
+            (CountingConnectionMixin, connection_class),
+            {})
+
+    return redis
+
+
+def set_task_size(size):
+    """
+    Sets size of the current task, e.g. number of processed perspectives, used to group its metrics.
+    """
+
+    current = current_metrics()
+
+    if current is not None:
+        current.size = size
+
+
+def size_bucket(size):
+    """
+    Returns bucket of a task size, powers of 2, e.g. '<=16'.
+    """
+
+    if size is None:
+        return 'any'
+
+    return '<={0}'.format(2 ** max(0, math.ceil(math.log2(max(size, 1)))))
+
+
+def metrics_key(task_family, bucket):
+    return 'task_metrics:{0}:{1}'.format(task_family, bucket)
+
+
+def record_metrics(task_key, metrics):
+    """
+    Stores metrics in the task's status and appends them to samples of its family and size bucket.
+    """
+
+    import lingvodoc.cache.caching as caching
+
+    if not caching.CACHE:
+        return
+
+    task_dict = caching.CACHE.hash_get(task_key)
+
+    if not task_dict:
+        return
+
+    task_status = caching.TaskStatus.from_dict(task_dict)
+    task_status.metrics = metrics
+    task_status.put_to_cache()
+
+    caching.CACHE.list_push(
+        metrics_key(task_status.task_family, size_bucket(metrics['size'])),
+        metrics,
+        SAMPLE_COUNT)
+
+
+def run_with_metrics(func, args, kwargs):
+    """
+    Runs task, recording its metrics if it has a 'task_key' argument.
+    """
+
+    try:
+        task_key = inspect.signature(func).bind(*args, **kwargs).arguments.get('task_key')
+
+    except TypeError:
+        task_key = None
+
+    if not task_key or current_metrics() is not None:
+        return func(*args, **kwargs)
+
+    current = TaskMetrics()
+    task_local.metrics = current
+
+    try:
+        return func(*args, **kwargs)
+
+    finally:
+
+        metrics = current.finish()
+        task_local.metrics = None
+
+        try:
+            record_metrics(task_key, metrics)
+
+        except Exception as exception:
+            log.warning('{0}: failed to record metrics: {1}'.format(task_key, exception))
+
+
+def percentile(value_list, fraction):
+    """
+    Returns percentile of a sorted list by the nearest-rank method.
+    """
+
+    return value_list[max(0, math.ceil(fraction * len(value_list)) - 1)]
+
+
+def metrics_summary(task_family, bucket_list = None):
+    """
+    Returns sample count and median, 95th percentile and maximum of wall time, CPU time and process peak RSS
+    of a task family by size bucket.
+    """
+
+    import lingvodoc.cache.caching as caching
+
+    if bucket_list is None:
+        bucket_list = ['any'] + ['<={0}'.format(2 ** i) for i in range(21)]
+
+    result = {}
+
+    for bucket in bucket_list:
+
+        sample_list = caching.CACHE.list_get(metrics_key(task_family, bucket))
+
+        if not sample_list:
+            continue
+
+        bucket_dict = {'count': len(sample_list)}
+
+        for name in ['wall_time', 'cpu_time', 'process_max_rss']:
+
+            value_list = sorted(
+                sample[name] for sample in sample_list
+                if sample.get(name) is not None)
+
+            if not value_list:
+                continue
+
+            bucket_dict[name] = {
+                'p50': percentile(value_list, 0.5),
+                'p95': percentile(value_list, 0.95),
+                'max': value_list[-1]}
+
+        result[bucket] = bucket_dict
+
+    return result
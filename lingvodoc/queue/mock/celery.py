@@ -1,6 +1,22 @@
 __author__ = 'alexander'
+
+import concurrent.futures
+import importlib
+import inspect
+import logging
+import multiprocessing
+import threading
+import traceback
+
+import dill
 from multiprocess import Process
 
+from lingvodoc.queue.metrics import run_with_metrics
+
+
+log = logging.getLogger(__name__)
+
+
 class MockResult:
     """
     This class is used when Celery is disabled. This class implements all used methods of
@@ -17,20 +33,253 @@ class MockResult:
         return self.result
 
 
+# Task functions by their full names, so that process pool workers can find them.
+
+task_func_dict = {}
+
+
+def get_task_name(func):
+    return func.__module__ + '.' + func.__qualname__
+
+
+def find_task_func(task_name):
+    """
+    Finds task function by its full name, importing its module if it's not imported yet.
+    """
+
+    func = task_func_dict.get(task_name)
+
+    if func is None:
+
+        importlib.import_module(task_name.rsplit('.', 1)[0])
+        func = task_func_dict[task_name]
+
+    return func
+
+
+def get_task_argument(func, args, kwargs, name):
+    """
+    Returns value of the specified argument of a task call, or None if the task has no such argument.
+    """
+
+    try:
+        return inspect.signature(func).bind(*args, **kwargs).arguments.get(name)
+
+    except TypeError:
+        return None
+
+
+# Engines of a process pool worker by DB URL.
+
+worker_engine_dict = {}
+
+
+def run_task(task_name, data):
+    """
+    Runs task in a process pool worker.
+
+    Worker processes are spawned, not forked, so that they do not share the web server's DB connections and
+    transactions. Each worker has its own engine for each DB URL tasks receive as their 'sqlalchemy_url'
+    argument; as tasks usually create engines themselves, engines they create are disposed of after they
+    finish, so that a long-lived worker does not accumulate connection pools.
+    """
+
+    from sqlalchemy import create_engine
+    from lingvodoc.models import DBSession
+
+    func = find_task_func(task_name)
+    args, kwargs = dill.loads(data)
+
+    sqlalchemy_url = get_task_argument(func, args, kwargs, 'sqlalchemy_url')
+    engine = None
+
+    if sqlalchemy_url:
+
+        engine = worker_engine_dict.get(sqlalchemy_url)
+
+        if engine is None:
+
+            engine = create_engine(sqlalchemy_url)
+            worker_engine_dict[sqlalchemy_url] = engine
+
+        DBSession.configure(bind = engine)
+
+    try:
+        run_with_metrics(func, args, kwargs)
+
+    finally:
+
+        DBSession.remove()
+
+        task_engine = DBSession.session_factory.kw.get('bind')
+
+        if engine is not None and task_engine is not engine:
+
+            if task_engine is not None:
+                task_engine.dispose()
+
+            DBSession.configure(bind = engine)
+
+
 class MockApp:
     """
     This class is used when Celery is disabled. The class mocks Celery class. Provides a `task`
     decorator for wrapping tasks. The wrapped method becomes an object of the class MockTask which
     method `delay` executes provided function as soon as the method is called.
+
+    With 'process' executor each task is run in a new process right away. With 'pool' executor tasks are
+    run in a process pool with the specified number of workers, tasks beyond that wait for a free worker;
+    task calls which can't be serialized for the pool, e.g. with GraphQL info arguments, are run in new
+    processes as with 'process' executor.
     """
 
-    def task(self, func):
+    def __init__(self, executor = 'process', worker_count = 2):
+
+        if executor not in ('process', 'pool'):
+            raise ValueError(f'Unknown task executor \'{executor}\'.')
+
+        self.executor = executor
+        self.worker_count = worker_count
+
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+        self.process_dict = {}
+        self.future_dict = {}
+
+    def get_pool(self):
+
+        with self.pool_lock:
+
+            if self.pool is None:
+
+                self.pool = (
+
+                    concurrent.futures.ProcessPoolExecutor(
+                        max_workers = self.worker_count,
+                        mp_context = multiprocessing.get_context('spawn')))
+
+            return self.pool
+
+    def task(self, func = None, queue = None, **options):
+        """
+        Supports both `@celery.task` and `@celery.task(queue = ...)` forms, other options are ignored.
+        """
+
+        if func is None:
+            return lambda func: self.task(func, queue = queue)
+
+        task_name = get_task_name(func)
+        task_func_dict[task_name] = func
+
+        process_list = self.process_dict.setdefault(queue, [])
+        future_list = self.future_dict.setdefault(queue, [])
+
+        app = self
+
         class MockTask:
 
             def delay(self, *args, **kwargs):
+
+                if app.executor == 'pool':
+
+                    try:
+                        data = dill.dumps((args, kwargs))
+
+                    except Exception as exception:
+
+                        log.warning(
+                            '{0}: arguments can\'t be serialized ({1}), running in a new process'.format(
+                                task_name, exception))
+
+                    else:
+                        app.submit(func, task_name, data, args, kwargs, future_list)
+                        return True
+
                 # return MockResult(Process(target=func, args=args, kwargs=kwargs))
-                p = Process(target=func, args=args, kwargs=kwargs) #MockResult()
+                p = Process(target=run_with_metrics, args=(func, args, kwargs)) #MockResult()
                 p.start()
+
+                process_list[:] = [process for process in process_list if process.is_alive()]
+                process_list.append(p)
+
                 return True#MockResult(func(*args, **kwargs))
 
         return MockTask()
+
+    def submit(self, func, task_name, data, args, kwargs, future_list):
+        """
+        Submits task to the process pool, reporting its waiting for a free worker and its failure, if it
+        fails without reporting it, through its task status.
+        """
+
+        import lingvodoc.cache.caching as caching
+
+        task_key = get_task_argument(func, args, kwargs, 'task_key')
+
+        future_list[:] = [future for future in future_list if not future.done()]
+
+        pending_count = sum(
+            not future.done()
+            for future_list in self.future_dict.values()
+            for future in future_list)
+
+        if task_key and pending_count >= self.worker_count and caching.CACHE:
+
+            task_dict = caching.CACHE.hash_get(task_key)
+
+            if task_dict:
+
+                caching.TaskStatus.from_dict(task_dict).set(
+                    None, 0, 'Waiting for a free worker, {0} task(s) ahead'.format(
+                        pending_count - self.worker_count))
+
+        future = self.get_pool().submit(run_task, task_name, data)
+        future_list.append(future)
+
+        def done_callback(future):
+
+            exception = future.exception()
+
+            if exception is None:
+                return
+
+            log.warning(
+                '{0}: task failed\n{1}'.format(
+                    task_name,
+                    ''.join(traceback.format_exception(
+                        type(exception), exception, exception.__traceback__))[:-1]))
+
+            if not task_key or not caching.CACHE:
+                return
+
+            task_dict = caching.CACHE.hash_get(task_key)
+
+            if task_dict and task_dict.get('progress', 0) < 100:
+
+                caching.TaskStatus.from_dict(task_dict).set(
+                    None, 100, 'Finished (ERROR), task failed: {0}'.format(exception))
+
+        future.add_done_callback(done_callback)
+
+    def queue_depth(self, queue_list, default_queue):
+        """
+        Returns numbers of still running or waiting tasks by queue, as there are no actual queues.
+        """
+
+        result = {}
+
+        for queue in queue_list:
+
+            process_list = list(self.process_dict.get(queue, ()))
+            future_list = list(self.future_dict.get(queue, ()))
+
+            if queue == default_queue:
+                process_list.extend(self.process_dict.get(None, ()))
+                future_list.extend(self.future_dict.get(None, ()))
+
+            result[queue] = (
+                sum(process.is_alive() for process in process_list) +
+                sum(not future.done() for future in future_list))
+
+        return result
@@ -89,7 +89,8 @@ from lingvodoc.models import (
     PublishingEntity as dbPublishingEntity,
     TranslationAtom as dbTranslationAtom)
 
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, HEAVY_QUEUE
+from lingvodoc.queue.metrics import set_task_size
 
 from lingvodoc.schema.gql_holders import (
     del_object,
@@ -111,6 +112,11 @@ from lingvodoc.utils.search import (
     find_all_tags,
     find_lexical_entries_by_tags)
 
+from lingvodoc.utils.task_registry import (
+    find_task,
+    register_task,
+    task_fingerprint)
+
 import lingvodoc.views.v2.phonology as phonology
 from lingvodoc.views.v2.phonology import process_sound_markup
 
@@ -515,7 +521,7 @@ class PhonemicAnalysis(graphene.Mutation):
                 'Exception:\n' + traceback_string)
 
 
-@celery.task
+@celery.task(queue = HEAVY_QUEUE)
 def async_cognate_analysis(
     language_str,
     source_perspective_id,
@@ -559,6 +565,10 @@ def async_cognate_analysis(
 
     task_status = TaskStatus.get_from_cache(task_key)
 
+    # Analysis metrics are grouped by number of analysed perspectives.
+
+    set_task_size(len(perspective_info_list))
+
     with transaction.manager:
 
         try:
@@ -655,6 +665,9 @@ class CognateAnalysis(graphene.Mutation):
 
     intermediate_url_list = graphene.List(graphene.String)
 
+    # Key of the status of an identical task used instead of starting a new one, if any.
+    reused_task_key = graphene.String()
+
     @staticmethod
     def tag_data_std(
         entry_already_set,
@@ -4242,9 +4255,58 @@ class CognateAnalysis(graphene.Mutation):
                     Client.get_user_by_client_id(client_id).id
                         if client_id else anonymous_userid(request))
 
+                # Attaching to an identical running analysis or reusing results of an identical finished one.
+
+                fingerprint = None
+
+                if not (synchronous or debug_flag or intermediate_flag):
+
+                    fingerprint = (
+
+                        task_fingerprint(
+                            'Cognate acoustic analysis',
+                            user_id,
+                            {'source_perspective_id': source_perspective_id,
+                                'base_language_id': base_language_id,
+                                'group_field_id': group_field_id,
+                                'perspective_info_list': perspective_info_list,
+                                'multi_list': multi_list,
+                                'distance_flag': distance_flag,
+                                'reference_perspective_id': reference_perspective_id,
+                                'figure_flag': figure_flag,
+                                'distance_vowel_flag': distance_vowel_flag,
+                                'distance_consonant_flag': distance_consonant_flag,
+                                'match_translations_value': match_translations_value,
+                                'only_orphans_flag': only_orphans_flag,
+                                'locale_id': locale_id},
+                            [source_perspective_id] +
+                                [perspective_id for perspective_id, _, _ in perspective_info_list]))
+
+                    registered_status = find_task(user_id, fingerprint)
+
+                    if registered_status is not None:
+
+                        return (
+
+                            CognateAnalysis(
+                                triumph = True,
+                                reused_task_key = registered_status.key))
+
                 task_status = TaskStatus(
                     user_id, 'Cognate acoustic analysis', base_language_name, 5)
 
+                if fingerprint is not None:
+
+                    registered_status = register_task(user_id, fingerprint, task_status)
+
+                    if registered_status is not None:
+
+                        return (
+
+                            CognateAnalysis(
+                                triumph = True,
+                                reused_task_key = registered_status.key))
+
                 # Launching cognate acoustic analysis asynchronously.
 
                 request.response.status = HTTPOk.code
@@ -23,7 +23,7 @@ from lingvodoc.views.v2.utils import anonymous_userid
 log = logging.getLogger(__name__)
 from lingvodoc.utils.creation import create_gists_with_atoms
 from lingvodoc.utils.corpus_converter import convert_all
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 import transaction
 
 from lingvodoc.cache.caching import CACHE
@@ -156,7 +156,7 @@ class ConvertDictionary(graphene.Mutation):
         return ConvertDictionary(triumph=True)
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_convert_five_tiers(
     dictionary_id,
     client_id,
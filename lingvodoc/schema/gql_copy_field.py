@@ -12,7 +12,7 @@ from lingvodoc.cache.caching import TaskStatus, CACHE
 from sqlalchemy import and_, create_engine
 from sqlalchemy.orm import aliased
 
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 from lingvodoc.utils.creation import create_entity, create_lexicalentry
 from lingvodoc.utils.verification import check_lingvodoc_id
 
@@ -201,7 +201,7 @@ def copy_sound_or_markup_entity(
     return created_entity_ids
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_copy_single_field(one_pid, ftype, client, info,
                             pid1, pid2, fid1, fid2,
                             task_key, cache_kwargs, sqlalchemy_url):
@@ -296,7 +296,7 @@ def async_copy_single_field(one_pid, ftype, client, info,
     task_status.set(5, 100, "Copying field finished")
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_copy_sound_markup_field(one_pid, client, info,
                             pid1, pid2, sfid1, sfid2, mfid1, mfid2,
                             task_key, cache_kwargs, sqlalchemy_url):
@@ -556,6 +556,7 @@ class Dictionary(LingvodocObjectType):  # tested
 
         language_db = self.dbObject.parent
         language = Language(id = language_db.id)
+        language.dbObject = language_db
 
         return [self] + language.resolve_tree(info)
 
@@ -1,9 +1,11 @@
 
 # Standard library imports.
 
+import base64
 from collections import  defaultdict
 import datetime
 import itertools
+import json
 import logging
 import pprint
 
@@ -20,6 +22,7 @@ from sqlalchemy import (
     extract,
     func,
     literal,
+    literal_column,
     or_,
     tuple_,
     union)
@@ -38,6 +41,7 @@ from lingvodoc.models import (
     DictionaryPerspective as dbPerspective,
     DictionaryPerspectiveToField as dbColumn,
     Entity as dbEntity,
+    Field as dbField,
     Group as dbGroup,
     JSONB,
     Language as dbLanguage,
@@ -56,6 +60,7 @@ from lingvodoc.models import (
 from lingvodoc.schema.gql_column import Column
 from lingvodoc.schema.gql_dictionary import Dictionary
 from lingvodoc.schema.gql_entity import Entity
+from lingvodoc.schema.gql_field import Field
 
 from lingvodoc.schema.gql_holders import (
     acl_check_by_id,
@@ -66,8 +71,10 @@ from lingvodoc.schema.gql_holders import (
     LingvodocID,
     LingvodocObjectType,
     ObjectVal,
+    prefetch_translations,
     ResponseError,
     StateHolder,
+    translation_requested,
     undel_object,
     UserAndOrganizationsRoles)
 
@@ -171,6 +178,84 @@ def entries_with_entities(lexes, accept, delete, mode, publish, check_perspectiv
 
     return lexical_entries
 
+
+def page_entries_with_entities(lexes, accept, delete, mode, publish):
+    """
+    Gets lexical entries with entities for a list of lexical entries, preserving its order.
+    """
+
+    position_dict = {
+        (lex.client_id, lex.object_id): index
+        for index, lex in enumerate(lexes)}
+
+    lexical_entries = (
+        entries_with_entities(lexes, accept, delete, mode, publish, check_perspective = False))
+
+    lexical_entries.sort(
+        key = lambda e: position_dict[(e.dbObject.client_id, e.dbObject.object_id)])
+
+    return lexical_entries
+
+
+def encode_cursor(value_list):
+    """
+    Encodes keyset pagination cursor, i.e. sorting key values of the last lexical entry of a page, as an
+    opaque string.
+    """
+
+    return (
+        base64.urlsafe_b64encode(
+            json.dumps(value_list).encode('utf-8')).decode('ascii'))
+
+
+def decode_cursor(cursor, sort_flag):
+    """
+    Decodes keyset pagination cursor, checking that it has sorting value if required.
+    """
+
+    try:
+
+        value_list = (
+            json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')))
+
+        if (not isinstance(value_list, list) or
+            len(value_list) != (3 if sort_flag else 2) or
+            not all(isinstance(value, int) for value in value_list[-2:]) or
+            sort_flag and not isinstance(value_list[0], str)):
+
+            raise ValueError
+
+    except ValueError:
+        raise ResponseError(message = 'Invalid cursor.')
+
+    return value_list
+
+
+class LexicalEntriesPage(graphene.ObjectType):
+    """
+    A page of keyset-paginated perspective lexical entries, see DictionaryPerspective.lexical_entries_page.
+
+    Total count of the lexical entries is computed only if requested.
+    """
+
+    lexical_entries = graphene.List(LexicalEntry)
+    total_count = graphene.Int()
+    end_cursor = graphene.String()
+    has_next_page = graphene.Boolean()
+
+    def resolve_total_count(self, info):
+
+        if self.count_query is None:
+            return 0
+
+        total_count = self.count_query.count()
+
+        if self.limit is not None:
+            total_count = min(total_count, self.limit)
+
+        return total_count
+
+
 class DictionaryPerspective(LingvodocObjectType):
     """
      #created_at                       | timestamp without time zone | NOT NULL
@@ -220,7 +305,28 @@ class DictionaryPerspective(LingvodocObjectType):
     tree = graphene.List(CommonFieldsComposite, )  # TODO: check it
     columns = graphene.List(Column)
 
-    lexical_entries = graphene.List(LexicalEntry, ids = graphene.List(LingvodocID), mode=graphene.String())
+    lexical_entries = (
+
+        graphene.List(
+            LexicalEntry,
+            ids = graphene.List(LingvodocID),
+            mode = graphene.String(),
+            first = graphene.Int(),
+            after = graphene.String(),
+            sort_by_field = LingvodocID(),
+            sort_lexgraph = graphene.Boolean()))
+
+    lexical_entries_page = (
+
+        graphene.Field(
+            LexicalEntriesPage,
+            ids = graphene.List(LingvodocID),
+            mode = graphene.String(),
+            first = graphene.Int(),
+            after = graphene.String(),
+            sort_by_field = LingvodocID(),
+            sort_lexgraph = graphene.Boolean()))
+
     authors = graphene.List('lingvodoc.schema.gql_user.User')
     roles = graphene.Field(UserAndOrganizationsRoles)
     role_check = graphene.Boolean(subject = graphene.String(required = True), action = graphene.String(required = True))
@@ -381,6 +487,7 @@ class DictionaryPerspective(LingvodocObjectType):
 
         dictionary_db = self.dbObject.parent
         dictionary = Dictionary(id = dictionary_db.id)
+        dictionary.dbObject = dictionary_db
 
         return [self] + dictionary.resolve_tree(info)
 
@@ -392,6 +499,40 @@ class DictionaryPerspective(LingvodocObjectType):
             gr_field_obj = Column(id=[dbfield.client_id, dbfield.object_id])
             gr_field_obj.dbObject = dbfield
             result.append(gr_field_obj)
+
+        # If we need translations of column fields, we get fields and their translations in bulk.
+
+        if columns and translation_requested(info, ['field']):
+
+            field_dict = {
+
+                field.id: field
+
+                for field in DBSession
+
+                    .query(dbField)
+
+                    .filter(
+                        tuple_(dbField.client_id, dbField.object_id).in_(
+                            set(dbfield.field_id for dbfield in columns)))
+
+                    .all()}
+
+            gql_field_list = []
+
+            for gr_field_obj in result:
+
+                field = field_dict[gr_field_obj.dbObject.field_id]
+
+                gql_field = Field(id = field.id)
+                gql_field.dbObject = field
+
+                gr_field_obj.field = gql_field
+                gql_field_list.append(gql_field)
+
+            prefetch_translations(
+                gql_field_list, info.context.get('locale_id'))
+
         return result
 
     @fetch_object()
@@ -703,15 +844,12 @@ class DictionaryPerspective(LingvodocObjectType):
 
         return new_hash_count
 
-    @fetch_object()
-    def resolve_lexical_entries(self, info, ids=None, mode=None, authors=None, clients=None, start_date=None, end_date=None,
-                             position=1):
-
-        if self.check_is_hidden_for_client(info):
-            return []
+    def lexical_entries_query(self, info, ids, mode, authors, start_date, end_date):
+        """
+        Gets query of the perspective's lexical entries, entity filtering flags, and the maximum number of
+        lexical entries the current user can view, if it's limited.
+        """
 
-        result = list()
-        request = info.context.get('request')
         if mode == 'all':
             publish = None
             accept = True
@@ -778,10 +916,240 @@ class DictionaryPerspective(LingvodocObjectType):
         db_la_gist = translation_gist_search('Limited access')
         limited_client_id, limited_object_id = db_la_gist.client_id, db_la_gist.object_id
 
+        limit = None
+
         if self.dbObject.state_translation_gist_client_id == limited_client_id and self.dbObject.state_translation_gist_object_id == limited_object_id and mode != 'not_accepted':
             if not info.context.acl_check_if('view', 'lexical_entries_and_entities',
                                    (self.dbObject.client_id, self.dbObject.object_id)):
-                lexes = lexes.limit(20)
+                limit = 20
+
+        return lexes, publish, accept, delete, limit
+
+    def lexical_entries_paginate(
+        self,
+        lexes,
+        publish,
+        accept,
+        join_flag,
+        limit,
+        first,
+        after,
+        sort_by_field,
+        sort_lexgraph):
+        """
+        Gets a page of lexical entries with keyset pagination.
+
+        Lexical entries are ordered by ids, preceded, if required, by the least content of their entities
+        of either a specified field or the perspective's ordering field, the latter giving lexgraph order.
+
+        Returns list of lexical entries of the page, next page flag, page end cursor and lexical entry count
+        query.
+        """
+
+        if first is not None and first < 0:
+            raise ResponseError(message = '\'first\' must be non-negative.')
+
+        # Lexical entries filtered through joins with their entities can be duplicated, so we select them
+        # by ids.
+
+        if join_flag:
+
+            lexes = (
+
+                DBSession
+
+                    .query(dbLexicalEntry)
+
+                    .filter(
+                        tuple_(dbLexicalEntry.client_id, dbLexicalEntry.object_id).in_(
+                            lexes.with_entities(dbLexicalEntry.client_id, dbLexicalEntry.object_id))))
+
+        count_query = lexes
+
+        field_id = sort_by_field
+
+        if sort_lexgraph:
+
+            field_id = (
+
+                DBSession
+
+                    .query(
+                        dbColumn.field_client_id,
+                        dbColumn.field_object_id)
+
+                    .join(dbField, and_(
+                        dbField.client_id == dbColumn.field_client_id,
+                        dbField.object_id == dbColumn.field_object_id))
+
+                    .join(dbTranslationAtom, and_(
+                        dbTranslationAtom.parent_client_id == dbField.data_type_translation_gist_client_id,
+                        dbTranslationAtom.parent_object_id == dbField.data_type_translation_gist_object_id,
+                        dbTranslationAtom.locale_id == 2,
+                        dbTranslationAtom.content == 'Ordering'))
+
+                    .filter(
+                        dbColumn.parent_client_id == self.dbObject.client_id,
+                        dbColumn.parent_object_id == self.dbObject.object_id,
+                        dbColumn.marked_for_deletion == False)
+
+                    .order_by(dbColumn.position)
+
+                    .first())
+
+            if field_id is None:
+                raise ResponseError(message = 'Perspective has no ordering field.')
+
+        key_list = [
+            dbLexicalEntry.client_id,
+            dbLexicalEntry.object_id]
+
+        if field_id is not None:
+
+            # Lexgraph markers are compared bytewise.
+
+            content = (
+
+                dbEntity.content.op('COLLATE')(literal_column('"C"')) if sort_lexgraph else
+                    dbEntity.content)
+
+            sort_query = (
+
+                DBSession
+
+                    .query(
+                        func.min(content))
+
+                    .filter(
+                        dbEntity.parent_client_id == dbLexicalEntry.client_id,
+                        dbEntity.parent_object_id == dbLexicalEntry.object_id,
+                        dbEntity.field_client_id == field_id[0],
+                        dbEntity.field_object_id == field_id[1],
+                        dbEntity.marked_for_deletion == False))
+
+            if publish is not None or accept is not None:
+
+                sort_query = (
+
+                    sort_query.join(dbPublishingEntity, and_(
+                        dbPublishingEntity.client_id == dbEntity.client_id,
+                        dbPublishingEntity.object_id == dbEntity.object_id)))
+
+                if publish is not None:
+                    sort_query = sort_query.filter(dbPublishingEntity.published == publish)
+
+                if accept is not None:
+                    sort_query = sort_query.filter(dbPublishingEntity.accepted == accept)
+
+            key_list.insert(0,
+                func.coalesce(
+                    sort_query.correlate(dbLexicalEntry).as_scalar(), ''))
+
+        cursor = (
+            decode_cursor(after, field_id is not None) if after is not None else None)
+
+        # With limited access only the first 'limit' lexical entries are available, so pages end at the
+        # limit, with pages after it being empty.
+
+        if limit is not None:
+
+            position = 0
+
+            if cursor is not None:
+
+                position = (
+
+                    DBSession
+
+                        .query(func.count())
+
+                        .select_from(
+
+                            lexes
+
+                                .with_entities(*key_list)
+                                .filter(tuple_(*key_list) <= tuple_(*cursor))
+                                .order_by(*key_list)
+                                .limit(limit)
+                                .subquery())
+
+                        .scalar())
+
+            remaining = limit - position
+            first = remaining if first is None else min(first, remaining)
+
+            if first <= 0:
+                return [], False, after, count_query
+
+        page_query = (
+            lexes.add_columns(*key_list))
+
+        if cursor is not None:
+
+            page_query = (
+
+                page_query.filter(
+                    tuple_(*key_list) > tuple_(*cursor)))
+
+        page_query = (
+            page_query.order_by(*key_list))
+
+        if first is not None:
+            page_query = page_query.limit(first + 1)
+
+        row_list = page_query.all()
+
+        has_next_page = (
+            first is not None and len(row_list) > first and
+            (limit is None or position + first < limit))
+
+        if first is not None:
+            row_list = row_list[:first]
+
+        end_cursor = (
+            encode_cursor(list(row_list[-1][1:])) if row_list else None)
+
+        return (
+            [row[0] for row in row_list],
+            has_next_page,
+            end_cursor,
+            count_query)
+
+    @fetch_object()
+    def resolve_lexical_entries(self, info, ids=None, mode=None, authors=None, clients=None, start_date=None, end_date=None,
+                             position=1, first=None, after=None, sort_by_field=None, sort_lexgraph=None):
+
+        if self.check_is_hidden_for_client(info):
+            return []
+
+        lexes, publish, accept, delete, limit = (
+            self.lexical_entries_query(info, ids, mode, authors, start_date, end_date))
+
+        # Paginated and / or sorted lexical entries, in the order of their page.
+
+        if (first is not None or
+            after is not None or
+            sort_by_field is not None or
+            sort_lexgraph):
+
+            lexes, _, _, _ = (
+
+                self.lexical_entries_paginate(
+                    lexes,
+                    publish,
+                    accept,
+                    bool(authors or start_date or end_date),
+                    limit,
+                    first,
+                    after,
+                    sort_by_field,
+                    sort_lexgraph))
+
+            return (
+                page_entries_with_entities(lexes, accept, delete, mode, publish))
+
+        if limit is not None:
+            lexes = lexes.limit(limit)
 
         # lexes = lexes \
         #     .order_by(func.min(case(
@@ -800,6 +1168,46 @@ class DictionaryPerspective(LingvodocObjectType):
 
         return lexical_entries
 
+    @fetch_object()
+    def resolve_lexical_entries_page(self, info, ids=None, mode=None, first=None, after=None, sort_by_field=None,
+                                     sort_lexgraph=None):
+
+        if self.check_is_hidden_for_client(info):
+
+            page = LexicalEntriesPage(lexical_entries = [], end_cursor = None, has_next_page = False)
+
+            page.count_query = None
+            page.limit = None
+
+            return page
+
+        lexes, publish, accept, delete, limit = (
+            self.lexical_entries_query(info, ids, mode, None, None, None))
+
+        lexes, has_next_page, end_cursor, count_query = (
+
+            self.lexical_entries_paginate(
+                lexes,
+                publish,
+                accept,
+                False,
+                limit,
+                first,
+                after,
+                sort_by_field,
+                sort_lexgraph))
+
+        page = (
+
+            LexicalEntriesPage(
+                lexical_entries = page_entries_with_entities(lexes, accept, delete, mode, publish),
+                end_cursor = end_cursor,
+                has_next_page = has_next_page))
+
+        page.count_query = count_query
+        page.limit = limit
+
+        return page
 
     @fetch_object()
     def resolve_authors(self, info):
@@ -39,6 +39,7 @@ from lingvodoc.models import (
     LexicalEntry as dbLexicalEntry,
     PublishingEntity as dbPublishingEntity,
     TranslationAtom as dbTranslationAtom,
+    update_eaf_annotations,
     User as dbUser,
     user_to_group_association)
 
@@ -66,7 +67,7 @@ from lingvodoc.schema.gql_holders import (
 
 from lingvodoc.utils.creation import create_entity
 from lingvodoc.utils.deletion import real_delete_entity
-from lingvodoc.utils.elan_functions import eaf_wordlist
+from lingvodoc.utils.elan_functions import eaf_annotation_list, eaf_wordlist
 from lingvodoc.utils.lexgraph_marker import marker_between_arith as marker_between
 from lingvodoc.utils.verification import check_client_id, check_lingvodoc_id
 
@@ -373,6 +374,7 @@ class CreateEntity(graphene.Mutation):
 
         real_location = None
         url = None
+        annotation_list = None
         if data_type == 'image' or data_type == 'sound' or 'markup' in data_type:
             blob = info.context.request.POST.pop("1")
             filename=blob.filename
@@ -407,6 +409,7 @@ class CreateEntity(graphene.Mutation):
             if 'elan' in data_type:
                 bag_of_words = list(eaf_wordlist(content))
                 db_entity.additional_metadata['bag_of_words'] = bag_of_words
+                annotation_list = eaf_annotation_list(content)
         elif data_type == 'link':
             if link_id:
                 db_entity.link_id = link_id
@@ -439,6 +442,11 @@ class CreateEntity(graphene.Mutation):
         DBSession.add(db_entity)
         DBSession.flush()
 
+        # Extracted ELAN annotations for EAF corpora search, when we have the entity's id.
+
+        if annotation_list is not None:
+            update_eaf_annotations(db_entity.id, annotation_list)
+
         return (
 
             CreateEntity(
@@ -12,12 +12,21 @@ from graphene.types import Scalar
 from graphene.types.json import JSONString as JSONtype
 from graphene.types.generic import GenericScalar
 
+import promise
+from promise import Promise
+from promise.dataloader import DataLoader
+
 from sqlalchemy import or_, tuple_
 
 from lingvodoc.models import (
     ObjectTOC,
     DBSession,
     Client as dbClient,
+    Dictionary as dbDictionary,
+    DictionaryPerspective as dbPerspective,
+    Entity as dbEntity,
+    Field as dbField,
+    get_translations_bulk,
     LexicalEntry,
     DictionaryPerspectiveToField,
     TranslationGist as dbTranslationGist,
@@ -533,6 +542,79 @@ def undel_object(
 gql_none_value = object()
 
 
+class ObjectLoader(DataLoader):
+    """
+    Loads DB objects of a type by their client_id/object_id ids, with all ids requested during one
+    execution tick loaded with a single query.
+    """
+
+    def __init__(self, db_type):
+
+        super().__init__()
+        self.db_type = db_type
+
+    def batch_load_fn(self, id_list):
+
+        object_dict = {
+
+            (db_object.client_id, db_object.object_id): db_object
+
+            for db_object in DBSession
+
+                .query(self.db_type)
+
+                .filter(
+                    tuple_(
+                        self.db_type.client_id,
+                        self.db_type.object_id)
+                        .in_(id_list))
+
+                .all()}
+
+        return Promise.resolve(
+            [object_dict.get(object_id) for object_id in id_list])
+
+
+# Objects are batch loaded only if scheduling of promises is thread-local, as it is since promise 2.3, because
+# queries are executed concurrently by server threads, and with a process-global scheduler of earlier versions
+# a thread could resolve promises of another thread's query.
+
+batch_load_flag = (
+    tuple(getattr(promise, 'VERSION', (0,))[:2]) >= (2, 3))
+
+# Types of DB objects loaded through per-request object loaders.
+
+batch_load_type_set = {
+    dbDictionary,
+    dbPerspective,
+    LexicalEntry,
+    dbEntity,
+    dbField,
+    dbTranslationGist}
+
+
+def get_object_loader(context, db_type):
+    """
+    Returns per-request loader of DB objects of the specified type, stored in the query execution context.
+    """
+
+    loader_dict = context.get('object_loader_dict')
+
+    if loader_dict is None:
+
+        loader_dict = {}
+        context['object_loader_dict'] = loader_dict
+
+    loader = loader_dict.get(db_type)
+
+    if loader is None:
+
+        loader = ObjectLoader(db_type)
+        loader_dict[db_type] = loader
+
+    return loader
+
+
 def fetch_object(attrib_name=None, ACLSubject=None, ACLKey=None):
     """
     This magic decorator, which the resolve_* functions have, sets the dbObject atribute
@@ -568,6 +650,33 @@ def fetch_object(attrib_name=None, ACLSubject=None, ACLKey=None):
                 except AttributeError:
                     pass
 
+            def after_fetch():
+                if ACLSubject and '_' in ACLKey:
+                    context.acl_check('view', ACLSubject,
+                                      [getattr(cls.dbObject, ACLKey.replace('_', '_client_')),
+                                       getattr(cls.dbObject, ACLKey.replace('_', '_object_'))])
+                return func(*args, **kwargs)
+
+            # Objects of batch loaded types are loaded by their loaders, so that objects of a list are loaded
+            # with a single query.
+
+            if (batch_load_flag and
+                not cls.dbObject and
+                cls.dbType in batch_load_type_set and
+                isinstance(cls.id, (list, tuple)) and
+                isinstance(context, dict)):
+
+                def loaded(db_object):
+                    if db_object is None:
+                        raise ResponseError(message="%s was not found" % cls.__class__, self_object=cls)
+                    cls.dbObject = db_object
+                    return after_fetch()
+
+                return (
+                    get_object_loader(context, cls.dbType)
+                        .load(tuple(cls.id))
+                        .then(loaded))
+
             if not cls.dbObject:
                 if isinstance(cls.id, (int, str)):
                     # example: (id: 1),  (id: 'ihGLq')
@@ -583,11 +692,7 @@ def fetch_object(attrib_name=None, ACLSubject=None, ACLKey=None):
                     if cls.dbObject is None:
                         #cls.ErrorHappened = True
                         raise ResponseError(message="%s was not found" % cls.__class__, self_object=cls)
-            if ACLSubject and '_' in ACLKey:
-                context.acl_check('view', ACLSubject,
-                                  [getattr(cls.dbObject, ACLKey.replace('_', '_client_')),
-                                   getattr(cls.dbObject, ACLKey.replace('_', '_object_'))])
-            return func(*args, **kwargs)
+            return after_fetch()
 
         return wrapper
 
@@ -818,6 +923,90 @@ class TypeHolder(graphene.Interface):
         return self.dbObject.type
 
 
+def translation_requested(info, field_name_list = ()):
+    """
+    Checks if translations of objects of a list field, or of its subfield specified by a list of field
+    names, could be requested, i.e. if the selection set includes 'translation' field or any fragments.
+    """
+
+    field_ast_list = info.field_asts
+
+    for field_name in list(field_name_list) + [None]:
+
+        selection_list = []
+
+        for field_ast in field_ast_list:
+
+            if field_ast.selection_set is not None:
+                selection_list.extend(field_ast.selection_set.selections)
+
+        if any(not isinstance(selection, ast.Field) for selection in selection_list):
+            return True
+
+        field_ast_list = [
+            selection for selection in selection_list
+            if selection.name.value == (field_name or 'translation')]
+
+        if not field_ast_list:
+            return False
+
+    return True
+
+
+def field_requested(info, field_name_set, depth = 1):
+    """
+    Checks if any of specified fields could be requested at the specified depth of the selection set of a
+    field, e.g. in subfields of objects of a list field with depth 1, i.e. if the selection sets down to that
+    depth include any of these fields or any fragments.
+    """
+
+    field_ast_list = info.field_asts
+
+    for i in range(depth):
+
+        selection_list = []
+
+        for field_ast in field_ast_list:
+
+            if field_ast.selection_set is not None:
+                selection_list.extend(field_ast.selection_set.selections)
+
+        if any(not isinstance(selection, ast.Field) for selection in selection_list):
+            return True
+
+        field_ast_list = selection_list
+
+    return any(
+        field_ast.name.value in field_name_set
+        for field_ast in field_ast_list)
+
+
+def prefetch_translations(gql_object_list, locale_id):
+    """
+    Gets translations of a list of objects in bulk, see get_translations_bulk(), for use by
+    TranslationHolder.resolve_translation() instead of getting them one by one.
+
+    Objects must have their DB objects with translation gist ids already set.
+    """
+
+    gql_object_list = [
+        gql_object for gql_object in gql_object_list
+        if getattr(gql_object, 'translation', None) is None]
+
+    translation_dict = (
+
+        get_translations_bulk(
+            [gql_object.dbObject.translation_gist_id
+                for gql_object in gql_object_list],
+            locale_id))
+
+    for gql_object in gql_object_list:
+
+        gql_object.translation_prefetch = (
+            locale_id,
+            translation_dict[tuple(gql_object.dbObject.translation_gist_id)])
+
+
 class TranslationHolder(graphene.Interface):
 
     translation = graphene.String(locale_id=graphene.Int())
@@ -826,9 +1015,19 @@ class TranslationHolder(graphene.Interface):
     @fetch_object("translation")
     def resolve_translation(self, info, locale_id = None):
 
+        if locale_id is None:
+            locale_id = info.context.get('locale_id')
+
+        # Translation could have been already got in bulk, see prefetch_translations().
+
+        prefetch = getattr(self, 'translation_prefetch', None)
+
+        if prefetch is not None and prefetch[0] == locale_id:
+            return prefetch[1]
+
         return (
             self.dbObject.get_translation( # TODO: fix it
-                locale_id if locale_id is not None else info.context.get('locale_id')))
+                locale_id))
 
     @fetch_object("translations")
     def resolve_translations(self, info):
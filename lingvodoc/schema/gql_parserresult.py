@@ -70,7 +70,7 @@ from lingvodoc.models import (
     ValencySentenceData as dbValencySentenceData,
     ValencySourceData as dbValencySourceData)
 
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, HEAVY_QUEUE
 
 from lingvodoc.schema.gql_entity import is_subject_for_parsing
 
@@ -522,7 +522,7 @@ class UpdateParserResult(graphene.Mutation):
         return UpdateParserResult(triumph=True)
 
 
-@celery.task
+@celery.task(queue = HEAVY_QUEUE)
 def async_valency_compute(
     perspective_id,
     debug_flag,
@@ -50,10 +50,12 @@ from lingvodoc.models import (
     Client,
     Dictionary as dbDictionary,
     DictionaryPerspective as dbPerspective,
+    EafAnnotation as dbEafAnnotation,
     Language as dbLanguage,
     LexicalEntry as dbLexicalEntry,
     Entity as dbEntity,
     PublishingEntity as dbPublishingEntity,
+    SearchToken as dbSearchToken,
     User as dbUser,
     BaseGroup as dbBaseGroup,
     Group as dbGroup,
@@ -74,6 +76,7 @@ from lingvodoc.schema.gql_dictionaryperspective import (
 )
 
 from lingvodoc.schema.gql_lexicalentry import LexicalEntry
+from lingvodoc.schema.gql_parserresult import diacritic_xform
 from lingvodoc.scripts.save_dictionary import Save_Context
 
 from lingvodoc.utils.search import (
@@ -89,6 +92,8 @@ from lingvodoc.utils import (
     ids_to_id_cte_query,
 )
 
+import lingvodoc.utils.search_cache as search_cache
+
 from lingvodoc.views.v2.utils import (
     storage_file,
     as_storage_file
@@ -139,6 +144,80 @@ def add_as_like(elem):
     query = '%' + elem.replace('"', '').replace('@', '%').replace('?', '_') + '%'
     return query
 
+def xform_pattern(pattern_str, diacritics):
+    """
+    Returns LIKE or regular expression pattern for case-insensitive matching against diacritic_xform() or
+    lower() of entity content.
+
+    Diacritics are removed here and not in the query, and the pattern is matched case-insensitively instead of
+    being lowercased, so that PostgreSQL gets a plain constant to extract trigrams from for trigram GIN
+    indexes on diacritic_xform(content) and lower(content), and regular expression escapes like '\\W' or
+    '\\S' are not lowercased into their opposites.
+    """
+
+    if diacritics == 'ignore':
+        return diacritic_xform(pattern_str)
+
+    return pattern_str
+
+
+def content_substring_condition(
+    entity,
+    xform_func,
+    pattern_str,
+    field_id = None):
+    """
+    Returns condition of a case-insensitive match of diacritic_xform() or lower() of entity content with a
+    substring pattern, see xform_pattern().
+
+    If search tokens are enabled and the pattern is '%<substring>%' without whitespace and wildcards, the
+    content matches if and only if one of its tokens does, so the match is checked through indexed search
+    tokens, optionally of a single field, see models.SearchToken.
+    """
+
+    substring_str = pattern_str[1:-1]
+
+    if (not models.SEARCH_TOKEN_INDEX or
+        len(pattern_str) < 3 or
+        pattern_str[0] != '%' or
+        pattern_str[-1] != '%' or
+        any(
+            c.isspace() or c in '%_\\'
+            for c in substring_str)):
+
+        return (
+            xform_func(entity.content)
+                .ilike(pattern_str))
+
+    token_query = (
+
+        DBSession
+
+            .query(
+                dbSearchToken.entity_client_id,
+                dbSearchToken.entity_object_id)
+
+            .filter(
+                xform_func(dbSearchToken.token)
+                    .ilike(pattern_str)))
+
+    if field_id:
+
+        token_query = (
+
+            token_query.filter(
+                dbSearchToken.field_client_id == field_id[0],
+                dbSearchToken.field_object_id == field_id[1]))
+
+    return (
+
+        tuple_(
+            entity.client_id,
+            entity.object_id)
+
+            .in_(token_query))
+
+
 def boolean_search(test_string,  exclude_char = '-'):
     regex = '(-?"[^\n\r]+?"|[^\s\n\r]+)'
     and_blocks_strings = test_string.split(" | ")
@@ -181,9 +260,13 @@ def save_xlsx_data(
     xlsx_context,
     dictionary_list,
     perspective_list,
-    lexical_entry_list):
+    lexical_entry_id_list,
+    chunk_size = 1024):
     """
     Exports search results to as Xlsx data.
+
+    Lexical entries are loaded by their ids perspective by perspective in chunks ordered by id, so that only
+    a chunk of entries is processed at any time.
     """
 
     # Ordering perspectives in the same way as dictionaries later, by creation time descending.
@@ -194,17 +277,84 @@ def save_xlsx_data(
         reverse = True)
 
     perspective_dict = collections.defaultdict(list)
-    lexical_entry_dict = collections.defaultdict(list)
 
     for perspective in perspective_list:
 
         parent = perspective.parent
         perspective_dict[(parent.client_id, parent.object_id)].append(perspective)
 
-    for lexical_entry in lexical_entry_list:
+    # Temporary table with ids of found lexical entries, for getting them in chunks.
+
+    entry_id_table = (
+
+        sqlalchemy.Table(
+            'entry_' + str(uuid.uuid4()).replace('-', '_'),
+            sqlalchemy.MetaData(),
+            sqlalchemy.Column('client_id', SLBigInteger, primary_key = True),
+            sqlalchemy.Column('object_id', SLBigInteger, primary_key = True),
+            prefixes = ['temporary'],
+            postgresql_on_commit = 'drop'))
+
+    entry_id_table.create(
+        DBSession.connection())
+
+    if lexical_entry_id_list:
+
+        DBSession.execute(
+
+            entry_id_table
+
+                .insert()
+
+                .from_select(
+                    (entry_id_table.c.client_id, entry_id_table.c.object_id),
+                    ids_to_id_query(lexical_entry_id_list).distinct()))
+
+    def entry_chunks(perspective):
+        """
+        Gets found lexical entries of a perspective in chunks, using keyset pagination.
+        """
+
+        last_id = None
+
+        while True:
+
+            entry_query = (
+
+                DBSession
+
+                    .query(dbLexicalEntry)
+
+                    .filter(
+                        dbLexicalEntry.parent_client_id == perspective.client_id,
+                        dbLexicalEntry.parent_object_id == perspective.object_id,
+                        dbLexicalEntry.client_id == entry_id_table.c.client_id,
+                        dbLexicalEntry.object_id == entry_id_table.c.object_id))
+
+            if last_id is not None:
+
+                entry_query = (
 
-        parent = lexical_entry.parent
-        lexical_entry_dict[(parent.client_id, parent.object_id)].append(lexical_entry)
+                    entry_query.filter(
+                        tuple_(dbLexicalEntry.client_id, dbLexicalEntry.object_id) > last_id))
+
+            entry_list = (
+
+                entry_query
+
+                    .order_by(
+                        dbLexicalEntry.client_id,
+                        dbLexicalEntry.object_id)
+
+                    .limit(chunk_size)
+                    .all())
+
+            if not entry_list:
+                return
+
+            yield entry_list
+
+            last_id = entry_list[-1].id
 
     # Dictionary and language info.
 
@@ -385,11 +535,12 @@ def save_xlsx_data(
                     worksheet_flag = False,
                     list_flag = True)
 
-                for lexical_entry in lexical_entry_dict[
-                    (perspective.client_id, perspective.object_id)]:
+                for entry_list in entry_chunks(perspective):
+
+                    for lexical_entry in entry_list:
 
-                    xlsx_context.save_lexical_entry(
-                        lexical_entry, published = True, accepted = True)()
+                        xlsx_context.save_lexical_entry(
+                            lexical_entry, published = True, accepted = True)()
 
 
 def get_text_field_cte(session):
@@ -529,6 +680,7 @@ def search_mechanism(
     diacritics,
     category_field_cte_query,
     load_entities = True,
+    cache_key = None,
     __debug_flag__ = False):
 
     """
@@ -712,12 +864,15 @@ def search_mechanism(
                     for ss in chain.from_iterable(curr_bs_search_blocks):
 
                         xform_ss = xform_func(ss['search_string'])
+                        pattern_ss = xform_pattern(ss['search_string'], diacritics)
 
                         if ss.get('matching_type') == 'substring':
 
                             all_entity_content_filter.append(
-                                xform_func(dbEntity.content)
-                                    .like(xform_ss))
+                                content_substring_condition(
+                                    dbEntity,
+                                    xform_func,
+                                    pattern_ss))
 
                         elif ss.get('matching_type') == 'full_string':
 
@@ -729,7 +884,7 @@ def search_mechanism(
 
                             all_entity_content_filter.append(
                                 xform_func(dbEntity.content)
-                                    .op('~*')(xform_ss))
+                                    .op('~*')(pattern_ss))
 
                 elif search_string.get('matching_type') == 'full_string':
 
@@ -741,7 +896,7 @@ def search_mechanism(
 
                     all_entity_content_filter.append(
                         xform_func(dbEntity.content)
-                            .op('~*')(xform_func(search_value)))
+                            .op('~*')(xform_pattern(search_value, diacritics)))
 
     elif category == 1:
 
@@ -764,12 +919,13 @@ def search_mechanism(
                     for ss in chain.from_iterable(curr_bs_search_blocks):
 
                         xform_ss = xform_func(ss['search_string'])
+                        pattern_ss = xform_pattern(ss['search_string'], diacritics)
 
                         if ss.get('matching_type') == 'substring':
 
                             all_entity_content_filter.append(
                                 xform_func(dbEntity.additional_metadata['bag_of_words'].astext)
-                                    .like(xform_ss))
+                                    .ilike(pattern_ss))
 
                         elif ss.get('matching_type') == 'full_string':
 
@@ -781,7 +937,7 @@ def search_mechanism(
 
                             all_entity_content_filter.append(
                                 xform_func(dbEntity.additional_metadata['bag_of_words'].astext)
-                                    .op('~*')(xform_ss))
+                                    .op('~*')(pattern_ss))
 
                 elif search_string.get('matching_type') == 'full_string':
 
@@ -793,7 +949,7 @@ def search_mechanism(
 
                     all_entity_content_filter.append(
                         xform_func(dbEntity.additional_metadata['bag_of_words'].astext)
-                            .op('~*')(xform_func(search_value)))
+                            .op('~*')(xform_pattern(search_value, diacritics)))
 
     if fields_flag and category == 0:
 
@@ -913,12 +1069,13 @@ def search_mechanism(
                     for ss in chain.from_iterable(curr_bs_search_blocks):
 
                         xform_ss = xform_func(ss['search_string'])
+                        pattern_ss = xform_pattern(ss['search_string'], diacritics)
 
                         if ss.get('matching_type') == 'substring':
 
                             inner_and.append(
                                 xform_func(cur_dbEntity.additional_metadata['bag_of_words'].astext)
-                                    .like(xform_ss))
+                                    .ilike(pattern_ss))
 
                         elif ss.get('matching_type') == 'full_string':
 
@@ -930,13 +1087,13 @@ def search_mechanism(
 
                             inner_and.append(
                                 xform_func(cur_dbEntity.additional_metadata['bag_of_words'].astext)
-                                    .op('~*')(xform_ss))
+                                    .op('~*')(pattern_ss))
 
                 elif matching_type == 'regexp':
 
                     inner_and.append(
                         xform_func(cur_dbEntity.additional_metadata['bag_of_words'].astext)
-                            .op('~*')(xform_func(search_value)))
+                            .op('~*')(xform_pattern(search_value, diacritics)))
 
             else:
 
@@ -960,12 +1117,13 @@ def search_mechanism(
                         for ss in bs_or_block:
 
                             xform_ss = xform_func(ss['search_string'])
+                            pattern_ss = xform_pattern(ss['search_string'], diacritics)
 
                             if ss.get('matching_type') == 'substring':
 
                                 bs_and.append(
                                     xform_func(cur_dbEntity.content)
-                                        .like(xform_ss))
+                                        .ilike(pattern_ss))
 
                             elif ss.get('matching_type') == 'full_string':
 
@@ -977,7 +1135,7 @@ def search_mechanism(
 
                                 bs_and.append(
                                     xform_func(cur_dbEntity.content)
-                                        .op('~*')(xform_ss))
+                                        .op('~*')(pattern_ss))
 
                             elif ss.get('matching_type') == 'exclude':
 
@@ -993,7 +1151,7 @@ def search_mechanism(
 
                     inner_and.append(
                         xform_func(cur_dbEntity.content)
-                            .op('~*')(xform_func(search_value)))
+                            .op('~*')(xform_pattern(search_value, diacritics)))
 
             and_lexes_query = (
 
@@ -1019,11 +1177,22 @@ def search_mechanism(
 
         full_or_block.append(and_lexes_sum_query)
 
-    # Searching for and getting lexical entries.
+    # Searching for and getting lexical entries, or getting them by cached ids of search results.
 
     resolved_search = None
 
-    if full_or_block:
+    entry_id_list = (
+        search_cache.get_entry_id_list(cache_key))
+
+    if entry_id_list is not None:
+
+        log.info(
+            f'\n {len(entry_id_list)} cached search results')
+
+        resolved_search = (
+            search_cache.get_entry_list(entry_id_list))
+
+    elif full_or_block:
 
         entry_id_query = (
             full_or_block[0])
@@ -1057,6 +1226,10 @@ def search_mechanism(
 
         resolved_search = entry_query.all()
 
+        search_cache.set_entry_id_list(
+            cache_key,
+            [lexical_entry.id for lexical_entry in resolved_search])
+
     if not resolved_search:
 
         # Saving search results data, if required.
@@ -1130,7 +1303,8 @@ def search_mechanism_simple(
     adopted,
     etymology,
     diacritics,
-    category_field_cte_query):
+    category_field_cte_query,
+    cache_key = None):
 
     # Empty list of AND conditions means no results.
 
@@ -1262,13 +1436,13 @@ def search_mechanism_simple(
 
                     inner_and.append(
                         xform_func(cur_dbEntity.additional_metadata['bag_of_words'].astext)
-                            .like(xform_func('%' + search_value + '%')))
+                            .ilike(xform_pattern('%' + search_value + '%', diacritics)))
 
                 elif matching_type == 'regexp':
 
                     inner_and.append(
                         xform_func(cur_dbEntity.additional_metadata['bag_of_words'].astext)
-                            .op('~*')(search_value))
+                            .op('~*')(xform_pattern(search_value, diacritics)))
 
             else:
 
@@ -1281,14 +1455,17 @@ def search_mechanism_simple(
                 elif matching_type == 'substring':
 
                     inner_and.append(
-                        xform_func(cur_dbEntity.content)
-                            .like(xform_func('%' + search_value + '%')))
+                        content_substring_condition(
+                            cur_dbEntity,
+                            xform_func,
+                            xform_pattern('%' + search_value + '%', diacritics),
+                            search_string.get('field_id')))
 
                 elif matching_type == 'regexp':
 
                     inner_and.append(
                         xform_func(cur_dbEntity.content)
-                            .op('~*')(xform_func(search_value)))
+                            .op('~*')(xform_pattern(search_value, diacritics)))
 
             or_block.append(and_(*inner_and))
 
@@ -1299,13 +1476,32 @@ def search_mechanism_simple(
         lexes.filter(
             and_(*and_block)))
 
-    # Showing overall entry query.
+    # Getting lexical entries by cached ids of search results, if we have them.
+
+    entry_id_list = (
+        search_cache.get_entry_id_list(cache_key))
 
-    log.info(
-        '\n entry_query:\n ' +
-        str(entry_query.statement.compile(compile_kwargs = {"literal_binds": True})))
+    if entry_id_list is not None:
 
-    resolved_search = entry_query.all()
+        log.info(
+            f'\n {len(entry_id_list)} cached search results')
+
+        resolved_search = (
+            search_cache.get_entry_list(entry_id_list))
+
+    else:
+
+        # Showing overall entry query.
+
+        log.info(
+            '\n entry_query:\n ' +
+            str(entry_query.statement.compile(compile_kwargs = {"literal_binds": True})))
+
+        resolved_search = entry_query.all()
+
+        search_cache.set_entry_id_list(
+            cache_key,
+            [lexical_entry.id for lexical_entry in resolved_search])
 
     if not resolved_search:
 
@@ -1355,9 +1551,10 @@ def dictionaries_with_audio_id_cte():
             .cte())
 
 
-def save_xlsx(info, xlsx_context, xlsx_filename):
-
-    xlsx_context.workbook.close()
+def xlsx_storage_path(info, xlsx_filename):
+    """
+    Returns storage path and URL of a new XLSX file with exported search results.
+    """
 
     storage = info.context.request.registry.settings['storage']
     time_str = '{0:.6f}'.format(time.time())
@@ -1374,18 +1571,76 @@ def save_xlsx(info, xlsx_context, xlsx_filename):
     xlsx_path = os.path.join(
         storage_dir, xlsx_filename)
 
-    with open(xlsx_path, 'wb') as xlsx_file:
-
-        xlsx_context.stream.seek(0)
-        shutil.copyfileobj(xlsx_context.stream, xlsx_file)
-
-    return ''.join([
+    xlsx_url = ''.join([
         storage['prefix'],
         storage['static_route'],
         'map_search', '/',
         time_str, '/',
         xlsx_filename])
 
+    return xlsx_path, xlsx_url
+
+
+def export_xlsx(
+    info,
+    xlsx_path,
+    cognates_flag,
+    dictionary_list,
+    perspective_list,
+    lexical_entry_list,
+    __debug_flag__ = False):
+    """
+    Exports search results to an XLSX file at the specified storage path.
+
+    If the export fails, the workbook is still closed, which removes its temporary files, and the partially
+    written file and its storage directory are removed.
+    """
+
+    xlsx_context = None
+
+    try:
+
+        xlsx_context = (
+
+            Save_Context(
+                info.context.get('locale_id'),
+                DBSession,
+                cognates_flag = cognates_flag,
+                __debug_flag__ = __debug_flag__,
+                xlsx_path = xlsx_path))
+
+        save_xlsx_data(
+            xlsx_context,
+            [dictionary.dbObject for dictionary in dictionary_list],
+            [perspective.dbObject for perspective in perspective_list],
+            [lexical_entry.dbObject.id for lexical_entry in lexical_entry_list])
+
+        xlsx_context.workbook.close()
+
+    except:
+
+        if (xlsx_context is not None and
+            not getattr(xlsx_context.workbook, 'fileclosed', False)):
+
+            try:
+                xlsx_context.workbook.close()
+
+            except Exception as exception:
+                log.warning('failed to close XLSX workbook: {0}'.format(exception))
+
+        if os.path.exists(xlsx_path):
+            os.remove(xlsx_path)
+
+        # Removing storage directory of the file, if it's empty.
+
+        try:
+            os.rmdir(os.path.dirname(xlsx_path))
+
+        except OSError:
+            pass
+
+        raise
+
 
 regexp_check_set = {'', '.*', '.+', '.', '..*', '.*.', '..+', '.+.', '..', '...', '....'}
 
@@ -1779,22 +2034,29 @@ class AdvancedSearch(LingvodocObjectType):
                         perspectives = gql_perspective_list,
                         dictionaries = gql_dictionary_list))
 
+            # Search results are cached by search arguments and state of perspectives we look through.
+
+            cache_key = (
+
+                search_cache.search_cache_key(
+                    'advanced_search',
+                    {
+                        'languages': languages,
+                        'dicts_to_filter': dicts_to_filter,
+                        'tag_list': tag_list,
+                        'adopted': adopted,
+                        'etymology': etymology,
+                        'diacritics': diacritics,
+                        'search_strings': search_strings,
+                        'publish': publish,
+                        'accept': accept,
+                        'search_metadata': search_metadata},
+                    dictionaries))
+
             res_lexical_entries = list()
             res_perspectives = list()
             res_dictionaries = list()
 
-            # Setting up export to an XLSX file, if required.
-
-            xlsx_context = (
-
-                None if not xlsx_export else
-
-                Save_Context(
-                    info.context.get('locale_id'),
-                    DBSession,
-                    cognates_flag = cognates_flag,
-                    __debug_flag__ = __debug_flag__))
-
             # Normal dictionaries.
 
             if category != 1:
@@ -1812,6 +2074,7 @@ class AdvancedSearch(LingvodocObjectType):
                         diacritics = diacritics,
                         category_field_cte_query = DBSession.query(get_text_field_cte(DBSession)),
                         load_entities = load_entities,
+                        cache_key = cache_key and cache_key + ':0',
                         __debug_flag__ = __debug_flag__))
 
             # Corpora.
@@ -1831,41 +2094,22 @@ class AdvancedSearch(LingvodocObjectType):
                         diacritics = diacritics,
                         category_field_cte_query = DBSession.query(get_markup_field_cte(DBSession)),
                         load_entities = load_entities,
+                        cache_key = cache_key and cache_key + ':1',
                         __debug_flag__ = __debug_flag__))
 
                 res_lexical_entries += tmp_lexical_entries
                 res_perspectives += tmp_perspectives
                 res_dictionaries += tmp_dictionaries
 
-            # Exporting search results as an XLSX data, if required.
-
-            if xlsx_context is not None:
+            # Exporting search results to an XLSX file written straight to the storage, if required.
 
-                if __debug_flag__:
-
-                    start_time = time.time()
+            xlsx_url = None
 
-                save_xlsx_data(
-                    xlsx_context,
-                    [dictionary.dbObject for dictionary in res_dictionaries],
-                    [perspective.dbObject for perspective in res_perspectives],
-                    [lexical_entry.dbObject for lexical_entry in res_lexical_entries])
+            if xlsx_export:
 
                 if __debug_flag__:
 
-                    elapsed_time = time.time() - start_time
-                    resident_memory = utils.get_resident_memory()
-
-                    log.debug(
-                        '\nelapsed_time, resident_memory: {0:.3f}s, {1:.3f}m'.format(
-                        elapsed_time,
-                        resident_memory / 1048576.0))
-
-            # Saving XLSX-exported search results, if required.
-
-            xlsx_url = None
-            
-            if xlsx_export:
+                    start_time = time.time()
 
                 query_str = (
 
@@ -1879,19 +2123,31 @@ class AdvancedSearch(LingvodocObjectType):
                     pathvalidate.sanitize_filename(
                         'Search_' + query_str)[:64] + '.xlsx')
 
-                xlsx_url = (
-
-                    save_xlsx(
-                        info, xlsx_context, xlsx_filename))
+                xlsx_path, xlsx_url = (
+                    xlsx_storage_path(info, xlsx_filename))
 
-                # Saving resulting Excel workbook for debug purposes, if required.
+                export_xlsx(
+                    info,
+                    xlsx_path,
+                    cognates_flag,
+                    res_dictionaries,
+                    res_perspectives,
+                    res_lexical_entries,
+                    __debug_flag__)
 
                 if __debug_flag__:
 
-                    xlsx_context.stream.seek(0)
+                    elapsed_time = time.time() - start_time
+                    resident_memory = utils.get_resident_memory()
+
+                    log.debug(
+                        '\nelapsed_time, resident_memory: {0:.3f}s, {1:.3f}m'.format(
+                        elapsed_time,
+                        resident_memory / 1048576.0))
+
+                    # Saving resulting Excel workbook for debug purposes.
 
-                    with open(xlsx_filename, 'wb') as xlsx_file:
-                        shutil.copyfileobj(xlsx_context.stream, xlsx_file)
+                    shutil.copyfile(xlsx_path, xlsx_filename)
 
             return (
 
@@ -2079,21 +2335,27 @@ class AdvancedSearchSimple(LingvodocObjectType):
                     dictionaries.filter(
                         dbDictionary.additional_metadata["tag_list"].contains(tag_list)))
 
-            res_lexical_entries = list()
-            res_perspectives = list()
-            res_dictionaries = list()
+            # Search results are cached by search arguments and state of perspectives we look through.
 
-            # Setting up export to an XLSX file, if required.
+            cache_key = (
 
-            xlsx_context = (
+                search_cache.search_cache_key(
+                    'advanced_search_simple',
+                    {
+                        'languages': languages,
+                        'dicts_to_filter': dicts_to_filter,
+                        'tag_list': tag_list,
+                        'adopted': adopted,
+                        'etymology': etymology,
+                        'diacritics': diacritics,
+                        'search_strings': search_strings,
+                        'publish': publish,
+                        'accept': accept},
+                    dictionaries))
 
-                None if not xlsx_export else
-
-                Save_Context(
-                    info.context.get('locale_id'),
-                    DBSession,
-                    cognates_flag = cognates_flag,
-                    __debug_flag__ = __debug_flag__))
+            res_lexical_entries = list()
+            res_perspectives = list()
+            res_dictionaries = list()
 
             # Normal dictionaries.
 
@@ -2110,7 +2372,8 @@ class AdvancedSearchSimple(LingvodocObjectType):
                         adopted = adopted,
                         etymology = etymology,
                         diacritics = diacritics,
-                        category_field_cte_query = DBSession.query(get_text_field_cte(DBSession))))
+                        category_field_cte_query = DBSession.query(get_text_field_cte(DBSession)),
+                        cache_key = cache_key and cache_key + ':0'))
 
             # Corpora.
 
@@ -2127,26 +2390,17 @@ class AdvancedSearchSimple(LingvodocObjectType):
                         adopted = adopted,
                         etymology = etymology,
                         diacritics = diacritics,
-                        category_field_cte_query = DBSession.query(get_markup_field_cte(DBSession))))
+                        category_field_cte_query = DBSession.query(get_markup_field_cte(DBSession)),
+                        cache_key = cache_key and cache_key + ':1'))
 
                 res_lexical_entries += tmp_lexical_entries
                 res_perspectives += tmp_perspectives
                 res_dictionaries += tmp_dictionaries
 
-            # Exporting search results as an XLSX data, if required.
-
-            if xlsx_context is not None:
-
-                save_xlsx_data(
-                    xlsx_context,
-                    [dictionary.dbObject for dictionary in res_dictionaries],
-                    [perspective.dbObject for perspective in res_perspectives],
-                    [lexical_entry.dbObject for lexical_entry in res_lexical_entries])
-
-            # Saving XLSX-exported search results, if required.
+            # Exporting search results to an XLSX file written straight to the storage, if required.
 
             xlsx_url = None
-            
+
             if xlsx_export:
 
                 query_str = '_'.join([
@@ -2156,17 +2410,22 @@ class AdvancedSearchSimple(LingvodocObjectType):
 
                 xlsx_filename = ('Search_' + query_str)[:64] + '.xlsx'
 
-                xlsx_url = save_xlsx(
-                    info, xlsx_context, xlsx_filename)
+                xlsx_path, xlsx_url = (
+                    xlsx_storage_path(info, xlsx_filename))
+
+                export_xlsx(
+                    info,
+                    xlsx_path,
+                    cognates_flag,
+                    res_dictionaries,
+                    res_perspectives,
+                    res_lexical_entries,
+                    __debug_flag__)
 
                 # Saving resulting Excel workbook for debug purposes, if required.
 
                 if __debug_flag__:
-
-                    xlsx_context.stream.seek(0)
-
-                    with open(xlsx_filename, 'wb') as xlsx_file:
-                        shutil.copyfileobj(xlsx_context.stream, xlsx_file)
+                    shutil.copyfile(xlsx_path, xlsx_filename)
 
             return (
 
@@ -2193,6 +2452,46 @@ class AdvancedSearchSimple(LingvodocObjectType):
                     'Exception:\n' + traceback_string))
 
 
+# Keys of EAF search query nodes which mark matches other than plain substring ones, e.g. negated or
+# regular expression ones.
+eaf_query_exclude_key_list = ['not', 'negate', 'negation', 'exclude', 'regex', 'regexp']
+
+
+def eaf_query_substring_list(query_dict):
+    """
+    Returns list of search strings of an EAF search query if all its nodes are known to be plain substring
+    matches, so that any matching file has annotation text or tier name containing one of the strings,
+    otherwise returns None.
+    """
+
+    if (not isinstance(query_dict, dict) or
+        query_dict.get('matching_type', 'substring') != 'substring' or
+        any(query_dict.get(key) for key in eaf_query_exclude_key_list)):
+
+        return None
+
+    value = query_dict.get('value')
+
+    if isinstance(value, str):
+        return [value]
+
+    if not isinstance(value, list) or not value:
+        return None
+
+    substring_list = []
+
+    for child_dict in value:
+
+        child_list = eaf_query_substring_list(child_dict)
+
+        if child_list is None:
+            return None
+
+        substring_list.extend(child_list)
+
+    return substring_list
+
+
 class EafSearch(LingvodocObjectType):
 
     result_list = graphene.List(ObjectVal)
@@ -2314,6 +2613,67 @@ class EafSearch(LingvodocObjectType):
                 dbLexicalEntry.parent_object_id == dbPerspective.object_id,
                 dbPerspective.marked_for_deletion == False)
 
+        # If we have extracted annotations and the query consists only of plain substring matches, we skip
+        # files which can't match, i.e. files where no annotation text or tier name contains any of the
+        # query's search strings.
+        #
+        # Files without extracted annotations, e.g. files not yet backfilled or files which could not be
+        # parsed, are still searched.
+
+        substring_list = (
+            eaf_query_substring_list(search_query))
+
+        if models.EAF_ANNOTATION_INDEX and substring_list:
+
+            condition_list = []
+
+            for substring in set(substring_list):
+
+                # Escaping LIKE wildcards explicitly, as our SQLAlchemy version does not support
+                # autoescape.
+
+                pattern_str = '%{0}%'.format(
+                    substring.lower()
+                        .replace('\\', '\\\\')
+                        .replace('%', '\\%')
+                        .replace('_', '\\_'))
+
+                condition_list.extend([
+                    func.lower(dbEafAnnotation.content).like(pattern_str, escape = '\\'),
+                    func.lower(dbEafAnnotation.tier).like(pattern_str, escape = '\\')])
+
+            annotation_query = (
+
+                DBSession
+
+                    .query(literal(1))
+
+                    .filter(
+                        dbEafAnnotation.entity_client_id == dbEntity.client_id,
+                        dbEafAnnotation.entity_object_id == dbEntity.object_id,
+                        or_(*condition_list))
+
+                    .exists())
+
+            any_annotation_query = (
+
+                DBSession
+
+                    .query(literal(1))
+
+                    .filter(
+                        dbEafAnnotation.entity_client_id == dbEntity.client_id,
+                        dbEafAnnotation.entity_object_id == dbEntity.object_id)
+
+                    .exists())
+
+            eaf_query = (
+
+                eaf_query.filter(
+                    or_(
+                        annotation_query,
+                        ~any_annotation_query)))
+
         eaf_count = eaf_query.count()
 
         # Processing EAF corpora.
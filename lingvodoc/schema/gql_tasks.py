@@ -39,6 +39,11 @@ class Task(LingvodocObjectType):
     total_stages = graphene.Int()
     current_stage = graphene.Int()
     user_id = graphene.Int()
+    created_at = graphene.Float()
+
+    # Resource usage of a finished task: wall_time, cpu_time, sql_time in seconds, process_max_rss, peak RSS
+    # of the process which ran the task, in KiB, sql_count, redis_count and size, if reported by the task.
+    metrics = ObjectVal()
 
     def resolve_user_id(self, info):
         return int(self.user_id)
@@ -122,7 +122,7 @@ from lingvodoc.models import (
     ValencySentenceData as dbValencySentenceData,
     ValencySourceData as dbValencySourceData)
 
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, HEAVY_QUEUE
 
 from lingvodoc.schema.gql_basegroup import (
     AddUserToBasegroup,
@@ -199,12 +199,15 @@ from lingvodoc.schema.gql_holders import (
     client_id_check,
     CreatedAt,
     del_object,
+    field_requested,
     get_published_translation_gist_id_cte_query,
     gql_none_value,
     LingvodocID,
     ObjectVal,
     PermissionException,
+    prefetch_translations,
     ResponseError,
+    translation_requested,
     UnstructuredData,
     Upload)
 
@@ -330,6 +333,11 @@ from lingvodoc.utils.search import (
     get_id_to_field_dict,
     translation_gist_search)
 
+from lingvodoc.utils.task_registry import (
+    find_task,
+    register_task,
+    task_fingerprint)
+
 import lingvodoc.version
 
 from lingvodoc.views.v2.phonology import (
@@ -349,6 +357,13 @@ from lingvodoc.views.v2.utils import (
 log = logging.getLogger(__name__)
 
 
+# Fields of perspectives whose resolvers check permissions to view lexical entries.
+
+perspective_entry_field_set = {
+    'lexical_entries',
+    'lexical_entries_page'}
+
+
 class TierList(graphene.ObjectType):
     tier_count = graphene.Field(ObjectVal)
     total_count = graphene.Int()
@@ -695,6 +710,13 @@ class Query(graphene.ObjectType):
             gql_language_list = (
                 resolver.run())
 
+            # Getting in bulk any language translations not already got by the resolver.
+
+            if translation_requested(info, ['languages']):
+
+                prefetch_translations(
+                    gql_language_list, info.context.get('locale_id'))
+
             from_to_dict = (
                 resolver.from_to_dict)
 
@@ -1830,6 +1852,17 @@ class Query(graphene.ObjectType):
             perspective.dbObject = dbperspective
             perspective.list_name='publish'
             publish.append(perspective)
+
+        # Checking permissions to view lexical entries of listed perspectives at once, so that perspective
+        # subresolvers get them from the cache, if lexical entries are requested.
+
+        if field_requested(info, perspective_entry_field_set, 2):
+
+            info.context.acl_check_many(
+                'view',
+                'lexical_entries_and_entities',
+                [perspective.id for perspective in limited + view + edit + publish])
+
         return Permissions(limited=limited, view=view, edit=edit, publish=publish)
 
 
@@ -2170,6 +2203,12 @@ class Query(graphene.ObjectType):
             gql_dict = Dictionary(id=[dbdict.client_id, dbdict.object_id])
             gql_dict.dbObject = dbdict
             dictionaries_list.append(gql_dict)
+
+        if translation_requested(info):
+
+            prefetch_translations(
+                dictionaries_list, info.context.get('locale_id'))
+
         return dictionaries_list
 
     def resolve_dictionary(self, info, id):
@@ -2369,6 +2408,16 @@ class Query(graphene.ObjectType):
             gql_persp.dbObject = db_persp
             perspectives_list.append(gql_persp)
 
+        # Checking permissions to view lexical entries of perspectives at once, so that perspective
+        # subresolvers get them from the cache, if lexical entries are requested.
+
+        if field_requested(info, perspective_entry_field_set):
+
+            info.context.acl_check_many(
+                'view',
+                'lexical_entries_and_entities',
+                [perspective.id for perspective in perspectives_list])
+
         return perspectives_list
 
 
@@ -4945,7 +4994,7 @@ class Phonology(graphene.Mutation):
         return Phonology(triumph=True)
 
 
-@celery.task
+@celery.task(queue = HEAVY_QUEUE)
 def async_phonological_statistical_distance(
     id_list,
     vowel_selection,
@@ -5015,6 +5064,9 @@ class PhonologicalStatisticalDistance(graphene.Mutation):
 
     triumph = graphene.Boolean()
 
+    # Key of the status of an identical task used instead of starting a new one, if any.
+    reused_task_key = graphene.String()
+
     def perform_phonological_statistical_distance(
         id_list,
         vowel_selection,
@@ -5780,12 +5832,51 @@ class PhonologicalStatisticalDistance(graphene.Mutation):
                     ResponseError(
                         message = 'Only administrator can use debug mode.'))
 
+            # Attaching to an identical running task or reusing results of an identical finished one.
+
+            fingerprint = None
+
+            if not __debug_flag__:
+
+                fingerprint = (
+
+                    task_fingerprint(
+                        'Phonological statistical distance computation',
+                        user_id,
+                        {'id_list': id_list,
+                            'vowel_selection': vowel_selection,
+                            'chart_threshold': chart_threshold,
+                            'locale_id': locale_id},
+                        id_list))
+
+                registered_status = find_task(user_id, fingerprint)
+
+                if registered_status is not None:
+
+                    return (
+
+                        PhonologicalStatisticalDistance(
+                            triumph = True,
+                            reused_task_key = registered_status.key))
+
             task_status = TaskStatus(
                 user_id,
                 'Phonological statistical distance computation',
                 '{0} perspectives'.format(len(id_list)),
                 1)
 
+            if fingerprint is not None:
+
+                registered_status = register_task(user_id, fingerprint, task_status)
+
+                if registered_status is not None:
+
+                    return (
+
+                        PhonologicalStatisticalDistance(
+                            triumph = True,
+                            reused_task_key = registered_status.key))
+
             # Launching asynchronous phonological statistical distance computation.
 
             request.response.status = HTTPOk.code
@@ -5879,8 +5970,35 @@ def save_dictionary(
             task_name_str += (
                 ' (' + ', '.join(modifier_list) + ')')
 
+            # Attaching to an identical running task or reusing results of an identical finished one.
+
+            fingerprint = None
+
+            if not debug_flag:
+
+                fingerprint = (
+
+                    task_fingerprint(
+                        'Saving dictionary',
+                        user_id,
+                        {'dictionary_id': dict_id,
+                            'locale_id': locale_id,
+                            'published': publish,
+                            'sound_flag': sound_flag,
+                            'markup_flag': markup_flag,
+                            'f_type': f_type},
+                        [perspective.id
+                            for perspective in dictionary_obj.dictionaryperspective]))
+
+                if find_task(user_id, fingerprint) is not None:
+                    return
+
             task = TaskStatus(user_id, task_name_str, dict_name, 4)
 
+            if (fingerprint is not None and
+                register_task(user_id, fingerprint, task) is not None):
+                return
+
     except:
         raise ResponseError('bad request')
     my_args['dict_name'] = dict_name
@@ -7228,6 +7346,57 @@ class Context(dict):
 
         return result
 
+    def acl_check_many(
+        self,
+        action,
+        subject,
+        subject_id_list):
+        """
+        Checks if the client has permission to perform given action on each of specified subjects via ACL,
+        checking subjects not checked yet at once and caching the results.
+
+        Subjects must be specified by client_id/object_id pairs. Returns dictionary of results by subject id
+        tuples.
+        """
+
+        result_dict = {}
+        check_id_list = []
+
+        for subject_id in subject_id_list:
+
+            subject_id = tuple(subject_id)
+
+            result = (
+
+                self.acl_cache.get(
+                    (action, subject, subject_id)))
+
+            if result is not None:
+                result_dict[subject_id] = result
+
+            else:
+                check_id_list.append(subject_id)
+
+        if check_id_list:
+
+            check_dict = (
+
+                acl.check_direct_many(
+                    self.client_id,
+                    self.request,
+                    action,
+                    subject,
+                    check_id_list))
+
+            for subject_id, result in check_dict.items():
+
+                self.acl_cache[
+                    (action, subject, subject_id)] = result
+
+            result_dict.update(check_dict)
+
+        return result_dict
+
     def acl_check(
         self,
         action,
@@ -0,0 +1,159 @@
+# Standard library imports.
+
+import logging
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+import transaction
+
+# Project imports.
+
+from lingvodoc.models import (
+    DBSession,
+    Entity,
+    LexicalEntry,
+)
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def orm_create(
+    client_id,
+    perspective_id,
+    field_id,
+    entry_count,
+    entity_count):
+    """
+    Creates lexical entries with entities through the ORM, one object at a time, as the converters did
+    before bulk creation.
+    """
+
+    for i in range(entry_count):
+
+        entry = (
+
+            LexicalEntry(
+                client_id = client_id,
+                parent_client_id = perspective_id[0],
+                parent_object_id = perspective_id[1]))
+
+        DBSession.add(entry)
+
+        for j in range(entity_count):
+
+            entity = (
+
+                Entity(
+                    client_id = client_id,
+                    parent_client_id = entry.client_id,
+                    parent_object_id = entry.object_id,
+                    field_client_id = field_id[0],
+                    field_object_id = field_id[1],
+                    locale_id = 2,
+                    content = 'entity {} {}'.format(i, j)))
+
+            entity.publishingentity.accepted = True
+            DBSession.add(entity)
+
+    DBSession.flush()
+
+
+def bulk_create(
+    client_id,
+    perspective_id,
+    field_id,
+    entry_count,
+    entity_count,
+    copy = False):
+    """
+    Creates lexical entries with entities via CompositeIdMixin.bulk_create(), either through multi-row
+    INSERTs or through COPY.
+    """
+
+    entry_id_list = (
+
+        LexicalEntry.bulk_create([
+            {'client_id': client_id, 'parent_id': perspective_id}
+            for i in range(entry_count)],
+            copy = copy))
+
+    Entity.bulk_create([
+
+        {'client_id': client_id,
+            'parent_id': entry_id,
+            'field_id': field_id,
+            'locale_id': 2,
+            'content': 'entity {} {}'.format(i, j),
+            'accepted': True}
+
+        for i, entry_id in enumerate(entry_id_list)
+        for j in range(entity_count)],
+        copy = copy)
+
+
+def copy_create(*args):
+    return bulk_create(*args, copy = True)
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 6:
+
+        sys.exit(
+            'Please specify config file, client id, perspective id and field id:\n'
+            '  python -m lingvodoc.scripts.bulk_create_benchmark <config_file_path> '
+            '<client_id> <perspective_client_id> <perspective_object_id> '
+            '<field_client_id> <field_object_id> [<entry_count> [<entity_count>]]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    client_id = int(sys.argv[2])
+    perspective_id = (int(sys.argv[3]), int(sys.argv[4]))
+    field_id = (int(sys.argv[5]), int(sys.argv[6]))
+
+    entry_count = int(sys.argv[7]) if len(sys.argv) > 7 else 1000
+    entity_count = int(sys.argv[8]) if len(sys.argv) > 8 else 4
+
+    row_count = entry_count * (entity_count + 1)
+
+    # Timing both ways of creation, rolling back everything we've created.
+
+    for name, f in [
+        ('orm', orm_create),
+        ('bulk', bulk_create),
+        ('copy', copy_create)]:
+
+        transaction.begin()
+
+        start_time = time.time()
+
+        f(client_id, perspective_id, field_id, entry_count, entity_count)
+
+        elapsed = time.time() - start_time
+
+        log.info(
+            '\n{}: {} objects in {:.3f}s, {:.1f} objects/s'.format(
+                name,
+                row_count,
+                elapsed,
+                row_count / elapsed))
+
+        transaction.abort()
+
+    pyramid_env['closer']()
+
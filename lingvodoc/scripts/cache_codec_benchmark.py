@@ -0,0 +1,188 @@
+# Standard library imports.
+
+import datetime
+import logging
+import random
+import sys
+import time
+import uuid
+
+# Library imports.
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+# Project imports.
+
+from lingvodoc.cache import codec
+from lingvodoc.models import Entity
+from lingvodoc.views.v2.phonology import Tier_Result
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def generate_phonology(tier_count, interval_count):
+    """
+    Generates sound / markup analysis result as it is cached by phonology under 'phonology:*' keys.
+    """
+
+    textgrid_result_list = []
+
+    for tier_index in range(tier_count):
+
+        interval_data_list = [
+
+            ('a{0} {1:.3f} {2:.3f} [{3}]'.format(i, random.random(), random.random() * 80, i),
+                random.random() * 2,
+                ['{0:.3f}'.format(random.random() * 80) for j in range(3)],
+                ['{0:.3f}'.format(random.random() * 3000) for j in range(3)],
+                '+' if i == 0 else '-',
+                '-',
+                i)
+
+                for i in range(interval_count)]
+
+        source_interval_list = [
+            (i * 0.25, i * 0.25 + 0.2, 'a{0}'.format(i))
+            for i in range(interval_count)]
+
+        tier_result = (
+
+            Tier_Result(
+                ''.join('a{0}'.format(i) for i in range(interval_count)),
+                interval_count * 0.2,
+                0.2,
+                'a0 0.200 [0]',
+                1.0,
+                ['{0:.3f}'.format(random.random() * 80) for j in range(3)],
+                ['{0:.3f}'.format(random.random() * 3000) for j in range(3)],
+                0,
+                'a0 0.200 [0]',
+                1.0,
+                ['{0:.3f}'.format(random.random() * 80) for j in range(3)],
+                ['{0:.3f}'.format(random.random() * 3000) for j in range(3)],
+                0,
+                '+',
+                interval_data_list,
+                source_interval_list))
+
+        textgrid_result_list.append(
+            (tier_index, 'tier {0}'.format(tier_index), [tier_result]))
+
+    return textgrid_result_list
+
+
+def generate_entity():
+    """
+    Generates entity as it is cached by ThroughCache under 'auto:Entity:*' keys.
+    """
+
+    entity = Entity.__mapper__.class_manager.new_instance()
+
+    for key, value in [
+        ('client_id', 1),
+        ('object_id', 12345),
+        ('parent_client_id', 1),
+        ('parent_object_id', 123),
+        ('self_client_id', None),
+        ('self_object_id', None),
+        ('field_client_id', 66),
+        ('field_object_id', 8),
+        ('link_client_id', None),
+        ('link_object_id', None),
+        ('locale_id', 2),
+        ('content', 'some entity content'),
+        ('marked_for_deletion', False),
+        ('created_at', datetime.datetime.utcnow()),
+        ('additional_metadata', {'hash': 'f' * 64, 'data_type': 'sound'})]:
+
+        set_committed_value(entity, key, value)
+
+    return entity
+
+
+def generate_task():
+    """
+    Generates task status as it is cached under 'task:*' keys.
+    """
+
+    return {
+        'id': str(uuid.uuid4()),
+        'user_id': '1',
+        'key': 'task:' + str(uuid.uuid4()),
+        'current_stage': 2,
+        'total_stages': 4,
+        'progress': 57,
+        'task_family': 'Phonology compilation',
+        'task_details': 'Some dictionary - Some perspective',
+        'status': 'Analyzing sound and markup',
+        'result_link_list': [],
+        'created_at': time.time()}
+
+
+def benchmark(value, iteration_count):
+    """
+    Returns encoded size and encode / decode times per value in microseconds for each codec.
+    """
+
+    result_list = []
+
+    for codec_name in ['dill', 'msgpack']:
+
+        value_codec = codec.get_codec(codec_name)
+
+        start_time = time.time()
+
+        for i in range(iteration_count):
+            data = codec.dumps(value, value_codec)
+
+        encode_time = (time.time() - start_time) / iteration_count
+
+        start_time = time.time()
+
+        for i in range(iteration_count):
+            codec.loads(data)
+
+        decode_time = (time.time() - start_time) / iteration_count
+
+        result_list.append(
+            (codec_name, len(data), encode_time * 1e6, decode_time * 1e6))
+
+    return result_list
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    logging.basicConfig(
+        level = logging.INFO)
+
+    log = logging.getLogger(__name__)
+
+    iteration_count = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+
+    value_list = [
+        ('translation:*', 'Перевод слова'),
+        ('translations:*', {'1': 'Перевод слова', '2': 'Word translation', '4': 'Sõna tõlge'}),
+        ('phonology:*', generate_phonology(2, 64)),
+        ('task:*', generate_task()),
+        ('auto:Entity:*', generate_entity())]
+
+    line_list = [
+        '{0:<16} {1:<8} {2:>10} {3:>12} {4:>12}'.format(
+            'key', 'codec', 'size, B', 'encode, us', 'decode, us')]
+
+    for key, value in value_list:
+
+        for codec_name, size, encode_time, decode_time in benchmark(value, iteration_count):
+
+            line_list.append(
+                '{0:<16} {1:<8} {2:>10} {3:>12.1f} {4:>12.1f}'.format(
+                    key, codec_name, size, encode_time, decode_time))
+
+    log.info('\n' + '\n'.join(line_list))
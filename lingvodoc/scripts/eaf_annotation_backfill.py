@@ -0,0 +1,170 @@
+# Standard library imports.
+
+import logging
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+from sqlalchemy import tuple_
+
+import transaction
+
+# Project imports.
+
+from lingvodoc.models import (
+    DBSession,
+    Entity,
+    Field,
+    TranslationAtom,
+    TranslationGist,
+    update_eaf_annotations,
+)
+
+from lingvodoc.utils.elan_functions import eaf_annotation_list
+from lingvodoc.views.v2.utils import storage_file
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def backfill(storage, batch_size = 256):
+    """
+    Extracts annotations of ELAN markup of all undeleted markup entities, each batch of entities in a
+    separate transaction.
+
+    Annotations of each entity are replaced and not added, so can be rerun, e.g. after an interruption.
+    Files which can't be read or parsed are skipped.
+    """
+
+    field_query = (
+
+        DBSession
+
+            .query(
+                Field.client_id,
+                Field.object_id)
+
+            .filter(
+                Field.marked_for_deletion == False,
+                Field.data_type_translation_gist_client_id == TranslationGist.client_id,
+                Field.data_type_translation_gist_object_id == TranslationGist.object_id,
+                TranslationGist.marked_for_deletion == False,
+                TranslationAtom.parent_client_id == TranslationGist.client_id,
+                TranslationAtom.parent_object_id == TranslationGist.object_id,
+                TranslationAtom.marked_for_deletion == False,
+                TranslationAtom.locale_id == 2,
+                TranslationAtom.content == 'Markup'))
+
+    last_id = None
+
+    entity_count = 0
+    error_count = 0
+    start_time = time.time()
+
+    while True:
+
+        with transaction.manager:
+
+            eaf_query = (
+
+                DBSession
+
+                    .query(
+                        Entity.object_id,
+                        Entity.client_id,
+                        Entity.content)
+
+                    .filter(
+                        tuple_(Entity.field_client_id, Entity.field_object_id)
+                            .in_(field_query.subquery()),
+                        Entity.marked_for_deletion == False,
+                        Entity.content.op('~*')('.*\\.eaf.*')))
+
+            if last_id is not None:
+
+                eaf_query = (
+
+                    eaf_query.filter(
+                        tuple_(Entity.object_id, Entity.client_id) > last_id))
+
+            eaf_list = (
+
+                eaf_query
+
+                    .order_by(
+                        Entity.object_id,
+                        Entity.client_id)
+
+                    .limit(batch_size)
+                    .all())
+
+            if not eaf_list:
+                break
+
+            for object_id, client_id, eaf_url in eaf_list:
+
+                try:
+
+                    with storage_file(storage, eaf_url) as eaf_file:
+                        content = eaf_file.read()
+
+                    annotation_list = eaf_annotation_list(content)
+
+                except Exception as exception:
+
+                    log.warning(
+                        'entity {0}/{1} {2}: {3}'.format(
+                            client_id, object_id, repr(eaf_url), repr(exception)))
+
+                    error_count += 1
+                    continue
+
+                update_eaf_annotations(
+                    (client_id, object_id), annotation_list)
+
+        last_id = tuple(eaf_list[-1][:2])
+        entity_count += len(eaf_list)
+
+        log.info(
+            '{0} entities, {1} errors, {2:.1f}s'.format(
+                entity_count, error_count, time.time() - start_time))
+
+    return entity_count, error_count
+
+
+# If we are being run as a script.
+#
+# Extracts annotations of all ELAN markup, e.g.
+#
+#   python -m lingvodoc.scripts.eaf_annotation_backfill development.ini
+#
+# after which the 'eaf_annotation_index' setting can be enabled.
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 2:
+
+        sys.exit(
+            'Please specify config file:\n'
+            '  python -m lingvodoc.scripts.eaf_annotation_backfill <config_file_path> [<batch_size>]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    backfill(
+        pyramid_env['registry'].settings['storage'],
+        batch_size)
+
+    pyramid_env['closer']()
@@ -724,7 +724,8 @@ class Save_Context(object):
         markup_flag = False,
         storage = None,
         f_type = 'xlsx',
-        __debug_flag__ = False):
+        __debug_flag__ = False,
+        xlsx_path = None):
 
         self.locale_id = locale_id
         self.session = session
@@ -734,8 +735,19 @@ class Save_Context(object):
         self.sound_flag = sound_flag
         self.markup_flag = markup_flag
 
-        self.stream = io.BytesIO()
-        self.workbook = xlsxDocument(self.stream, {'in_memory': True}) if f_type == 'xlsx' else None
+        # If we have a path, XLSX workbook is written straight to the file, with only the current row of each
+        # worksheet kept in memory, so rows must be written in order.
+
+        if xlsx_path is not None:
+
+            self.stream = None
+            self.workbook = xlsxDocument(xlsx_path, {'constant_memory': True})
+
+        else:
+
+            self.stream = io.BytesIO()
+            self.workbook = xlsxDocument(self.stream, {'in_memory': True}) if f_type == 'xlsx' else None
+
         self.document = docxDocument() if f_type == 'docx' else None
         self.richtext = rtfDocument() if f_type == 'rtf' else None
 
@@ -0,0 +1,114 @@
+# Standard library imports.
+
+import logging
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+from sqlalchemy import tuple_
+
+import transaction
+
+# Project imports.
+
+from lingvodoc.models import (
+    DBSession,
+    Entity,
+    update_search_tokens,
+)
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def backfill(batch_size = 16384):
+    """
+    Creates search tokens of all entities, each batch of entities in a separate transaction.
+
+    Can be run on a live DB, as search tokens of each entity are replaced and not added, and can be rerun
+    after an interruption.
+    """
+
+    last_id = None
+
+    entity_count = 0
+    start_time = time.time()
+
+    while True:
+
+        with transaction.manager:
+
+            id_query = (
+
+                DBSession.query(
+                    Entity.object_id,
+                    Entity.client_id))
+
+            if last_id is not None:
+
+                id_query = (
+
+                    id_query.filter(
+                        tuple_(Entity.object_id, Entity.client_id) > last_id))
+
+            id_list = (
+
+                id_query
+
+                    .order_by(
+                        Entity.object_id,
+                        Entity.client_id)
+
+                    .limit(batch_size)
+                    .all())
+
+            if not id_list:
+                break
+
+            update_search_tokens(
+                [(client_id, object_id) for object_id, client_id in id_list])
+
+        last_id = tuple(id_list[-1])
+        entity_count += len(id_list)
+
+        log.info(
+            '{0} entities, {1:.1f}s'.format(
+                entity_count, time.time() - start_time))
+
+    return entity_count
+
+
+# If we are being run as a script.
+#
+# Fills search tokens of all entities, e.g.
+#
+#   python -m lingvodoc.scripts.search_token_backfill development.ini
+#
+# after which the 'search_token_index' setting can be enabled.
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 2:
+
+        sys.exit(
+            'Please specify config file:\n'
+            '  python -m lingvodoc.scripts.search_token_backfill <config_file_path> [<batch_size>]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 16384
+
+    backfill(batch_size)
+
+    pyramid_env['closer']()
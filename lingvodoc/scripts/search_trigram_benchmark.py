@@ -0,0 +1,181 @@
+# Standard library imports.
+
+import logging
+import sys
+import time
+
+# External imports.
+
+import pyramid.paster as paster
+
+from sqlalchemy import (
+    column,
+    func,
+    select,
+    table,
+)
+
+import transaction
+
+# Project imports.
+
+from lingvodoc.models import DBSession
+from lingvodoc.schema.gql_search import xform_pattern
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+benchmark_table = (
+
+    table(
+        'search_trigram_benchmark',
+        column('content')))
+
+
+def create_table(row_count):
+    """
+    Creates temporary table with synthetic entity contents, Cyrillic words with acute accents in each third
+    row followed by Latin words, indexed as the entity table is indexed for search.
+    """
+
+    DBSession.execute('''
+
+        create temporary table
+        search_trigram_benchmark (content text)
+        on commit drop;
+
+        insert into search_trigram_benchmark
+
+        select
+          translate(substr(md5(i :: text), 1, 8), '0123456789abcdef', 'абвгдежзиклмнопр') ||
+          case when i % 3 = 0 then chr(769) else '' end || ' ' ||
+          translate(substr(md5((i * 7) :: text), 1, 6), '0123456789abcdef', 'abcdefghijklmnop')
+
+        from generate_series(1, {0}) i;
+
+        create index
+        on search_trigram_benchmark using gin
+        (diacritic_xform(content) gin_trgm_ops);
+
+        create index
+        on search_trigram_benchmark using gin
+        (lower(content) gin_trgm_ops);
+
+        analyze search_trigram_benchmark;
+
+        '''.format(int(row_count)))
+
+
+def time_query(condition, index_flag, repeat_count = 3):
+    """
+    Returns number of matching rows and best time of counting them, with or without index scans.
+    """
+
+    flag_str = 'on' if index_flag else 'off'
+
+    DBSession.execute(f'set local enable_bitmapscan = {flag_str}')
+    DBSession.execute(f'set local enable_indexscan = {flag_str}')
+
+    query = (
+
+        select([func.count()])
+            .select_from(benchmark_table)
+            .where(condition))
+
+    best_time = None
+
+    for i in range(repeat_count):
+
+        start_time = time.time()
+        count = DBSession.execute(query).scalar()
+        elapsed = time.time() - start_time
+
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return count, best_time
+
+
+# If we are being run as a script.
+#
+# Compares times of substring and regular expression searches over a synthetic table with and without
+# trigram indexes, e.g.
+#
+#   python -m lingvodoc.scripts.search_trigram_benchmark development.ini 1000000
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 2:
+
+        sys.exit(
+            'Please specify config file:\n'
+            '  python -m lingvodoc.scripts.search_trigram_benchmark <config_file_path> [<row_count>]')
+
+    config_path = sys.argv[1]
+
+    pyramid_env = paster.bootstrap(config_path)
+    paster.setup_logging(config_path)
+
+    log = logging.getLogger(__name__)
+
+    row_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    content = benchmark_table.c.content
+
+    # Search strings match synthetic contents, first one with an acute accent matches contents both with
+    # and without it when diacritics are ignored.
+
+    condition_list = [
+
+        ('substring, no diacritics',
+            func.diacritic_xform(content).ilike(
+                xform_pattern('%жи́%', 'ignore'))),
+
+        ('regexp, no diacritics',
+            func.diacritic_xform(content).op('~*')(
+                xform_pattern('^ба[а-д]\\S* ', 'ignore'))),
+
+        ('substring',
+            func.lower(content).ilike(
+                xform_pattern('%abcd%', None))),
+
+        ('regexp',
+            func.lower(content).op('~*')(
+                xform_pattern('\\Wpon[a-c]', None))),
+    ]
+
+    transaction.begin()
+
+    start_time = time.time()
+
+    create_table(row_count)
+
+    log.info(
+        '\n{0} rows created and indexed in {1:.3f}s'.format(
+            row_count, time.time() - start_time))
+
+    line_list = [
+        '{0:<26} {1:>8} {2:>12} {3:>12} {4:>8}'.format(
+            'search', 'rows', 'scan, s', 'index, s', 'speedup')]
+
+    for name, condition in condition_list:
+
+        count, scan_time = time_query(condition, False)
+        index_count, index_time = time_query(condition, True)
+
+        if index_count != count:
+            log.warning(f'{name}: {count} rows with full scan, {index_count} rows with index')
+
+        line_list.append(
+            '{0:<26} {1:>8} {2:>12.3f} {3:>12.3f} {4:>7.1f}x'.format(
+                name, count, scan_time, index_time, scan_time / index_time))
+
+    log.info('\n' + '\n'.join(line_list))
+
+    transaction.abort()
+
+    pyramid_env['closer']()
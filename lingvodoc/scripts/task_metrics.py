@@ -0,0 +1,47 @@
+# Standard library imports.
+
+from configparser import ConfigParser
+import json
+import logging
+import sys
+
+# Project imports.
+
+import lingvodoc.cache.caching as caching
+from lingvodoc.queue.metrics import metrics_summary
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+# If we are being run as a script.
+#
+# Prints median, 95th percentile and maximum of task resource usage by task size, e.g.
+#
+#   python -m lingvodoc.scripts.task_metrics development.ini "Cognate analysis"
+
+if __name__ == '__main__':
+
+    logging.basicConfig(
+        level = logging.INFO)
+
+    log = logging.getLogger(__name__)
+
+    if len(sys.argv) < 3:
+
+        log.info('Usage: task_metrics <config.ini> <task family>')
+        sys.exit(1)
+
+    parser = ConfigParser()
+    parser.read(sys.argv[1])
+
+    caching.initialize_cache(
+        dict(parser.items('cache:redis:args')))
+
+    log.info(
+        '\n' + json.dumps(
+            metrics_summary(sys.argv[2]),
+            indent = 2))
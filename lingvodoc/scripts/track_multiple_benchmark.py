@@ -0,0 +1,111 @@
+# Standard library imports.
+
+import datetime
+import logging
+import sys
+import time
+
+# Project imports.
+
+from lingvodoc.models import LexicalEntry
+
+
+# Setting up logging, if we are not being run as a script.
+
+if __name__ != '__main__':
+    log = logging.getLogger(__name__)
+
+
+def generate(
+    entry_count,
+    entity_count):
+    """
+    Generates lexical entry info and entity rows as they are passed to LexicalEntry.track_tree() by
+    LexicalEntry.track_multiple(), each lexical entry getting 'entity_count' entities, every other
+    entity having a child entity.
+    """
+
+    created_at = datetime.datetime.utcnow()
+
+    lexs = [
+        (created_at.timestamp(), 1, i, 1, 1, False, None, None)
+        for i in range(entry_count)]
+
+    entries = []
+
+    object_id = entry_count
+
+    for i in range(entry_count):
+
+        for j in range(entity_count):
+
+            object_id += 1
+
+            row = {
+                'client_id': 1,
+                'object_id': object_id,
+                'parent_client_id': 1,
+                'parent_object_id': i,
+                'self_client_id': None,
+                'self_object_id': None,
+                'field_client_id': 66,
+                'field_object_id': j,
+                'content': 'content {} {}'.format(i, j),
+                'locale_id': 2,
+                'created_at': created_at,
+                'marked_for_deletion': False,
+                'additional_metadata': None,
+                'data_type': 'Text',
+                'entity_type': 'Text',
+                'accepted': True,
+                'published': False,
+                'traversal_lexical_order': i,
+                'tree_level': 1,
+                'tree_numbering_scheme': j + 1}
+
+            entries.append(row)
+
+            if j % 2:
+
+                entries.append(
+                    dict(
+                        row,
+                        object_id = - object_id,
+                        self_client_id = 1,
+                        self_object_id = object_id,
+                        tree_level = 2))
+
+    return lexs, entries
+
+
+# If we are being run as a script.
+
+if __name__ == '__main__':
+
+    logging.basicConfig(
+        level = logging.INFO)
+
+    log = logging.getLogger(__name__)
+
+    entity_count = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else 4)
+
+    for entry_count in [10000, 50000]:
+
+        lexs, entries = (
+            generate(entry_count, entity_count))
+
+        start_time = time.time()
+
+        lexical_list = (
+            LexicalEntry.track_tree(lexs, entries))
+
+        elapsed = time.time() - start_time
+
+        assert len(lexical_list) == entry_count
+
+        log.info(
+            '\n{} entries, {} entity rows: {:.3f}s'.format(
+                entry_count,
+                len(entries),
+                elapsed))
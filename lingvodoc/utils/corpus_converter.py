@@ -47,16 +47,15 @@ from lingvodoc.models import (
     Group,
     Language,
     LexicalEntry,
-    ObjectTOC,
-    PublishingEntity,
     TranslationAtom,
     TranslationGist,
+    update_eaf_annotations,
     user_to_group_association,
 )
 
 from lingvodoc.scripts import elan_parser
 from lingvodoc.utils import ids_to_id_query
-from lingvodoc.utils.elan_functions import tgt_to_eaf
+from lingvodoc.utils.elan_functions import eaf_annotation_list, tgt_to_eaf
 
 from lingvodoc.utils.search import get_id_to_field_dict, field_search
 
@@ -1123,8 +1122,10 @@ def convert_five_tiers(
 
         entry_insert_list = []
         entity_insert_list = []
-        toc_insert_list = []
-        publish_insert_list = []
+
+        # Extracted annotations of new ELAN markup entities, for EAF corpora search.
+
+        eaf_annotation_dict = {}
 
         ## Common functions
 
@@ -1158,7 +1159,9 @@ def convert_five_tiers(
                 'field_object_id': field_id[1],
                 'marked_for_deletion': False,
                 'content': content,
-                'additional_metadata': null()}
+                'additional_metadata': null(),
+                'published': False,
+                'accepted': True}
 
             if self_id is not None:
                 entity_dict['self_client_id'] = self_id[0]
@@ -1192,27 +1195,29 @@ def convert_five_tiers(
                 if data_type == 'sound':
                     additional_metadata['data_type'] = 'sound'
 
-            entity_insert_list.append(entity_dict)
+                # ELAN markup files are the ones EAF corpora search looks through, see
+                # lingvodoc.schema.gql_search.EafSearch.
 
-            client_id = entity_dict['client_id']
-            object_id = entity_dict['object_id']
+                if ('markup' in data_type and
+                    '.eaf' in entity_dict['content'].lower()):
 
-            publish_dict = {
-                'created_at': entity_dict['created_at'],
-                'client_id': client_id,
-                'object_id': object_id,
-                'published': False,
-                'accepted': True}
+                    try:
 
-            publish_insert_list.append(publish_dict)
+                        eaf_annotation_dict[
+                            (entity_dict['client_id'], entity_dict['object_id'])] = (
 
-            toc_dict = {
-                'client_id': client_id,
-                'object_id': object_id,
-                'table_name': 'entity',
-                'marked_for_deletion': False}
+                            eaf_annotation_list(content))
 
-            toc_insert_list.append(toc_dict)
+                    except Exception as exception:
+
+                        log.warning(
+                            f'\n{entry_id}: cannot extract annotations of {repr(filename)}: '
+                            f'{repr(exception)}')
+
+            entity_insert_list.append(entity_dict)
+
+            client_id = entity_dict['client_id']
+            object_id = entity_dict['object_id']
 
             if debug_flag:
                 log.debug(
@@ -1250,37 +1255,22 @@ def convert_five_tiers(
             task_message):
             """
             Performs insert of the data of new entries and entities in the DB.
+
+            Entries and entities are inserted in bulk together with their ObjectTOC and PublishingEntity
+            rows, see CompositeIdMixin.bulk_create(), followed by extracted annotations of ELAN markup.
             """
 
             percent_step = (
-                (percent_to - percent_from) / 4)
-
-            if debug_flag:
-                log.debug(
-                    f'\n{len(toc_insert_list)} objecttoc')
-
-            if toc_insert_list:
-                DBSession.execute(
-                    ObjectTOC.__table__
-                        .insert()
-                        .values(toc_insert_list))
-
-                toc_insert_list.clear()
+                (percent_to - percent_from) / 2)
 
             if debug_flag:
                 log.debug(
                     f'\n{len(entry_insert_list)} lexicalentry')
 
-            task_percent(
-                task_stage,
-                percent_from + percent_step,
-                task_message)
-
             if entry_insert_list:
-                DBSession.execute(
-                    LexicalEntry.__table__
-                        .insert()
-                        .values(entry_insert_list))
+
+                LexicalEntry.bulk_create(
+                    entry_insert_list)
 
                 entry_insert_list.clear()
 
@@ -1290,37 +1280,26 @@ def convert_five_tiers(
 
             task_percent(
                 task_stage,
-                percent_from + 2 * percent_step,
+                percent_from + percent_step,
                 task_message)
 
             if entity_insert_list:
-                DBSession.execute(
-                    Entity.__table__
-                        .insert()
-                        .values(entity_insert_list))
 
-                entity_insert_list.clear()
+                Entity.bulk_create(
+                    entity_insert_list)
 
-            if debug_flag:
-                log.debug(
-                    f'\n{len(publish_insert_list)} publishing entity')
+                entity_insert_list.clear()
 
-            task_percent(
-                task_stage,
-                percent_from + 3 * percent_step,
-                task_message)
+            for entity_id, annotation_list in eaf_annotation_dict.items():
 
-            if publish_insert_list:
-                DBSession.execute(
-                    PublishingEntity.__table__
-                        .insert()
-                        .values(publish_insert_list))
+                update_eaf_annotations(
+                    entity_id, annotation_list)
 
-                publish_insert_list.clear()
+            eaf_annotation_dict.clear()
 
             task_percent(
                 task_stage,
-                percent_from + 4 * percent_step,
+                percent_from + 2 * percent_step,
                 task_message)
 
         # Getting ready for parsing and processing markup; if we are going to merge lexical entries by
@@ -1552,14 +1531,6 @@ def convert_five_tiers(
 
                             entry_insert_list.append(entry_dict)
 
-                            toc_dict = {
-                                'client_id': extra_client_id,
-                                'object_id': entry_dict['object_id'],
-                                'table_name': 'lexicalentry',
-                                'marked_for_deletion': False}
-
-                            toc_insert_list.append(toc_dict)
-
                             lexical_entry_id = extra_client_id, entry_dict['object_id']
 
                         txt_rows[txt_row] = lexical_entry_id
@@ -1815,14 +1786,6 @@ def convert_five_tiers(
 
                                 entry_insert_list.append(entry_dict)
 
-                                toc_dict = {
-                                    'client_id': extra_client_id,
-                                    'object_id': entry_dict['object_id'],
-                                    'table_name': 'lexicalentry',
-                                    'marked_for_deletion': False}
-
-                                toc_insert_list.append(toc_dict)
-
                                 p1_lexical_entry_id = extra_client_id, entry_dict['object_id']
 
                             lex_rows[lex_row] = (
@@ -2389,14 +2352,6 @@ def convert_five_tiers(
 
                         entry_insert_list.append(entry_dict)
 
-                        toc_dict = {
-                            'client_id': extra_client_id,
-                            'object_id': entry_dict['object_id'],
-                            'table_name': 'lexicalentry',
-                            'marked_for_deletion': False}
-
-                        toc_insert_list.append(toc_dict)
-
                         p1_lexical_entry_id = (
                             extra_client_id, entry_dict['object_id'])
 
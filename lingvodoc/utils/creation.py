@@ -49,6 +49,7 @@ from lingvodoc.models import (
     PublishingEntity,
     Organization as dbOrganization, Parser, ParserResult,
     get_client_counter,
+    update_eaf_annotations,
     ENGLISH_LOCALE)
 
 from lingvodoc.queue.celery import celery
@@ -56,7 +57,7 @@ from lingvodoc.queue.celery import celery
 from lingvodoc.schema.gql_holders import ResponseError
 
 import lingvodoc.utils.doc_parser as ParseMethods
-from lingvodoc.utils.elan_functions import eaf_wordlist
+from lingvodoc.utils.elan_functions import eaf_annotation_list, eaf_wordlist
 from lingvodoc.utils.search import translation_gist_search
 
 from lingvodoc.views.v2.utils import storage_file
@@ -443,6 +444,11 @@ def create_entity(id=None,
             bag_of_words = list(eaf_wordlist(content))
             dbentity.additional_metadata['bag_of_words'] = bag_of_words
 
+            # Extracted ELAN annotations for EAF corpora search.
+
+            update_eaf_annotations(
+                dbentity.id, eaf_annotation_list(content))
+
         dbentity.additional_metadata['data_type'] = data_type
     elif data_type in ('link', "directed link"):
         if link_id:
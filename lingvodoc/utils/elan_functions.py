@@ -18,12 +18,16 @@ import random
 import string
 import requests
 import tempfile
+import itertools
 from sqlalchemy.exc import IntegrityError
 from lingvodoc.exceptions import CommonException
 from lingvodoc.scripts.convert_rules import praat_to_elan
 
 
-def eaf_wordlist(content):
+def eaf_object(content):
+    """
+    Parses contents of an EAF file, or of a TextGrid file converting it to EAF.
+    """
 
     if len(content) > 50 * 1048576:
 
@@ -36,20 +40,80 @@ def eaf_wordlist(content):
 
         try:
 
-            eaf_obj = (
+            return (
                 pympi.Eaf(file_path = temp_file.name))
 
-            return eaf_words(eaf_obj)
-
         except:
 
             textgrid_obj = (
                 pympi.TextGrid(file_path = temp_file.name))
 
-            eaf_obj = (
+            return (
                 textgrid_obj.to_eaf())
 
-            return eaf_words(eaf_obj)
+
+def eaf_wordlist(content):
+
+    return eaf_words(eaf_object(content))
+
+
+def eaf_annotation_list(content):
+    """
+    Extracts non-empty annotations of all tiers of an EAF file as (tier, start time, end time, text)
+    tuples, see lingvodoc.models.EafAnnotation.
+
+    Reference annotations get time span of the time-aligned annotations they ultimately refer to.
+    """
+
+    eaf_obj = eaf_object(content)
+
+    def time_span(tier_id, annotation_id):
+
+        # Following references up to a time-aligned annotation, guarding against reference cycles.
+
+        for _ in range(len(eaf_obj.annotations)):
+
+            aligned_dict, reference_dict = eaf_obj.tiers[tier_id][:2]
+
+            if annotation_id in aligned_dict:
+
+                start_ts, end_ts = aligned_dict[annotation_id][:2]
+
+                return (
+                    eaf_obj.timeslots.get(start_ts),
+                    eaf_obj.timeslots.get(end_ts))
+
+            ref_id = reference_dict[annotation_id][0]
+
+            if ref_id not in eaf_obj.annotations:
+                break
+
+            tier_id = eaf_obj.annotations[ref_id]
+            annotation_id = ref_id
+
+        return None, None
+
+    annotation_list = []
+
+    for tier_id, (aligned_dict, reference_dict, _, _) in eaf_obj.tiers.items():
+
+        annotation_iter = (
+
+            itertools.chain(
+                ((annotation_id, data[2]) for annotation_id, data in aligned_dict.items()),
+                ((annotation_id, data[1]) for annotation_id, data in reference_dict.items())))
+
+        for annotation_id, value in annotation_iter:
+
+            if not value or not value.strip():
+                continue
+
+            start_time, end_time = time_span(tier_id, annotation_id)
+
+            annotation_list.append(
+                (tier_id, start_time, end_time, value))
+
+    return annotation_list
 
 
 def tgt_to_eaf(content, additional_metadata):
@@ -0,0 +1,174 @@
+"""
+Cached parsing and validation of GraphQL queries and persisted queries.
+
+Parsed and validated documents are cached in-process by SHA-256 hashes of query strings, so that the same
+queries are not parsed and validated on each request.
+
+Persisted queries follow Apollo's automatic persisted queries protocol: a client sends a query's hash as
+'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': <hash>}}, or simply as 'id', without the
+query. If the query is unknown, the client gets a 'PersistedQueryNotFound' error and sends the query along
+with its hash, and the query is stored in Redis by its hash.
+
+Only queries of authenticated clients no longer than PERSISTED_QUERY_MAX_LENGTH are stored, so that anonymous
+clients can't fill Redis with arbitrary data. Other queries sent with their hashes are executed but not stored.
+"""
+
+# Standard library imports.
+
+import hashlib
+import logging
+
+# Library imports.
+
+from graphql.execution import ExecutionResult, execute
+from graphql.language.parser import parse
+from graphql.language.source import Source
+from graphql.validation import validate
+
+# Project imports.
+
+import lingvodoc.cache.caching as caching
+from lingvodoc.cache.local.cache import LocalCache
+
+
+log = logging.getLogger(__name__)
+
+
+# Parsed documents and their validation errors by query hashes.
+
+document_cache = LocalCache(1024, 86400)
+
+# Persisted queries are stored in Redis for 30 days since their last registration.
+
+PERSISTED_QUERY_EXPIRATION_TIME = 30 * 86400
+
+# Maximum length of stored persisted queries.
+
+PERSISTED_QUERY_MAX_LENGTH = 65536
+
+PERSISTED_QUERY_NOT_FOUND = 'PersistedQueryNotFound'
+
+
+class PersistedQueryError(Exception):
+    pass
+
+
+def query_hash(query_str):
+    return hashlib.sha256(query_str.encode('utf-8')).hexdigest()
+
+
+def persisted_query_key(query_hash):
+    return 'graphql_query:' + query_hash
+
+
+def get_query_string(json_req, register_flag = False):
+    """
+    Returns query string of a JSON query, looking persisted queries up by their hashes and, if registration
+    is allowed, e.g. for authenticated clients, storing queries sent with their hashes.
+
+    Raises PersistedQueryError if the query can't be found or its hash is wrong.
+    """
+
+    query_str = json_req.get('query')
+
+    persisted_dict = (
+        (json_req.get('extensions') or {}).get('persistedQuery'))
+
+    hash_str = (
+        persisted_dict.get('sha256Hash') if persisted_dict else json_req.get('id'))
+
+    if not hash_str:
+
+        if query_str is None:
+            raise PersistedQueryError('query key not found')
+
+        return query_str
+
+    hash_str = str(hash_str).lower()
+
+    # Registering query, if it matches its hash.
+
+    if query_str is not None:
+
+        if query_hash(query_str) != hash_str:
+            raise PersistedQueryError('provided sha does not match query')
+
+        if (register_flag and
+            len(query_str) <= PERSISTED_QUERY_MAX_LENGTH and
+            caching.CACHE):
+
+            caching.CACHE.set(
+                key = persisted_query_key(hash_str),
+                value = query_str,
+                expiration_time = PERSISTED_QUERY_EXPIRATION_TIME)
+
+        return query_str
+
+    # Looking up query by its hash, first among cached documents.
+
+    entry = document_cache.get(hash_str)
+
+    if entry is not None:
+        return entry[0]
+
+    query_str = (
+        caching.CACHE.get(persisted_query_key(hash_str)) if caching.CACHE else None)
+
+    if query_str is None:
+        raise PersistedQueryError(PERSISTED_QUERY_NOT_FOUND)
+
+    return query_str
+
+
+def get_document(schema, query_str):
+    """
+    Returns query string's parsed document and its validation errors, cached by the query's hash.
+    """
+
+    hash_str = query_hash(query_str)
+
+    entry = document_cache.get(hash_str)
+
+    # Checking query string too, just in case.
+
+    if entry is not None and entry[0] == query_str:
+        return entry[1], entry[2]
+
+    document = parse(Source(query_str, 'GraphQL request'))
+    error_list = validate(schema, document)
+
+    document_cache.set(
+        hash_str, (query_str, document, error_list))
+
+    return document, error_list
+
+
+def execute_query(schema, query_str, context_value = None, variable_values = None):
+    """
+    Executes query as schema.execute() does, but with cached parsing and validation.
+    """
+
+    try:
+
+        document, error_list = get_document(schema, query_str)
+
+        if error_list:
+
+            return ExecutionResult(
+                errors = error_list,
+                invalid = True)
+
+        return (
+
+            execute(
+                schema,
+                document,
+                None,
+                context_value,
+                variable_values = variable_values or {}))
+
+    except Exception as exception:
+
+        return ExecutionResult(
+            errors = [exception],
+            invalid = True)
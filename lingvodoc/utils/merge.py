@@ -70,7 +70,7 @@ from lingvodoc.views.v2.utils import (
     unimplemented
 )
 
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 
 
 log = logging.getLogger(__name__)
@@ -134,7 +134,7 @@ def merge_bulk(request, publish_any, group_list):
     return merge_context.result_list
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def merge_bulk_task(task_key, cache_kwargs, sqlalchemy_url, merge_context):
     """
     Performs asynchronous merge.
@@ -90,6 +90,7 @@ from lingvodoc.models import (
 )
 
 from lingvodoc.queue.celery import celery
+from lingvodoc.utils.task_registry import find_task, register_task, task_fingerprint
 from lingvodoc.views.v2.utils import anonymous_userid, message, storage_file, unimplemented
 
 
@@ -97,6 +98,31 @@ from lingvodoc.views.v2.utils import anonymous_userid, message, storage_file, un
 log = logging.getLogger(__name__)
 
 
+# Phonology parameters affecting its results.
+
+PHONOLOGY_ARGUMENT_LIST = [
+    'perspective_cid',
+    'perspective_oid',
+    'group_by_description',
+    'maybe_translation_field',
+    'only_first_translation',
+    'use_automatic_markup',
+    'vowel_selection',
+    'maybe_tier_list',
+    'keep_list',
+    'join_list',
+    'chart_threshold',
+    'generate_csv',
+    'link_field_list',
+    'link_perspective_list',
+    'use_fast_track',
+    'interval_only',
+    'limit',
+    'limit_exception',
+    'limit_no_vowel',
+    'limit_result']
+
+
 def gql_phonology(request, locale_id, args):
     """
     Computes phonology of a specified perspective.
@@ -128,9 +154,35 @@ def gql_phonology(request, locale_id, args):
             Client.get_user_by_client_id(client_id).id
                 if client_id else anonymous_userid(request))
 
+        # Attaching to an identical running task or reusing results of an identical finished one, unless we
+        # are explicitly asked to compute anew.
+
+        fingerprint = None
+
+        if not (args.synchronous or args.no_cache or getattr(args, '__debug_flag__', False)):
+
+            fingerprint = (
+
+                task_fingerprint(
+                    'Phonology compilation',
+                    user_id,
+                    dict(
+                        {name: getattr(args, name, None)
+                            for name in PHONOLOGY_ARGUMENT_LIST},
+                        locale_id = locale_id),
+                    [(args.perspective_cid, args.perspective_oid)] +
+                        [perspective_id for perspective_id, field_id in args.link_perspective_list or []]))
+
+            if find_task(user_id, fingerprint) is not None:
+                return
+
         task_status = TaskStatus(user_id, 'Phonology compilation',
             '{0}: {1}'.format(args.dictionary_name, args.perspective_name), 4)
 
+        if (fingerprint is not None and
+            register_task(user_id, fingerprint, task_status) is not None):
+            return
+
         # Performing either synchronous or asynchronous phonology compilation.
 
         task_key = task_status.key
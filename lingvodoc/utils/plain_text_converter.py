@@ -7,7 +7,7 @@ import urllib
 
 import graphene
 from sqlalchemy import create_engine
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 
 from lingvodoc.cache.caching import TaskStatus, initialize_cache
 from lingvodoc.models import (
@@ -324,7 +324,7 @@ def get_translation_gist_id(translation_atoms, client_id, gist_type):
     return translation_gist_id
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def convert_start(ids, corpus_inf, columns_inf, cache_kwargs, sqlalchemy_url, task_key):
     """
     TODO: change the description below
@@ -0,0 +1,197 @@
+"""
+Caching of dictionary search results.
+
+Lists of ids of lexical entries found by a search are cached in Redis by a hash of the search's normalized
+arguments and of search versions of perspectives it looks through. Search versions are random stamps
+changed after commit of any transaction changing lexical entries, entities or their publishing state in
+a perspective, see lingvodoc.models.collect_search_changes(), so that cached results of changed
+perspectives are never used again and simply expire.
+
+Cached results expire in SEARCH_CACHE_EXPIRATION_TIME seconds, and results with more than
+SEARCH_CACHE_MAX_ENTRY_COUNT lexical entries are not cached, which bounds memory used by the cache.
+"""
+
+# Standard library imports.
+
+import hashlib
+import json
+import logging
+import uuid
+
+# Library imports.
+
+from sqlalchemy import tuple_
+
+# Project imports.
+
+import lingvodoc.cache.caching as caching
+
+from lingvodoc.models import (
+    DBSession,
+    DictionaryPerspective as dbPerspective,
+    LexicalEntry as dbLexicalEntry,
+    search_version_key)
+
+from lingvodoc.utils import ids_to_id_query
+from lingvodoc.utils.task_registry import canonical_value
+
+
+# Setting up logging.
+log = logging.getLogger(__name__)
+
+
+SEARCH_CACHE_EXPIRATION_TIME = 3600
+
+SEARCH_CACHE_MAX_ENTRY_COUNT = 65536
+
+
+def search_versions(perspective_id_list):
+    """
+    Returns global search version and search versions of specified perspectives, initializing missing
+    versions.
+
+    Missing versions, e.g. of perspectives not changed since the cache was flushed, get new random values,
+    so that results cached with their previous values are not used.
+    """
+
+    key_list = (
+        [search_version_key(None)] +
+        [search_version_key(perspective_id) for perspective_id in perspective_id_list])
+
+    version_list = caching.CACHE.get(key_list)
+
+    missing_dict = {}
+
+    for index, (key, version) in enumerate(zip(key_list, version_list)):
+
+        if version is None:
+
+            version = uuid.uuid4().hex
+
+            missing_dict[key] = version
+            version_list[index] = version
+
+    if missing_dict:
+        caching.CACHE.set(key_value = missing_dict)
+
+    return version_list
+
+
+def search_cache_key(search_name, argument_dict, dictionary_query):
+    """
+    Computes cache key of search results from search's name, its arguments and the state of perspectives
+    of dictionaries it looks through.
+
+    Arguments are encoded as JSON with sorted keys, so that their order does not matter.
+    """
+
+    if not caching.CACHE:
+        return None
+
+    perspective_list = (
+
+        DBSession
+
+            .query(
+                dbPerspective.client_id,
+                dbPerspective.object_id,
+                dbPerspective.state_translation_gist_client_id,
+                dbPerspective.state_translation_gist_object_id)
+
+            .filter(
+                dbPerspective.marked_for_deletion == False,
+
+                tuple_(
+                    dbPerspective.parent_client_id,
+                    dbPerspective.parent_object_id)
+
+                    .in_(
+                        DBSession.query(dictionary_query.cte())))
+
+            .order_by(
+                dbPerspective.client_id,
+                dbPerspective.object_id)
+
+            .all())
+
+    perspective_id_list = [
+        (client_id, object_id)
+        for client_id, object_id, _, _ in perspective_list]
+
+    key_str = (
+
+        json.dumps(
+            [search_name,
+                argument_dict,
+                [list(perspective) for perspective in perspective_list],
+                search_versions(perspective_id_list)],
+            sort_keys = True,
+            default = canonical_value))
+
+    return (
+        'search_result:' +
+        hashlib.sha256(key_str.encode('utf-8')).hexdigest())
+
+
+def get_entry_id_list(cache_key):
+    """
+    Returns cached list of ids of found lexical entries, or None if there are no cached results.
+    """
+
+    if not cache_key or not caching.CACHE:
+        return None
+
+    entry_id_list = caching.CACHE.get(cache_key)
+
+    if entry_id_list is None:
+        return None
+
+    return [tuple(entry_id) for entry_id in entry_id_list]
+
+
+def set_entry_id_list(cache_key, entry_id_list):
+    """
+    Caches list of ids of found lexical entries, if it is not too long.
+    """
+
+    if (not cache_key or
+        not caching.CACHE or
+        len(entry_id_list) > SEARCH_CACHE_MAX_ENTRY_COUNT):
+        return
+
+    caching.CACHE.set(
+        key = cache_key,
+        value = [list(entry_id) for entry_id in entry_id_list],
+        expiration_time = SEARCH_CACHE_EXPIRATION_TIME)
+
+
+def get_entry_list(entry_id_list):
+    """
+    Loads undeleted lexical entries with specified ids, in the order of ids.
+    """
+
+    if not entry_id_list:
+        return []
+
+    id_cte = (
+        ids_to_id_query(entry_id_list).cte())
+
+    entry_dict = {
+
+        entry.id: entry
+
+        for entry in DBSession
+
+            .query(dbLexicalEntry)
+
+            .filter(
+                dbLexicalEntry.marked_for_deletion == False,
+                dbLexicalEntry.client_id == id_cte.c.client_id,
+                dbLexicalEntry.object_id == id_cte.c.object_id)
+
+            .all()}
+
+    return [
+        entry_dict[entry_id]
+        for entry_id in entry_id_list
+        if entry_id in entry_dict]
@@ -52,7 +52,7 @@ from lingvodoc.utils.creation import (create_perspective,
 from lingvodoc.utils.search import translation_gist_search, get_id_to_field_dict
 
 from lingvodoc.scripts.convert_five_tiers import convert_all
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 
 from lingvodoc.cache.caching import CACHE
 
@@ -692,15 +692,17 @@ def convert_start(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task
 
                 for number in csv_data["NUMBER"]:  # range()
                     le_client_id, le_object_id = client_id, obj_id.next
-                    lexentr = dbLexicalEntry(object_id=le_object_id,
-                                             client_id=le_client_id,
-                                             parent_client_id=perspective_id[0],
-                                             parent_object_id=perspective_id[1])
-                    DBSession.add(lexentr)
                     le_list.append((le_client_id, le_object_id))
                     persp_to_lexentry[blob_id][number] = (le_client_id, le_object_id)
                     #number += 1
-                #DBSession.bulk_save_objects(le_list)
+
+                # Creating lexical entries and entities in bulk.
+
+                dbLexicalEntry.bulk_create([
+                    {'id': lexentr_tuple, 'parent_id': perspective_id}
+                    for lexentr_tuple in le_list])
+
+                entity_list = []
 
                 i = 0
                 for lexentr_tuple in le_list:
@@ -710,27 +712,20 @@ def convert_start(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task
 
                         if col_data:
 
-                            new_ent = (
-
-                                create_entity(
-                                    id = obj_id.id_pair(client_id),
-                                    parent_id = lexentr_tuple,
-                                    additional_metadata = None,
-                                    field_id = field_id,
-                                    self_id = None,
-                                    link_id = None,
-                                    locale_id = ENGLISH_LOCALE,
-                                    filename = None,
-                                    content = col_data,
-                                    registry = None,
-                                    request = None,
-                                    save_object = False))
-
-                            CACHE.set(objects = [new_ent, ], DBSession=DBSession)
-                            # DBSession.add(new_ent)
+                            entity_list.append({
+                                'id': obj_id.id_pair(client_id),
+                                'parent_id': lexentr_tuple,
+                                'field_id': field_id,
+                                'locale_id': ENGLISH_LOCALE,
+                                'content': col_data,
+                                'accepted': True})
+
                     i+=1
+
+                dbEntity.bulk_create(entity_list)
             task_status.set(5, 70, "link, spread" )
             tag_list = list()
+            entity_list = []
             d = dict()
             for starling_dictionary in starling_dictionaries:
                 blob_id = tuple(starling_dictionary.get("blob_id"))
@@ -762,24 +757,16 @@ def convert_start(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task
                             lexical_entry_ids = persp_to_lexentry[blob_id][link_pair[0]]
                             perspective = blob_to_perspective[new_blob_link]
 
-                            new_ent = (
-
-                                create_entity(
-                                    id = obj_id.id_pair(client_id),
-                                    parent_id = lexical_entry_ids,
-                                    additional_metadata = {
-                                        "link_perspective_id": perspective.id},
-                                    field_id = relation_field_id,
-                                    self_id = None,
-                                    link_id = link_lexical_entry,
-                                    locale_id = ENGLISH_LOCALE,
-                                    filename = None,
-                                    content = None,
-                                    registry = None,
-                                    request = None,
-                                    save_object = True))
-
-                            # DBSession.add(new_ent)
+                            entity_list.append({
+                                'id': obj_id.id_pair(client_id),
+                                'parent_id': lexical_entry_ids,
+                                'additional_metadata': {
+                                    "link_perspective_id": perspective.id},
+                                'field_id': relation_field_id,
+                                'link_id': link_lexical_entry,
+                                'locale_id': ENGLISH_LOCALE,
+                                'accepted': True})
+
                             le_links[lexical_entry_ids][new_blob_link] = link_lexical_entry
                             # etymology tag
                             #"""
@@ -789,17 +776,19 @@ def convert_start(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task
                                 tag = "%s_%s_%s_%s" % (num_col, str(new_blob_link), str(link_lexical_entry), timestamp)
                                 if not tag in etymology_set:
                                     etymology_set.add(tag)
-                                    tag_entity = dbEntity(client_id=client.id, object_id=obj_id.next,
-                                        field_client_id=etymology_field_id[0], field_object_id=etymology_field_id[1], parent_client_id=link_lexical_entry[0], parent_object_id=link_lexical_entry[1], content=tag)
                                     # additional_metadata num_col
-                                    tag_entity.publishingentity.accepted = True
-                                    # DBSession.add(tag_entity)
-                                    CACHE.set(objects = [tag_entity, ], DBSession=DBSession)
-                                tag_entity = dbEntity(client_id=client.id, object_id=obj_id.next,
-                                    field_client_id=etymology_field_id[0], field_object_id=etymology_field_id[1], parent_client_id=lexical_entry_ids[0], parent_object_id=lexical_entry_ids[1], content=tag)
-                                tag_entity.publishingentity.accepted = True
-                                # DBSession.add(tag_entity)
-                                CACHE.set(objects = [tag_entity, ], DBSession=DBSession)
+                                    entity_list.append({
+                                        'id': obj_id.id_pair(client.id),
+                                        'field_id': etymology_field_id,
+                                        'parent_id': link_lexical_entry,
+                                        'content': tag,
+                                        'accepted': True})
+                                entity_list.append({
+                                    'id': obj_id.id_pair(client.id),
+                                    'field_id': etymology_field_id,
+                                    'parent_id': lexical_entry_ids,
+                                    'content': tag,
+                                    'accepted': True})
 
 
 
@@ -818,25 +807,16 @@ def convert_start(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task
 
                                 if word:
 
-                                    new_ent = (
-
-                                        create_entity(
-                                            id = obj_id.id_pair(client_id),
-                                            parent_id = link_lexical_entry,
-                                            additional_metadata = None,
-                                            field_id = field_id,
-                                            self_id = None,
-                                            link_id = None,
-                                            locale_id = ENGLISH_LOCALE,
-                                            filename = None,
-                                            content = word,
-                                            registry = None,
-                                            request = None,
-                                            save_object = False))
-
-                                    # DBSession.add(new_ent)
-                                    CACHE.set(objects = [new_ent, ], DBSession=DBSession)
+                                    entity_list.append({
+                                        'id': obj_id.id_pair(client_id),
+                                        'parent_id': link_lexical_entry,
+                                        'field_id': field_id,
+                                        'locale_id': ENGLISH_LOCALE,
+                                        'content': word,
+                                        'accepted': True})
                         #i+=1
+
+            dbEntity.bulk_create(entity_list)
             DBSession.flush()
 
     except Exception as exception:
@@ -864,7 +844,7 @@ def convert_start(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task
     # ps.print_callers()
     # print(s.getvalue())
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def convert_start_async(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task_key):
     convert_start(ids, starling_dictionaries, cache_kwargs, sqlalchemy_url, task_key)
 
@@ -0,0 +1,268 @@
+
+# Standard library imports.
+
+import hashlib
+import json
+import logging
+import time
+
+# Library imports.
+
+from sqlalchemy import and_, cast, func, Integer, tuple_
+
+# Project imports.
+
+import lingvodoc.cache.caching as caching
+from lingvodoc.cache.caching import TaskStatus
+
+from lingvodoc.models import (
+    DBSession,
+    Entity as dbEntity,
+    LexicalEntry as dbLexicalEntry,
+    PublishingEntity as dbPublishingEntity)
+
+
+# Setting up logging.
+log = logging.getLogger(__name__)
+
+
+# Registered tasks are found by fingerprints for a day.
+
+REGISTRY_EXPIRATION_TIME = 86400
+
+# Unfinished registered tasks which have not updated their statuses for this many seconds, e.g. because their
+# workers died, are not attached to.
+
+REGISTRY_STALE_TIME = 3600
+
+# Maximum number of attempts to register a task, each concurrent registration can make an attempt fail.
+
+REGISTRY_ATTEMPT_COUNT = 3
+
+
+def data_version(perspective_id_list):
+    """
+    Computes data version stamp of specified perspectives, which changes with any creation, deletion,
+    publishing or accepting of their lexical entries and entities.
+
+    Lexical entries and entities are never updated in place, an edit creates a new entity and marks the
+    previous one as deleted, so counts and latest creation time suffice.
+    """
+
+    perspective_id_list = (
+        sorted(set(tuple(perspective_id) for perspective_id in perspective_id_list)))
+
+    if not perspective_id_list:
+        return []
+
+    row = (
+
+        DBSession
+
+            .query(
+                func.count(dbLexicalEntry.object_id.distinct()),
+                func.count(dbEntity.object_id),
+                func.max(dbEntity.created_at),
+                func.sum(cast(dbLexicalEntry.marked_for_deletion, Integer)),
+                func.sum(cast(dbEntity.marked_for_deletion, Integer)),
+                func.sum(cast(dbPublishingEntity.published, Integer)),
+                func.sum(cast(dbPublishingEntity.accepted, Integer)))
+
+            .outerjoin(dbEntity, and_(
+                dbEntity.parent_client_id == dbLexicalEntry.client_id,
+                dbEntity.parent_object_id == dbLexicalEntry.object_id))
+
+            .outerjoin(dbPublishingEntity, and_(
+                dbPublishingEntity.client_id == dbEntity.client_id,
+                dbPublishingEntity.object_id == dbEntity.object_id))
+
+            .filter(
+                tuple_(
+                    dbLexicalEntry.parent_client_id,
+                    dbLexicalEntry.parent_object_id)
+                    .in_(perspective_id_list))
+
+            .one())
+
+    return [perspective_id_list] + [
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in row]
+
+
+def canonical_value(value):
+    """
+    Encodes values JSON can't encode by itself, sets are encoded as sorted lists.
+    """
+
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key = str)
+
+    return str(value)
+
+
+def task_fingerprint(task_family, user_id, argument_dict, perspective_id_list):
+    """
+    Computes fingerprint of a task from its user, arguments and data version stamp of perspectives it
+    processes.
+
+    Arguments are encoded as JSON with sorted keys, so that their order does not matter.
+    """
+
+    fingerprint_str = (
+
+        json.dumps(
+            [task_family,
+                str(user_id),
+                argument_dict,
+                data_version(perspective_id_list)],
+            sort_keys = True,
+            default = canonical_value))
+
+    return hashlib.sha256(
+        fingerprint_str.encode('utf-8')).hexdigest()
+
+
+def registry_key(fingerprint):
+    return 'task_registry:' + fingerprint
+
+
+def task_is_stale(task_status):
+    """
+    Checks if an unfinished task has not updated its status for too long, e.g. because its worker died.
+    """
+
+    updated_at = (
+        getattr(task_status, 'updated_at', None) or
+        getattr(task_status, 'created_at', None) or 0)
+
+    return time.time() - updated_at > REGISTRY_STALE_TIME
+
+
+def find_registered_task(user_id, fingerprint, task_key):
+    """
+    Checks if the registered task with the specified key can be used instead of an identical new task.
+
+    Returns its status if it is still running. If it finished successfully, returns status of a new finished
+    task with its results. Otherwise, i.e. if it failed, is stale or is missing, returns None.
+    """
+
+    task_dict = caching.CACHE.hash_get(task_key)
+
+    if not task_dict:
+        return None
+
+    task_status = TaskStatus.from_dict(task_dict)
+
+    # Failed tasks either have negative progress or have 'ERROR' in their status.
+
+    if (task_status.progress < 0 or
+        'ERROR' in task_status.status):
+
+        return None
+
+    if task_status.progress < 100:
+
+        if task_is_stale(task_status):
+
+            log.debug(
+                'task {0}: registered task {1} is stale'.format(
+                    fingerprint, task_key))
+
+            return None
+
+        log.debug(
+            'task {0}: attaching to running task {1}'.format(
+                fingerprint, task_key))
+
+        return task_status
+
+    if not task_status.result_link_list:
+        return None
+
+    log.debug(
+        'task {0}: reusing results of task {1}'.format(
+            fingerprint, task_key))
+
+    reused_status = (
+
+        TaskStatus(
+            user_id,
+            task_status.task_family,
+            task_status.task_details,
+            task_status.total_stages))
+
+    reused_status.set(
+        task_status.total_stages,
+        100,
+        'Finished, results of an identical task',
+        result_link_list = task_status.result_link_list)
+
+    return reused_status
+
+
+def find_task(user_id, fingerprint):
+    """
+    Finds a task with the specified fingerprint, see find_registered_task().
+
+    Used to avoid creating status of a new task if an identical task is already registered; registration of a
+    new task, see register_task(), still has to be checked.
+    """
+
+    if not caching.CACHE:
+        return None
+
+    task_key = caching.CACHE.get(registry_key(fingerprint))
+
+    if not task_key:
+        return None
+
+    return find_registered_task(user_id, fingerprint, task_key)
+
+
+def register_task(user_id, fingerprint, task_status):
+    """
+    Registers new task with the specified fingerprint, so that identical tasks can be found.
+
+    Registration is atomic, so that of concurrently started identical tasks only one is registered. If an
+    identical task which can be used instead is already registered, status of the new task is deleted and
+    status of the identical task, see find_registered_task(), is returned. Otherwise the new task is
+    registered, replacing registration of a failed or stale task if required, and None is returned.
+    """
+
+    if not caching.CACHE:
+        return None
+
+    key = registry_key(fingerprint)
+
+    for i in range(REGISTRY_ATTEMPT_COUNT):
+
+        if caching.CACHE.set_if_absent(
+            key, task_status.key, REGISTRY_EXPIRATION_TIME):
+
+            return None
+
+        task_key = caching.CACHE.get(key)
+
+        # Registration expired or was replaced just now, trying again.
+
+        if not task_key:
+            continue
+
+        registered_status = (
+            find_registered_task(user_id, fingerprint, task_key))
+
+        if registered_status is not None:
+
+            task_status.delete()
+            return registered_status
+
+        # Registered task can't be used, removing its registration, unless someone else has already
+        # replaced it.
+
+        caching.CACHE.delete_if_equal(key, task_key)
+
+    log.warning(
+        'task {0}: failed to register task {1} in {2} attempts'.format(
+            fingerprint, task_status.key, REGISTRY_ATTEMPT_COUNT))
+
+    return None
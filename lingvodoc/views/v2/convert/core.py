@@ -9,7 +9,8 @@ from lingvodoc.models import (
 from lingvodoc.scripts.lingvodoc_converter import convert_one
 from lingvodoc.queue.celery import (
     celery,
-    celery_engine
+    celery_engine,
+    IO_QUEUE
 )
 
 
@@ -18,7 +19,7 @@ import logging
 log = logging.getLogger(__name__)
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_convert_dictionary(client_id, object_id, parent_client_id, parent_object_id, dictionary_client_id,
                              dictionary_object_id, perspective_client_id, perspective_object_id, user_id,
                              task_id=None):
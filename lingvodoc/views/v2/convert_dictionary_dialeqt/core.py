@@ -1,6 +1,6 @@
 from lingvodoc.scripts.dictionary_dialeqt_converter import convert_all
-from lingvodoc.queue.celery import celery
-@celery.task
+from lingvodoc.queue.celery import celery, IO_QUEUE
+@celery.task(queue = IO_QUEUE)
 def async_convert_dictionary_new(dictionary_client_id,
                                  dictionary_object_id,
                                  blob_client_id,
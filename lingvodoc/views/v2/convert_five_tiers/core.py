@@ -1,7 +1,7 @@
 from lingvodoc.scripts.convert_five_tiers import convert_all
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_convert_dictionary_new(client_id,
                                  origin_client_id,
                                  origin_object_id,
@@ -1,8 +1,8 @@
 from lingvodoc.scripts.desktop_sync import download_dictionary
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_download_dictionary(client_id, object_id, central_server, storage,
                               sqlalchemy_url, cookies,
                               task_key,
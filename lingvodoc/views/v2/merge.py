@@ -59,7 +59,7 @@ from lingvodoc.models import (
     user_to_organization_association
 )
 
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 from lingvodoc.schema.gql_holders import del_object
 from lingvodoc.utils.static_fields import fields_static
 
@@ -2768,7 +2768,7 @@ def merge_bulk_task_try(task_status, merge_context):
         return False, traceback_string
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def merge_bulk_task(task_key, cache_kwargs, sqlalchemy_url, merge_context):
     """
     Performs asynchronous merge.
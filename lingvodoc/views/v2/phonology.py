@@ -73,6 +73,7 @@ import xlsxwriter
 
 # Project imports.
 
+from lingvodoc.cache import codec
 import lingvodoc.cache.caching as caching
 from lingvodoc.cache.caching import CACHE, initialize_cache, TaskStatus
 
@@ -90,7 +91,7 @@ from lingvodoc.models import (
     TranslationAtom
 )
 
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, HEAVY_QUEUE, IO_QUEUE
 from lingvodoc.utils import sanitize_worksheet_name
 from lingvodoc.views.v2.utils import anonymous_userid, as_storage_file, message, storage_file, unimplemented
 
@@ -1728,6 +1729,31 @@ class Tier_Result(object):
             width = 192)
 
 
+# Cached analysis results are encoded as lists of Tier_Result constructor arguments, the version must be
+# changed along with these arguments.
+
+codec.register_class(
+    16,
+    Tier_Result,
+    ['transcription',
+        'total_interval_length',
+        'mean_interval_length',
+        'max_length_str',
+        'max_length_r_length',
+        'max_length_i_list',
+        'max_length_f_list',
+        'max_length_source_index',
+        'max_intensity_str',
+        'max_intensity_r_length',
+        'max_intensity_i_list',
+        'max_intensity_f_list',
+        'max_intensity_source_index',
+        'coincidence_str',
+        'interval_data_list',
+        'source_interval_list'],
+    version = 1)
+
+
 def before_after_text(index, interval_list, join_set = None):
     """
     Extracts any preceeding or following markup to be joined to an interval's text.
@@ -3911,7 +3937,7 @@ def std_phonology(args, task_key, cache_kwargs, storage, sqlalchemy_url):
         return {'error': 'external error'}
 
 
-@celery.task
+@celery.task(queue = HEAVY_QUEUE)
 def async_phonology(args, task_key, cache_kwargs, storage, sqlalchemy_url):
     """
     Asynchronous phonology compilation.
@@ -5647,7 +5673,7 @@ def std_sound_and_markup(
         return {'error': 'external error'}
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_sound_and_markup(
     task_key,
     perspective_cid, perspective_oid, published_mode, limit,
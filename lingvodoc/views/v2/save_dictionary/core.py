@@ -1,8 +1,8 @@
 from lingvodoc.scripts.save_dictionary import save_dictionary
-from lingvodoc.queue.celery import celery
+from lingvodoc.queue.celery import celery, IO_QUEUE
 
 
-@celery.task
+@celery.task(queue = IO_QUEUE)
 def async_save_dictionary(client_id,
                           object_id,
                           storage,
@@ -1,5 +1,6 @@
 __author__ = 'alexander'
 
+from lingvodoc.acl import mark_acl_changed
 from lingvodoc.exceptions import CommonException
 from lingvodoc.models import (
     BaseGroup,
@@ -275,6 +276,7 @@ def basic_sync(request):
         if not DBSession.query(user_to_group_association).filter_by(user_id=entry[0], group_id=entry[1]).first():
             insertion = user_to_group_association.insert().values(user_id=entry[0], group_id=entry[1])
             DBSession.execute(insertion)
+            mark_acl_changed()
 
     existing = [row2dict(entry) for entry in
                 DBSession.query(ObjectTOC).filter(ObjectTOC.table_name.in_(['language',
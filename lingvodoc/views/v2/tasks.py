@@ -1,9 +1,16 @@
 import base64
 from hashlib import md5
+import lingvodoc.cache.caching as caching
 from lingvodoc.cache.caching import TaskStatus
 from lingvodoc.models import Client
+from lingvodoc.queue.celery import (
+    QUEUE_LIST,
+    USER_LIMIT_DICT,
+    USER_SEMAPHORE_TIMEOUT,
+    user_semaphore_key)
+from lingvodoc.queue.client import QueueClient
 from lingvodoc.views.v2.utils import anonymous_userid
-from pyramid.response import Response
+from pyramid.httpexceptions import HTTPBadRequest
 from pyramid.security import authenticated_userid
 from pyramid.view import view_config
 
@@ -11,19 +18,81 @@ import logging
 log = logging.getLogger(__name__)
 
 
-@view_config(route_name='tasks', renderer='json', request_method='GET')
-def get_tasks(request):
+# Number of seconds a client should wait before polling again if a long-polling request can't wait.
+TASK_POLL_RETRY_AFTER = 5
+
+
+def get_task_user_id(request):
+    """
+    Returns id of the user whose tasks are requested, None if the user is not found.
+    """
     client_id = authenticated_userid(request)
-    # if not client_id:
-    #     return []
     if not client_id:
-        tasks = TaskStatus.get_user_tasks(anonymous_userid(request), clear_out=True)
-        return tasks
-    user = Client.get_user_by_client_id(authenticated_userid(request))
+        return anonymous_userid(request)
+    user = Client.get_user_by_client_id(client_id)
     if not user:
-        return []
-    tasks = TaskStatus.get_user_tasks(user.id, clear_out=True)
-    return tasks
+        return None
+    return user.id
+
+
+@view_config(route_name='tasks', renderer='json', request_method='GET')
+def get_tasks(request):
+    """
+    Returns statuses of user's tasks.
+
+    With a 'since' parameter it is a long-poll: if the version of user's task statuses is the same as
+    'since', waits for an update for at most TaskStatus.poll_timeout seconds, then returns the current
+    version and the statuses. If the request can't wait, the result also has 'retry_after', number of seconds
+    to wait before polling again.
+    """
+    user_id = get_task_user_id(request)
+    since = request.params.get('since')
+    if since is None:
+        if user_id is None:
+            return []
+        tasks = TaskStatus.get_user_tasks(user_id, clear_out=True)
+        return tasks
+    try:
+        since = int(since)
+    except ValueError:
+        request.response.status = HTTPBadRequest.code
+        return {'error': "invalid 'since' version"}
+    if user_id is None:
+        return {'version': 0, 'tasks': [], 'retry_after': TASK_POLL_RETRY_AFTER}
+    result = {}
+    version = TaskStatus.get_user_version(user_id)
+    if version == since:
+        if not TaskStatus.wait_user_tasks(user_id, since):
+            result['retry_after'] = TASK_POLL_RETRY_AFTER
+        version = TaskStatus.get_user_version(user_id)
+    result['version'] = version
+    result['tasks'] = TaskStatus.get_user_tasks(user_id, clear_out=True)
+    return result
+
+
+@view_config(route_name='task_queues', renderer='json', request_method='GET')
+def task_queues(request):
+    """
+    Returns numbers of tasks waiting in each queue and, for queues with per-user limits, numbers of user's
+    running tasks and the limits.
+    """
+    try:
+        queue_depth = QueueClient.get_queue_depth()
+    except Exception as exception:
+        log.warning('task_queues: failed to get queue depth: {0}'.format(exception))
+        queue_depth = {}
+    user_id = get_task_user_id(request)
+    result = {}
+    for queue in QUEUE_LIST:
+        queue_dict = {'depth': queue_depth.get(queue)}
+        limit = USER_LIMIT_DICT.get(queue)
+        if limit:
+            queue_dict['user_limit'] = limit
+            if user_id is not None and caching.CACHE:
+                queue_dict['user_running'] = caching.CACHE.semaphore_count(
+                    user_semaphore_key(queue, user_id), USER_SEMAPHORE_TIMEOUT)
+        result[queue] = queue_dict
+    return result
 
 
 @view_config(route_name='delete_task', renderer='json', request_method='DELETE')
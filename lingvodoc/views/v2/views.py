@@ -76,6 +76,10 @@ from sqlalchemy.orm.attributes import flag_modified
 from lingvodoc.schema.query import schema, Context
 
 from lingvodoc.utils.creation import translationgist_contents
+from lingvodoc.utils.graphql_document import (
+    execute_query,
+    get_query_string,
+    PersistedQueryError)
 from lingvodoc.utils.proxy import ProxyPass
 from lingvodoc.utils.verification import check_client_id
 
@@ -1145,6 +1149,10 @@ def graphql(request):
         {"variables": {}, "query": "query myQuery{ entity(id:[ 742, 5494, ] ) { id}}"}
     ]
 
+    or a persisted query, see lingvodoc.utils.graphql_document:
+
+    {"variables": {}, "extensions": {"persistedQuery": {"version": 1, "sha256Hash": "<query sha256>"}}}
+
     #####################
     ### application/graphql
     #####################
@@ -1199,11 +1207,11 @@ def graphql(request):
             json_req = (
                 json.loads(request_string))
 
-            if "query" not in json_req:
-                return {'errors': [{"message": 'query key not found'}]}
-
-            request_string = (
-                json_req["query"].rstrip())
+            try:
+                request_string = (
+                    get_query_string(json_req, client_id is not None).rstrip())
+            except PersistedQueryError as error:
+                return {'errors': [{"message": str(error)}]}
 
             if "variables" in json_req:
                 variable_values = json_req["variables"]
@@ -1238,10 +1246,10 @@ def graphql(request):
 
             if type(json_req) is not list:
 
-                if "query" not in json_req:
-                    return {'errors': [{"message": 'query key not found'}]}
-
-                request_string = json_req["query"]
+                try:
+                    request_string = get_query_string(json_req, client_id is not None)
+                except PersistedQueryError as error:
+                    return {'errors': [{"message": str(error)}]}
 
                 if "variables" in json_req:
                     variable_values = json_req["variables"]
@@ -1278,13 +1286,16 @@ def graphql(request):
 
             for query in json_req:
 
-                if "query" not in query:
-                    return {'errors': [{"message": 'query key not found'}]}
+                try:
+                    query_string = get_query_string(query, client_id is not None)
+                except PersistedQueryError as error:
+                    return {'errors': [{"message": str(error)}]}
 
                 result_item = (
 
-                    schema.execute(
-                        query["query"],
+                    execute_query(
+                        schema,
+                        query_string,
                         context_value = context,
                         variable_values = query.get("variables", {})))
 
@@ -1321,7 +1332,8 @@ def graphql(request):
 
             result = (
 
-                schema.execute(
+                execute_query(
+                    schema,
                     request_string,
                     context_value = context,
                     variable_values = variable_values))
@@ -0,0 +1,361 @@
+#
+# NOTE
+#
+# See information on how tests are organized and how they should work in the tests' package __init__.py file
+# (currently lingvodoc/tests/__init__.py).
+#
+# Tests of maintenance of search tokens of entities after flushes, see
+# lingvodoc.models.update_flushed_search_tokens(), and of dictionary search through search tokens, see
+# lingvodoc.schema.gql_search.content_substring_condition().
+#
+
+
+import transaction
+
+from tests.tests import MyTestCase
+
+import lingvodoc.models as models
+
+from lingvodoc.models import (
+    Client,
+    DBSession,
+    Dictionary,
+    DictionaryPerspective,
+    ENGLISH_LOCALE,
+    Entity,
+    Field,
+    Language,
+    LexicalEntry,
+    SearchToken,
+    TranslationAtom,
+    TranslationGist,
+)
+
+from lingvodoc.schema.gql_search import (
+    get_text_field_cte,
+    search_mechanism,
+    search_mechanism_simple,
+)
+
+
+def create_test_data(content_list, perspective_count = 1):
+    """
+    Creates a dictionary with perspectives and a text field, and an entry with an accepted entity of the
+    text field in the first perspective for each specified content.
+
+    Returns ids of the dictionary, of the perspectives, of the field, of the entries and of the entities.
+    """
+
+    with transaction.manager:
+
+        client_id = DBSession.query(Client.id).order_by(Client.id).first()[0]
+        language = DBSession.query(Language).first()
+
+        gist = TranslationGist(client_id = client_id, type = 'Service')
+        DBSession.add(gist)
+
+        # Field data type is 'Text', so that the field is one of the text fields search looks through.
+
+        DBSession.add(
+
+            TranslationAtom(
+                client_id = client_id,
+                parent = gist,
+                locale_id = ENGLISH_LOCALE,
+                content = 'Text'))
+
+        gist_kwargs = {
+            'translation_gist_client_id': gist.client_id,
+            'translation_gist_object_id': gist.object_id}
+
+        state_kwargs = {
+            'state_translation_gist_client_id': gist.client_id,
+            'state_translation_gist_object_id': gist.object_id}
+
+        dictionary = (
+
+            Dictionary(
+                client_id = client_id,
+                parent = language,
+                **gist_kwargs,
+                **state_kwargs))
+
+        DBSession.add(dictionary)
+
+        perspective_list = []
+
+        for _ in range(perspective_count):
+
+            perspective = (
+
+                DictionaryPerspective(
+                    client_id = client_id,
+                    parent = dictionary,
+                    **gist_kwargs,
+                    **state_kwargs))
+
+            DBSession.add(perspective)
+            perspective_list.append(perspective)
+
+        field = (
+
+            Field(
+                client_id = client_id,
+                data_type_translation_gist_client_id = gist.client_id,
+                data_type_translation_gist_object_id = gist.object_id,
+                **gist_kwargs))
+
+        DBSession.add(field)
+
+        entry_list = []
+        entity_list = []
+
+        for content in content_list:
+
+            entry = (
+
+                LexicalEntry(
+                    client_id = client_id,
+                    parent = perspective_list[0]))
+
+            DBSession.add(entry)
+            entry_list.append(entry)
+
+            entity = (
+
+                Entity(
+                    client_id = client_id,
+                    parent = entry,
+                    field = field,
+                    content = content,
+                    accepted = True))
+
+            DBSession.add(entity)
+            entity_list.append(entity)
+
+        DBSession.flush()
+
+        return (
+            dictionary.id,
+            [perspective.id for perspective in perspective_list],
+            field.id,
+            [entry.id for entry in entry_list],
+            [entity.id for entity in entity_list])
+
+
+class SearchTokenTest(MyTestCase):
+
+    def setUp(self):
+
+        super(SearchTokenTest, self).setUp()
+
+        (_,
+            self.perspective_id_list,
+            self.field_id,
+            (self.entry_id,),
+            (self.entity_id,)) = (
+
+            create_test_data(['кошка  сидит'], 2))
+
+    def token_set(self):
+        """
+        Returns tokens of the test entity with their fields and perspectives.
+        """
+
+        return set(
+
+            DBSession
+
+                .query(
+                    SearchToken.token,
+                    SearchToken.field_client_id,
+                    SearchToken.field_object_id,
+                    SearchToken.perspective_client_id,
+                    SearchToken.perspective_object_id)
+
+                .filter_by(
+                    entity_client_id = self.entity_id[0],
+                    entity_object_id = self.entity_id[1])
+
+                .all())
+
+    def expected_set(self, token_list, perspective_id):
+
+        return {
+            (token,) + tuple(self.field_id) + tuple(perspective_id)
+            for token in token_list}
+
+    def test_create(self):
+
+        self.assertEqual(
+            self.token_set(),
+            self.expected_set(['кошка', 'сидит'], self.perspective_id_list[0]))
+
+    def test_change(self):
+
+        with transaction.manager:
+
+            entity = DBSession.query(Entity).get(self.entity_id[::-1])
+            entity.content = 'Собака лежит '
+
+        self.assertEqual(
+            self.token_set(),
+            self.expected_set(['Собака', 'лежит'], self.perspective_id_list[0]))
+
+    def test_delete(self):
+
+        with transaction.manager:
+
+            entity = DBSession.query(Entity).get(self.entity_id[::-1])
+            entity.marked_for_deletion = True
+
+        self.assertEqual(self.token_set(), set())
+
+    def test_move(self):
+
+        # Tokens of entities of a moved lexical entry get its new perspective, though the entities
+        # themselves are not changed.
+
+        with transaction.manager:
+
+            entry = DBSession.query(LexicalEntry).get(self.entry_id[::-1])
+
+            entry.parent_client_id = self.perspective_id_list[1][0]
+            entry.parent_object_id = self.perspective_id_list[1][1]
+
+        self.assertEqual(
+            self.token_set(),
+            self.expected_set(['кошка', 'сидит'], self.perspective_id_list[1]))
+
+
+class SearchResultTest(MyTestCase):
+    """
+    Checks that substring search gives the same results with and without search tokens.
+
+    Contents have whitespace which is split into tokens in the DB and whitespace which is not, e.g.
+    no-break spaces, which Python's str.isspace() nevertheless considers whitespace, and diacritics,
+    including spacing ones which diacritic_xform() turns into spaces.
+    """
+
+    content_list = [
+        'кошка сидит',
+        'Ко\u0301шка\tлежит\nна печи',
+        'собака\u00a0бежит',
+        'домашняя\u2003кошка\u3000спит',
+        'a\u00a8b  c',
+        'кот\u202fи\u2007мышь',
+        '100%_готово']
+
+    search_str_list = [
+        'кошка',
+        'КОШ',
+        'ко\u0301шка',
+        'шка\tлеж',
+        'сидит',
+        'бежит',
+        'собака\u00a0бежит',
+        'собака бежит',
+        'ка\u3000сп',
+        'a\u00a8b',
+        'a b',
+        'и',
+        'кот\u202fи',
+        'мышь',
+        '%',
+        '_гот',
+        '0%_']
+
+    def setUp(self):
+
+        super(SearchResultTest, self).setUp()
+
+        (self.dictionary_id,
+            _,
+            self.field_id,
+            self.entry_id_list,
+            _) = (
+
+            create_test_data(self.content_list))
+
+        self.search_token_index = models.SEARCH_TOKEN_INDEX
+
+    def tearDown(self):
+
+        models.SEARCH_TOKEN_INDEX = self.search_token_index
+
+        super(SearchResultTest, self).tearDown()
+
+    def search(self, search_func, search_str, diacritics, field_flag, token_flag):
+        """
+        Returns set of ids of lexical entries found by a substring search.
+        """
+
+        models.SEARCH_TOKEN_INDEX = token_flag
+
+        search_string = {
+            'search_string': search_str,
+            'matching_type': 'substring'}
+
+        if field_flag:
+            search_string['field_id'] = self.field_id
+
+        dictionary_query = (
+
+            DBSession
+
+                .query(
+                    Dictionary.client_id,
+                    Dictionary.object_id)
+
+                .filter_by(
+                    client_id = self.dictionary_id[0],
+                    object_id = self.dictionary_id[1]))
+
+        kwargs = {}
+
+        if search_func is search_mechanism:
+            kwargs['load_entities'] = False
+
+        lexical_entry_list, _, _ = (
+
+            search_func(
+                dictionaries = dictionary_query,
+                category = 0,
+                search_strings = [[search_string]],
+                publish = None,
+                accept = True,
+                adopted = None,
+                etymology = None,
+                diacritics = diacritics,
+                category_field_cte_query = DBSession.query(get_text_field_cte(DBSession)),
+                **kwargs))
+
+        return set(
+            tuple(lexical_entry.dbObject.id)
+            for lexical_entry in lexical_entry_list)
+
+    def test_found(self):
+
+        # Making sure that searches do find something.
+
+        for diacritics, index_list in [
+            (None, [0, 3]),
+            ('ignore', [0, 1, 3])]:
+
+            for search_func in [search_mechanism, search_mechanism_simple]:
+
+                self.assertEqual(
+                    self.search(search_func, 'кошка', diacritics, False, True),
+                    set(tuple(self.entry_id_list[index]) for index in index_list))
+
+    def test_same_results(self):
+
+        for search_func in [search_mechanism, search_mechanism_simple]:
+            for diacritics in [None, 'ignore']:
+                for field_flag in [False, True]:
+                    for search_str in self.search_str_list:
+
+                        self.assertEqual(
+                            self.search(search_func, search_str, diacritics, field_flag, True),
+                            self.search(search_func, search_str, diacritics, field_flag, False),
+                            repr((search_func.__name__, search_str, diacritics, field_flag)))
@@ -0,0 +1,77 @@
+#
+# NOTE
+#
+# See information on how tests are organized and how they should work in the tests' package __init__.py file
+# (currently lingvodoc/tests/__init__.py).
+#
+# Unit tests of pure functions, which require neither a database nor a running application.
+#
+
+
+import datetime
+import unittest
+
+import dill
+
+from lingvodoc.cache import codec
+
+
+class Unpackable(object):
+    """
+    Value msgpack can't encode, encoded with dill.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Unpackable) and self.value == other.value
+
+
+class TestCodec(unittest.TestCase):
+    """
+    Tests encoding of cached values, see lingvodoc.cache.codec.
+    """
+
+    def test_round_trip(self):
+
+        value = {
+            'list': [1, 2.5, 'three', None, True],
+            'tuple': (1, (2, 3)),
+            'set': {1, 2},
+            'frozenset': frozenset(['a']),
+            'datetime': datetime.datetime(2020, 1, 2, 3, 4, 5),
+            'date': datetime.date(2020, 1, 2),
+            (1, 2): b'bytes'}
+
+        result = codec.loads(codec.dumps(value))
+
+        self.assertEqual(result, value)
+        self.assertIs(type(result['tuple']), tuple)
+        self.assertIs(type(result['tuple'][1]), tuple)
+        self.assertIs(type(result['set']), set)
+        self.assertIs(type(result['frozenset']), frozenset)
+
+    def test_dill_fallback(self):
+
+        value = [Unpackable((1, 'a'))]
+
+        self.assertEqual(codec.loads(codec.dumps(value)), value)
+
+    def test_dill_codec(self):
+
+        value = {'a': (1, 2)}
+
+        self.assertEqual(
+            codec.loads(codec.dumps(value, codec.get_codec('dill'))), value)
+
+    def test_plain_dill(self):
+
+        # Values cached as plain dill dumps, without codec header.
+
+        self.assertEqual(codec.loads(dill.dumps({'a': [1]})), {'a': [1]})
+
+    def test_unknown_codec(self):
+
+        with self.assertRaises(codec.CodecError):
+            codec.loads(bytes((codec.MARKER, 127)) + b'data')
@@ -0,0 +1,43 @@
+#
+# NOTE
+#
+# See information on how tests are organized and how they should work in the tests' package __init__.py file
+# (currently lingvodoc/tests/__init__.py).
+#
+# Unit tests of pure functions, which require neither a database nor a running application.
+#
+
+
+import unittest
+
+from lingvodoc.schema.gql_dictionaryperspective import decode_cursor, encode_cursor
+from lingvodoc.schema.gql_holders import ResponseError
+
+
+class TestCursor(unittest.TestCase):
+    """
+    Tests keyset pagination cursors of perspective lexical entries.
+    """
+
+    def test_round_trip(self):
+
+        for value_list, sort_flag in [
+            ([1, 2], False),
+            (['абв', 3, 4], True),
+            (['', 5, 6], True)]:
+
+            self.assertEqual(
+                decode_cursor(encode_cursor(value_list), sort_flag), value_list)
+
+    def test_invalid(self):
+
+        for cursor, sort_flag in [
+            ('not base64 json', False),
+            (encode_cursor({'a': 1}), False),
+            (encode_cursor([1, 2]), True),
+            (encode_cursor(['a', 1, 2]), False),
+            (encode_cursor([1, 2, 3]), True),
+            (encode_cursor([1, 'a']), False)]:
+
+            with self.assertRaises(ResponseError):
+                decode_cursor(cursor, sort_flag)
@@ -0,0 +1,92 @@
+#
+# NOTE
+#
+# See information on how tests are organized and how they should work in the tests' package __init__.py file
+# (currently lingvodoc/tests/__init__.py).
+#
+# Unit tests of pure functions, which require neither a database nor a running application.
+#
+
+
+import os
+import tempfile
+import unittest
+
+import pympi
+
+from lingvodoc.schema.gql_search import eaf_query_substring_list
+from lingvodoc.utils.elan_functions import eaf_annotation_list
+
+
+class TestEafQuerySubstringList(unittest.TestCase):
+    """
+    Tests that EAF search files are skipped through extracted annotations only for plain substring queries.
+    """
+
+    def test_substring(self):
+
+        self.assertEqual(
+            eaf_query_substring_list({'value': 'кошка'}),
+            ['кошка'])
+
+        self.assertEqual(
+            eaf_query_substring_list({
+                'value': [
+                    {'value': 'кошка', 'matching_type': 'substring'},
+                    {'value': [{'value': 'собака'}]}]}),
+            ['кошка', 'собака'])
+
+    def test_other(self):
+
+        for query_dict in [
+            None,
+            {},
+            {'value': []},
+            {'value': 'к.шка', 'matching_type': 'regexp'},
+            {'value': 'кошка', 'not': True},
+            {'value': [{'value': 'кошка'}, {'value': 'собака', 'negation': True}]},
+            {'value': [{'value': 'кошка'}], 'exclude': True}]:
+
+            self.assertIsNone(eaf_query_substring_list(query_dict))
+
+
+class TestEafAnnotationList(unittest.TestCase):
+    """
+    Tests extraction of annotations of ELAN markup.
+    """
+
+    def test_reference_tiers(self):
+
+        eaf = pympi.Elan.Eaf()
+
+        eaf.add_tier('text')
+        eaf.add_linguistic_type('symbolic', 'Symbolic_Association')
+        eaf.add_tier('word', ling = 'symbolic', parent = 'text')
+        eaf.add_tier('gloss', ling = 'symbolic', parent = 'word')
+
+        eaf.add_annotation('text', 100, 900, 'кошка сидит')
+        eaf.add_annotation('text', 1000, 1500, '  ')
+        eaf.add_ref_annotation('word', 'text', 500, 'кошка')
+        eaf.add_ref_annotation('gloss', 'word', 500, 'cat.NOM')
+
+        fd, path = tempfile.mkstemp(suffix = '.eaf')
+        os.close(fd)
+
+        try:
+
+            eaf.to_file(path)
+
+            with open(path, 'rb') as eaf_file:
+                content = eaf_file.read()
+
+        finally:
+            os.remove(path)
+
+        # Empty annotations are skipped, reference annotations get time spans of annotations they refer
+        # to, directly or through other reference annotations.
+
+        self.assertEqual(
+            sorted(eaf_annotation_list(content)),
+            [('gloss', 100, 900, 'cat.NOM'),
+                ('text', 100, 900, 'кошка сидит'),
+                ('word', 100, 900, 'кошка')])
@@ -0,0 +1,63 @@
+#
+# NOTE
+#
+# See information on how tests are organized and how they should work in the tests' package __init__.py file
+# (currently lingvodoc/tests/__init__.py).
+#
+# Unit tests of pure functions, which require neither a database nor a running application.
+#
+
+
+import unittest
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+
+import lingvodoc.models as models
+from lingvodoc.schema.gql_search import content_substring_condition
+
+
+class TestContentSubstringCondition(unittest.TestCase):
+    """
+    Tests that only plain substring patterns are matched through search tokens.
+    """
+
+    def setUp(self):
+        self.search_token_index = models.SEARCH_TOKEN_INDEX
+
+    def tearDown(self):
+        models.SEARCH_TOKEN_INDEX = self.search_token_index
+
+    def condition_str(self, pattern_str):
+
+        return str(
+
+            content_substring_condition(
+                models.Entity,
+                func.lower,
+                pattern_str)
+
+                .compile(dialect = postgresql.dialect()))
+
+    def test_tokens(self):
+
+        models.SEARCH_TOKEN_INDEX = True
+
+        self.assertIn('search_token', self.condition_str('%кошка%'))
+
+        for pattern_str in [
+            '%ко шка%',
+            '%ко_шка%',
+            '%ко%шка%',
+            '%ко\\%шка%',
+            'кошка%',
+            '%кошка',
+            '%%']:
+
+            self.assertNotIn('search_token', self.condition_str(pattern_str))
+
+    def test_disabled(self):
+
+        models.SEARCH_TOKEN_INDEX = False
+
+        self.assertNotIn('search_token', self.condition_str('%кошка%'))
@@ -0,0 +1,48 @@
+#
+# NOTE
+#
+# See information on how tests are organized and how they should work in the tests' package __init__.py file
+# (currently lingvodoc/tests/__init__.py).
+#
+# Unit tests of pure functions, which require neither a database nor a running application.
+#
+
+
+import unittest
+
+from lingvodoc.utils.task_registry import task_fingerprint
+
+
+class TestTaskFingerprint(unittest.TestCase):
+    """
+    Tests fingerprints of tasks used to find identical tasks, computed without perspectives, so that data
+    version stamps, which require a database, are not needed.
+    """
+
+    def test_canonical(self):
+
+        fingerprint = (
+            task_fingerprint('Task', 1, {'a': {3, 1, 2}, 'b': (1, 2), 'c': None}, []))
+
+        self.assertEqual(
+            task_fingerprint('Task', 1, {'c': None, 'b': [1, 2], 'a': {2, 3, 1}}, []),
+            fingerprint)
+
+        self.assertEqual(
+            task_fingerprint('Task', '1', {'a': [1, 2, 3], 'b': [1, 2], 'c': None}, []),
+            fingerprint)
+
+    def test_different(self):
+
+        fingerprint = (
+            task_fingerprint('Task', 1, {'a': 1}, []))
+
+        for task_family, user_id, argument_dict in [
+            ('Other task', 1, {'a': 1}),
+            ('Task', 2, {'a': 1}),
+            ('Task', 1, {'a': 2}),
+            ('Task', 1, {'a': 1, 'b': None})]:
+
+            self.assertNotEqual(
+                task_fingerprint(task_family, user_id, argument_dict, []),
+                fingerprint)